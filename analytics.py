@@ -0,0 +1,318 @@
+"""
+Analytics module - Sales reporting over receipt history
+
+Sales are ingested from every receipt journal under receipts/ (the POS
+window's and the checkout server's) and from the older
+receipts/receipt_*.txt files by parsing each receipt once. The parsed
+sales are cached as NumPy column arrays (receipts/analytics.npz) along
+with a watermark per journal, so later refreshes only parse receipts
+written since.
+All reports are vectorized over the columns and stay interactive with
+millions of line items.
+
+Requires NumPy:
+
+    python analytics.py [--top N]
+"""
+import argparse
+import os
+import re
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # only this module needs NumPy
+    np = None
+
+from receipt_journal import find_journals, read_records
+
+ITEM_LINE = re.compile(r"^(.*?)\s+(\d+)\s+₱\s*(-?[\d.]+)\s+₱\s*(-?[\d.]+)\s*$")
+TAX_LINE = re.compile(r"^Tax \(.*\):\s+₱\s*(-?[\d.]+)\s*$")
+DISCOUNT_LINE = re.compile(r"^(.*?)\s+-₱\s*([\d.]+)\s*$")
+DATE_LINE = re.compile(r"^Date: (\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\s*$")
+# Files written by the old one-file-per-sale saver (exports are receipt_<txn>.txt)
+LEGACY_FILE = re.compile(r"^receipt_\d{8}_\d{6}\.txt$")
+
+# Receipt times are local wall-clock times, stored as seconds since this epoch
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(date):
+    return int((date - EPOCH).total_seconds())
+
+
+def parse_cents(text):
+    whole, _, fraction = text.partition(".")
+    cents = abs(int(whole)) * 100 + int((fraction + "00")[:2])
+    return -cents if text.startswith("-") else cents
+
+
+def parse_receipt(text):
+    """Parse a text receipt into (datetime, [(product, qty, total_cents)], tax_cents).
+
+    Discounts become lines with quantity 0 and a negative total, so
+    revenue is counted after promotions. Returns None if the text is
+    not a receipt.
+    """
+    date = None
+    tax_cents = 0
+    lines = []
+    in_items = False
+    for line in text.splitlines():
+        if line.startswith("-----"):
+            in_items = not in_items
+            continue
+        if in_items:
+            match = ITEM_LINE.match(line)
+            if match:
+                lines.append((match.group(1).strip(), int(match.group(2)),
+                              parse_cents(match.group(4))))
+            continue
+        match = DATE_LINE.match(line)
+        if match:
+            date = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S")
+            continue
+        match = TAX_LINE.match(line)
+        if match:
+            tax_cents = parse_cents(match.group(1))
+            continue
+        match = DISCOUNT_LINE.match(line)
+        if match:
+            lines.append((match.group(1).strip(), 0, -parse_cents(match.group(2))))
+    if date is None:
+        return None
+    return date, lines, tax_cents
+
+
+class SalesAnalytics:
+    """Columnar sales store with vectorized reports.
+
+    Line columns: receipt number, product id, quantity, amount (centavos).
+    Receipt columns: local time (seconds since 1970-01-01), tax (centavos).
+    Product names are interned into self.products; ids index into it.
+    """
+
+    def __init__(self, receipts_dir="receipts", journal_dirs=None, cache_path=None):
+        if np is None:
+            raise ImportError("Sales analytics requires NumPy (pip install numpy)")
+        self.receipts_dir = receipts_dir
+        # None: every journal found under receipts_dir at each refresh
+        self.journal_dirs = journal_dirs
+        self.cache_path = cache_path or os.path.join(receipts_dir, "analytics.npz")
+
+        self.products = []
+        self.product_ids = {}
+        self.line_receipt = np.zeros(0, dtype=np.int64)
+        self.line_product = np.zeros(0, dtype=np.int32)
+        self.line_quantity = np.zeros(0, dtype=np.int64)
+        self.line_amount = np.zeros(0, dtype=np.int64)
+        self.receipt_time = np.zeros(0, dtype=np.int64)
+        self.receipt_tax = np.zeros(0, dtype=np.int64)
+        # Watermarks: last transaction parsed from each journal (by its path
+        # relative to receipts_dir) and legacy files already parsed
+        self.journal_txns = {}
+        self.legacy_files = set()
+        self.load_cache()
+
+    def load_cache(self):
+        if not os.path.exists(self.cache_path):
+            return
+        with np.load(self.cache_path, allow_pickle=False) as data:
+            self.products = data["products"].tolist()
+            self.line_receipt = data["line_receipt"]
+            self.line_product = data["line_product"]
+            self.line_quantity = data["line_quantity"]
+            self.line_amount = data["line_amount"]
+            self.receipt_time = data["receipt_time"]
+            self.receipt_tax = data["receipt_tax"]
+            if "journal_keys" in data.files:
+                self.journal_txns = dict(zip(data["journal_keys"].tolist(),
+                                             data["journal_txns"].tolist()))
+            else:
+                # Caches from before the checkout server had its own journal
+                self.journal_txns = {"journal": int(data["journal_txn"])}
+            self.legacy_files = set(data["legacy_files"].tolist())
+        self.product_ids = {name: i for i, name in enumerate(self.products)}
+
+    def save_cache(self):
+        tmp_path = self.cache_path + ".tmp.npz"
+        np.savez(tmp_path,
+                 products=np.array(self.products, dtype=str),
+                 line_receipt=self.line_receipt,
+                 line_product=self.line_product,
+                 line_quantity=self.line_quantity,
+                 line_amount=self.line_amount,
+                 receipt_time=self.receipt_time,
+                 receipt_tax=self.receipt_tax,
+                 journal_keys=np.array(list(self.journal_txns), dtype=str),
+                 journal_txns=np.array(list(self.journal_txns.values()), dtype=np.int64),
+                 legacy_files=np.array(sorted(self.legacy_files), dtype=str))
+        os.replace(tmp_path, self.cache_path)
+
+    def refresh(self):
+        """Parse receipts written since the last refresh; returns how many"""
+        batch = SalesBatch(self)
+        if os.path.isdir(self.receipts_dir):
+            for name in sorted(os.listdir(self.receipts_dir)):
+                if LEGACY_FILE.match(name) and name not in self.legacy_files:
+                    path = os.path.join(self.receipts_dir, name)
+                    with open(path, encoding="utf-8") as f:
+                        batch.add_text(f.read())
+                    self.legacy_files.add(name)
+        journal_dirs = self.journal_dirs
+        if journal_dirs is None:
+            journal_dirs = find_journals(self.receipts_dir)
+        for journal_dir in journal_dirs:
+            key = os.path.relpath(journal_dir, self.receipts_dir)
+            for record in read_records(journal_dir, self.journal_txns.get(key, 0) + 1):
+                batch.add_text(record["text"])
+                self.journal_txns[key] = record["txn"]
+        added = batch.apply()
+        if added:
+            self.save_cache()
+        return added
+
+    def product_id(self, name):
+        product_id = self.product_ids.get(name)
+        if product_id is None:
+            product_id = self.product_ids[name] = len(self.products)
+            self.products.append(name)
+        return product_id
+
+    # Reports
+
+    def receipt_mask(self, start=None, end=None):
+        """Boolean mask of receipts with start <= time < end (datetimes)"""
+        mask = np.ones(len(self.receipt_time), dtype=bool)
+        if start is not None:
+            mask &= self.receipt_time >= to_seconds(start)
+        if end is not None:
+            mask &= self.receipt_time < to_seconds(end)
+        return mask
+
+    def line_mask(self, start=None, end=None):
+        return self.receipt_mask(start, end)[self.line_receipt]
+
+    def receipt_revenue(self):
+        """Revenue before tax per receipt, in centavos"""
+        return np.bincount(self.line_receipt, weights=self.line_amount,
+                           minlength=len(self.receipt_time)).astype(np.int64)
+
+    def revenue_by_day(self, start=None, end=None):
+        """Return [(date string, revenue centavos)] for each day with sales"""
+        mask = self.receipt_mask(start, end)
+        days = self.receipt_time[mask].astype("datetime64[s]").astype("datetime64[D]")
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        totals = np.bincount(inverse, weights=self.receipt_revenue()[mask])
+        return [(str(day), int(total)) for day, total in zip(unique_days, totals)]
+
+    def revenue_by_hour(self, start=None, end=None):
+        """Return revenue in centavos for each hour of the day (24 values)"""
+        mask = self.receipt_mask(start, end)
+        hours = (self.receipt_time[mask] % 86400) // 3600
+        return np.bincount(hours, weights=self.receipt_revenue()[mask],
+                           minlength=24).astype(np.int64).tolist()
+
+    def top_products(self, n=10, by="revenue", start=None, end=None):
+        """Return the n best selling [(product, value)] by revenue or quantity"""
+        mask = self.line_mask(start, end)
+        weights = self.line_amount if by == "revenue" else self.line_quantity
+        totals = np.bincount(self.line_product[mask], weights=weights[mask],
+                             minlength=len(self.products))
+        n = min(n, len(totals))
+        if n == 0:
+            return []
+        top = np.argpartition(-totals, n - 1)[:n]
+        top = top[np.argsort(-totals[top], kind="stable")]
+        return [(self.products[i], int(totals[i])) for i in top if totals[i] > 0]
+
+    def tax_collected(self, start=None, end=None):
+        """Total tax in centavos"""
+        return int(self.receipt_tax[self.receipt_mask(start, end)].sum())
+
+    def basket_size_histogram(self, start=None, end=None, by="units"):
+        """Return counts of receipts per basket size (index = size).
+
+        by="units" counts items sold, by="lines" counts distinct lines.
+        """
+        if by == "units":
+            weights = self.line_quantity
+        else:
+            weights = self.line_quantity > 0  # leave out discount lines
+        sizes = np.bincount(self.line_receipt, weights=weights,
+                            minlength=len(self.receipt_time)).astype(np.int64)
+        return np.bincount(sizes[self.receipt_mask(start, end)]).tolist()
+
+
+class SalesBatch:
+    """Receipts parsed during one refresh, appended to the columns at once"""
+
+    def __init__(self, analytics):
+        self.analytics = analytics
+        self.line_receipt = []
+        self.line_product = []
+        self.line_quantity = []
+        self.line_amount = []
+        self.receipt_time = []
+        self.receipt_tax = []
+
+    def add_text(self, text):
+        parsed = parse_receipt(text)
+        if parsed is None:
+            return
+        date, lines, tax_cents = parsed
+        receipt = len(self.analytics.receipt_time) + len(self.receipt_time)
+        self.receipt_time.append(to_seconds(date))
+        self.receipt_tax.append(tax_cents)
+        for product, quantity, amount in lines:
+            self.line_receipt.append(receipt)
+            self.line_product.append(self.analytics.product_id(product))
+            self.line_quantity.append(quantity)
+            self.line_amount.append(amount)
+
+    def apply(self):
+        a = self.analytics
+        if not self.receipt_time:
+            return 0
+        a.line_receipt = np.concatenate([a.line_receipt, np.array(self.line_receipt, dtype=np.int64)])
+        a.line_product = np.concatenate([a.line_product, np.array(self.line_product, dtype=np.int32)])
+        a.line_quantity = np.concatenate([a.line_quantity, np.array(self.line_quantity, dtype=np.int64)])
+        a.line_amount = np.concatenate([a.line_amount, np.array(self.line_amount, dtype=np.int64)])
+        a.receipt_time = np.concatenate([a.receipt_time, np.array(self.receipt_time, dtype=np.int64)])
+        a.receipt_tax = np.concatenate([a.receipt_tax, np.array(self.receipt_tax, dtype=np.int64)])
+        return len(self.receipt_time)
+
+
+def money(cents):
+    return f"₱{cents / 100:,.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sales reports from receipt history")
+    parser.add_argument("--receipts", default="receipts")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    analytics = SalesAnalytics(args.receipts)
+    added = analytics.refresh()
+    print(f"{len(analytics.receipt_time)} receipts ({added} new), "
+          f"{len(analytics.line_amount)} line items")
+    print("\nRevenue by day:")
+    for day, cents in analytics.revenue_by_day():
+        print(f"  {day}  {money(cents):>14}")
+    print("\nRevenue by hour:")
+    for hour, cents in enumerate(analytics.revenue_by_hour()):
+        if cents:
+            print(f"  {hour:02d}:00  {money(cents):>14}")
+    print(f"\nTop {args.top} products:")
+    for name, cents in analytics.top_products(args.top):
+        print(f"  {name:<30} {money(cents):>14}")
+    print(f"\nTax collected: {money(analytics.tax_collected())}")
+    print("\nBasket sizes (units: receipts):")
+    for size, count in enumerate(analytics.basket_size_histogram()):
+        if count:
+            print(f"  {size:>4}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the POS System - run from the project root with
+python -m benchmarks.<name>
+"""
@@ -0,0 +1,106 @@
+"""
+Sales analytics benchmark - vectorized reports over millions of line items
+
+    python -m benchmarks.bench_analytics [--lines N] [--json PATH]
+
+Requires NumPy. Columns are filled with synthetic sales directly, so the
+numbers measure the reports rather than receipt parsing. Parsing is
+measured separately, from legacy text files and from two receipt
+journals (the POS window's and the checkout server's).
+"""
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from analytics import SalesAnalytics, to_seconds, np
+from benchmarks.common import best_of, make_parser, report
+from receipt import Receipt, ReceiptRenderer
+from receipt_journal import ReceiptJournal
+
+
+def fill_columns(analytics, lines, products=5000, lines_per_receipt=4):
+    rng = np.random.default_rng(1)
+    receipts = lines // lines_per_receipt
+    start = to_seconds(datetime(2025, 1, 1))
+    analytics.products = [f"Product {i:05d}" for i in range(products)]
+    analytics.product_ids = {name: i for i, name in enumerate(analytics.products)}
+    analytics.receipt_time = np.sort(rng.integers(start, start + 365 * 86400, receipts))
+    analytics.receipt_tax = rng.integers(0, 5000, receipts)
+    analytics.line_receipt = np.repeat(np.arange(receipts), lines_per_receipt)
+    analytics.line_product = rng.integers(0, products, len(analytics.line_receipt)).astype(np.int32)
+    analytics.line_quantity = rng.integers(1, 6, len(analytics.line_receipt))
+    analytics.line_amount = analytics.line_quantity * rng.integers(500, 50000, len(analytics.line_receipt))
+
+
+def sample_receipt():
+    receipt = Receipt(datetime(2025, 6, 1, 12, 0),
+                      [("Milk", 2, 82.50, 165.00), ("Bread", 1, 45.99, 45.99)],
+                      210.99, 25.32, 236.31)
+    return ReceiptRenderer().render_text(receipt)
+
+
+def parse_rate(directory, count=2000):
+    """Receipts parsed per second when ingesting legacy text files"""
+    text = sample_receipt()
+    for i in range(count):
+        name = f"receipt_20250601_{i:06d}.txt"
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    analytics = SalesAnalytics(directory)
+    start = time.perf_counter()
+    analytics.refresh()
+    return count / (time.perf_counter() - start)
+
+
+def journal_rate(directory, count=2000):
+    """Receipts parsed per second from the POS and server journals"""
+    text = sample_receipt()
+    journals = [ReceiptJournal(os.path.join(directory, name))
+                for name in ("journal", "server-journal")]
+    for i in range(count):
+        journals[i % 2].append(text)
+    for journal in journals:
+        journal.sync()
+    analytics = SalesAnalytics(directory)
+    start = time.perf_counter()
+    added = analytics.refresh()
+    elapsed = time.perf_counter() - start
+    assert added == count, added
+    # Each journal keeps its own watermark, also across the cache
+    journals[1].append(text)
+    journals[1].sync()
+    assert SalesAnalytics(directory).refresh() == 1
+    for journal in journals:
+        journal.close()
+    return count / elapsed
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        analytics = SalesAnalytics(directory)
+        fill_columns(analytics, args.lines)
+        june = (datetime(2025, 6, 1), datetime(2025, 7, 1))
+        results = {
+            "revenue_by_day_ms": best_of(analytics.revenue_by_day) * 1000,
+            "revenue_by_hour_ms": best_of(analytics.revenue_by_hour) * 1000,
+            "top_products_ms": best_of(lambda: analytics.top_products(10)) * 1000,
+            "top_products_month_ms": best_of(lambda: analytics.top_products(10, "revenue", *june)) * 1000,
+            "tax_collected_ms": best_of(analytics.tax_collected) * 1000,
+            "basket_histogram_ms": best_of(analytics.basket_size_histogram) * 1000,
+            "save_cache_ms": best_of(analytics.save_cache, repeat=1) * 1000,
+            "load_cache_ms": best_of(analytics.load_cache, repeat=1) * 1000,
+        }
+    with tempfile.TemporaryDirectory() as directory:
+        results["parse_receipts_per_second"] = parse_rate(directory)
+    with tempfile.TemporaryDirectory() as directory:
+        results["parse_journal_receipts_per_second"] = journal_rate(directory)
+    report(f"sales analytics ({args.lines:,} line items)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
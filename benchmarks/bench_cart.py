@@ -0,0 +1,81 @@
+"""
+Cart benchmark - POSFunctions operations and receipts at 10, 1k and 10k lines
+
+    python -m benchmarks.bench_cart [--lines 10,1000,10000] [--json PATH]
+"""
+import tempfile
+import time
+
+from benchmarks.common import best_of, make_parser, report
+from functions import POSFunctions
+from products import ProductManager
+from receipt import Receipt, ReceiptRenderer
+from receipt_journal import ReceiptJournal
+
+
+def timed_each(func, args_list):
+    """Average microseconds per call over args_list"""
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+
+def bench_lines(product_manager, journal, line_count):
+    names = [f"Product {i:05d}" for i in range(line_count)]
+    pos = POSFunctions(product_manager)
+    renderer = ReceiptRenderer()
+    results = {
+        "add_to_cart_us": timed_each(pos.add_to_cart, [(name, 1) for name in names]),
+        "add_existing_us": timed_each(pos.add_to_cart, [(name, 1) for name in names]),
+        "update_cart_item_us": timed_each(pos.update_cart_item, [(name, 3) for name in names]),
+    }
+    repeat = 3 if line_count > 1000 else 20
+    results["subtotal_us"] = best_of(pos.calculate_subtotal, repeat) * 1e6
+    results["grand_total_us"] = best_of(pos.calculate_grand_total, repeat) * 1e6
+
+    receipt_text = None
+
+    def generate():
+        nonlocal receipt_text
+        receipt_text = renderer.render_text(Receipt.from_cart(pos))
+
+    results["generate_receipt_us"] = best_of(generate, repeat) * 1e6
+
+    def save():
+        journal.append(receipt_text)
+        journal.sync()
+
+    results["save_receipt_us"] = best_of(save, repeat) * 1e6
+
+    start = time.perf_counter()
+    assert pos.complete_purchase()
+    results["complete_purchase_ms"] = (time.perf_counter() - start) * 1000
+
+    for name in names:
+        pos.add_to_cart(name, 1)
+    results["delete_cart_item_us"] = timed_each(pos.delete_cart_item, [(name,) for name in names])
+    return results
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--lines", default="10,1000,10000", help="comma-separated cart sizes")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.lines.split(",")]
+
+    product_manager = ProductManager(":memory:")
+    product_manager.upsert_products([(f"Product {i:05d}", None, 10.0 + i % 90, 10 ** 9)
+                                     for i in range(max(sizes))])
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = ReceiptJournal(tmp)
+        for line_count in sizes:
+            for key, value in bench_lines(product_manager, journal, line_count).items():
+                results[f"{line_count}_lines.{key}"] = value
+        journal.close()
+    report("cart operations", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
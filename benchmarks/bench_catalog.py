@@ -0,0 +1,65 @@
+"""
+Catalog benchmark - ProductManager operations at 1k, 100k and 1M products
+
+    python -m benchmarks.bench_catalog [--sizes 1000,100000,1000000] [--json PATH]
+"""
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_search import fill_catalog, per_call_us
+from benchmarks.common import make_parser, report
+from products import ProductManager
+
+
+def bench_size(path, size, ops=2000):
+    product_manager = ProductManager(path)
+    start = time.perf_counter()
+    fill_catalog(product_manager, size)
+    fill_seconds = time.perf_counter() - start
+
+    names = product_manager.get_product_names()
+    rng = random.Random(4)
+    lookups = [(rng.choice(names),) for _ in range(ops)]
+    skus = [(f"20{rng.randrange(size):011d}",) for _ in range(ops)]
+    new = [f"Bench Item {i:06d}" for i in range(ops // 4)]
+
+    results = {
+        "fill_seconds": fill_seconds,
+        "get_product_us": per_call_us(product_manager.get_product, lookups),
+        "find_by_sku_us": per_call_us(product_manager.find_by_sku, skus),
+        "page_after_us": per_call_us(product_manager.get_products_page_after,
+                                     [(name, 100) for name, in lookups[:500]]),
+        "add_product_us": per_call_us(product_manager.add_product,
+                                      [(name, 9.99, 10) for name in new]),
+        "update_product_us": per_call_us(product_manager.update_product,
+                                         [(name, 10.99, 20) for name in new]),
+        "delete_product_us": per_call_us(product_manager.delete_product,
+                                         [(name,) for name in new]),
+    }
+    start = time.perf_counter()
+    rows = product_manager.get_all_products()
+    results["get_all_products_seconds"] = time.perf_counter() - start
+    assert len(rows) == product_manager.count_products()
+    product_manager.close()
+    return results
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="comma-separated catalog sizes")
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        # An on-disk database, as in the store, rebuilt for every size
+        with tempfile.TemporaryDirectory() as tmp:
+            for key, value in bench_size(os.path.join(tmp, "bench.db"), size).items():
+                results[f"{size}.{key}"] = value
+    report("product catalog", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
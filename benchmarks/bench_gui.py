@@ -0,0 +1,108 @@
+"""
+GUI benchmark - cart table and product table redraws under a withdrawn Tk
+
+    python -m benchmarks.bench_gui [--lines 10,1000,10000] [--products N] [--json PATH]
+
+Needs a display; on a headless machine run it under Xvfb, e.g.
+    xvfb-run python -m benchmarks.bench_gui
+Without one the benchmark reports itself as skipped.
+"""
+import os
+import tempfile
+import time
+import tkinter as tk
+
+from benchmarks.bench_search import fill_catalog
+from benchmarks.common import make_parser, report
+from gui import POSWindow
+from product_window import ProductManagementWindow
+from products import DEFAULT_DB_PATH, ProductManager
+
+
+def timed_ms(func, root):
+    """Run func and let Tk finish the resulting redraw"""
+    start = time.perf_counter()
+    func()
+    root.update_idletasks()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_cart(root, window, line_count):
+    pos = window.pos_functions
+    names = pos.product_manager.get_product_names()[:line_count]
+    for name in names:
+        pos.add_to_cart(name, 1)
+    results = {"full_redraw_ms": timed_ms(window.update_cart_display, root)}
+    results["no_change_ms"] = timed_ms(window.update_cart_display, root)
+
+    def add_one():
+        pos.add_to_cart(names[0], 1)
+        window.refresh_cart_row(names[0])
+        window.update_totals()
+
+    results["add_one_line_ms"] = timed_ms(add_one, root)
+    pos.clear_cart()
+    results["clear_ms"] = timed_ms(window.update_cart_display, root)
+    return results
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--lines", default="10,1000,10000", help="comma-separated cart sizes")
+    parser.add_argument("--products", type=int, default=100_000)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        report("gui", {"skipped": f"no display ({e})"}, args.json)
+        return
+    root.withdraw()
+
+    # POSWindow opens its catalog, ledger and journal in the working directory
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            sizes = [int(s) for s in args.lines.split(",")]
+            product_manager = ProductManager(DEFAULT_DB_PATH)
+            fill_catalog(product_manager, max(args.products, max(sizes)))
+            product_manager.close()
+
+            results = {}
+            start = time.perf_counter()
+            window = POSWindow(root)
+            root.update_idletasks()
+            results["startup_ms"] = (time.perf_counter() - start) * 1000
+            while not window.catalog_ready:
+                root.update()
+                time.sleep(0.002)
+            results["catalog_ready_ms"] = (time.perf_counter() - start) * 1000
+
+            for line_count in sizes:
+                for key, value in bench_cart(root, window, line_count).items():
+                    results[f"cart_{line_count}_lines.{key}"] = value
+
+            start = time.perf_counter()
+            manager = ProductManagementWindow(root, window.product_manager, window)
+            root.update_idletasks()
+            results["product_window_open_ms"] = (time.perf_counter() - start) * 1000
+            table = manager.product_table
+            results["product_table_reload_ms"] = timed_ms(table.reload, root)
+            results["product_table_scroll_ms"] = timed_ms(lambda: table.scroll_by(1), root)
+            results["product_table_jump_ms"] = timed_ms(
+                lambda: table.scroll_to(table.total // 2), root)
+            manager.close()
+
+            window.receipt_writer.close()
+            window.ledger.close()
+            window.receipt_history.close()
+            window.product_manager.close()
+        finally:
+            os.chdir(old_cwd)
+    root.destroy()
+    report(f"gui ({args.products:,} products)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Receipt history benchmark - indexed search against scanning every receipt
+
+    python -m benchmarks.bench_history [--receipts N] [--json PATH]
+"""
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from analytics import parse_receipt
+from benchmarks.common import best_of, make_parser, report
+from pricing import CENT, TAX_RATE
+from receipt import Receipt, ReceiptRenderer
+from receipt_history import ReceiptHistory, tokens
+from receipt_journal import ReceiptJournal, read_records
+
+PRODUCTS = [("Milk", "25.49"), ("Bread", "45.99"), ("Eggs", "11.00"), ("Apple", "15.00"),
+            ("Banana", "10.00"), ("Hotdog", "45.00"), ("Chocolate Milk", "32.50"),
+            ("Rice 5kg", "289.00"), ("Coffee", "120.00"), ("Sardines", "24.75")]
+
+
+def make_receipts(journal, count, start):
+    rng = random.Random(7)
+    renderer = ReceiptRenderer()
+    for i in range(count):
+        lines = []
+        for name, price in rng.sample(PRODUCTS, rng.randint(1, 6)):
+            quantity = rng.randint(1, 12)
+            lines.append((name, quantity, Decimal(price), Decimal(price) * quantity))
+        subtotal = sum(line[3] for line in lines)
+        tax = (subtotal * TAX_RATE).quantize(CENT)
+        date = start + timedelta(minutes=5 * i)
+        journal.append(renderer.render_text(Receipt(date, lines, subtotal, tax, subtotal + tax)),
+                       date)
+    journal.sync()
+
+
+def scan(journal_dir, product, start, end, min_cents):
+    """What a search costs without the index: parse every receipt"""
+    word = product.lower()
+    matches = 0
+    for record in read_records(journal_dir):
+        date, lines, tax_cents = parse_receipt(record["text"])
+        if not start <= date < end:
+            continue
+        if sum(amount for _, _, amount in lines) + tax_cents < min_cents:
+            continue
+        if any(token.startswith(word) for name, _, _ in lines for token in tokens(name)):
+            matches += 1
+    return matches
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--receipts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    start_day = datetime(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = ReceiptJournal(f"{tmp}/journal")
+        make_receipts(journal, args.receipts, start_day)
+
+        history = ReceiptHistory(tmp)
+        start = time.perf_counter()
+        history.refresh()
+        build_seconds = time.perf_counter() - start
+
+        make_receipts(journal, 32, start_day + timedelta(minutes=5 * args.receipts))
+        start = time.perf_counter()
+        history.refresh()
+        batch_ms = (time.perf_counter() - start) * 1000
+
+        # "Milk between two dates over ₱500", a month in the middle
+        month_start = start_day + timedelta(minutes=5 * args.receipts // 2)
+        month_end = month_start + timedelta(days=30)
+        query = ("Milk", month_start, month_end, 50000)
+        entry = history.search("bread", limit=1)[0]
+        results = {
+            "receipts": history.count(),
+            "index_build_seconds": build_seconds,
+            "index_per_receipt_us": build_seconds / args.receipts * 1e6,
+            "refresh_batch_of_32_ms": batch_ms,
+            "search_product_range_total_ms": best_of(lambda: history.search(*query)) * 1000,
+            "search_product_only_ms": best_of(lambda: history.search("milk")) * 1000,
+            "search_range_only_ms": best_of(
+                lambda: history.search(None, month_start, month_end)) * 1000,
+            "read_text_us": best_of(lambda: history.read_text(entry), 20) * 1e6,
+        }
+        start = time.perf_counter()
+        scanned = scan(f"{tmp}/journal", *query)
+        results["scan_all_receipts_ms"] = (time.perf_counter() - start) * 1000
+        assert scanned == len(history.search(*query, limit=args.receipts))
+        history.close()
+        journal.close()
+    report(f"receipt history ({args.receipts:,} receipts)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
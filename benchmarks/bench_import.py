@@ -0,0 +1,75 @@
+"""
+Catalog import/export throughput benchmark (rows/sec)
+
+Writes a synthetic price file, imports it into a fresh catalog with a
+search index attached, re-imports it as a price update, and exports it.
+
+    python -m benchmarks.bench_import [--rows N] [--json PATH]
+"""
+import csv
+import os
+import tempfile
+import time
+
+from benchmarks.common import make_parser, report
+from catalog_io import export_csv, export_jsonl, import_csv, import_jsonl
+from products import ProductManager
+from search import ProductSearchIndex
+
+
+def write_price_file(path, rows, price_offset=0.0):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "sku", "price", "stock"])
+        for i in range(rows):
+            writer.writerow([f"Product {i:07d}", f"20{i:011d}", f"{10 + i % 500 + price_offset:.2f}",
+                             i % 1000])
+        writer.writerow(["", "", "1.00", "1"])  # one invalid row
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        product_manager = ProductManager(os.path.join(tmp, "bench.db"))
+        product_manager.subscribe(ProductSearchIndex(product_manager).build().handle_events)
+
+        price_file = os.path.join(tmp, "prices.csv")
+        write_price_file(price_file, args.rows)
+        result, insert_seconds = timed(import_csv, product_manager, price_file)
+        assert result.imported == args.rows and result.error_count == 1
+
+        write_price_file(price_file, args.rows, price_offset=0.5)
+        result, update_seconds = timed(import_csv, product_manager, price_file)
+
+        csv_out = os.path.join(tmp, "out.csv")
+        jsonl_out = os.path.join(tmp, "out.jsonl")
+        _, export_csv_seconds = timed(export_csv, product_manager, csv_out)
+        count, export_jsonl_seconds = timed(export_jsonl, product_manager, jsonl_out)
+
+        fresh = ProductManager(os.path.join(tmp, "fresh.db"))
+        _, import_jsonl_seconds = timed(import_jsonl, fresh, jsonl_out)
+        product_manager.close()
+        fresh.close()
+
+    rows = args.rows
+    results = {
+        "import_csv_new_rows_per_sec": rows / insert_seconds,
+        "import_csv_update_rows_per_sec": rows / update_seconds,
+        "import_jsonl_rows_per_sec": count / import_jsonl_seconds,
+        "export_csv_rows_per_sec": count / export_csv_seconds,
+        "export_jsonl_rows_per_sec": count / export_jsonl_seconds,
+    }
+    report(f"catalog import/export ({rows:,} rows)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Instrumentation benchmark - timer overhead and an instrumented checkout run
+
+    python -m benchmarks.bench_instrumentation [--calls N] [--json PATH]
+"""
+import time
+
+from benchmarks.common import make_parser, report
+from functions import POSFunctions
+from instrumentation import metrics, timed
+from products import ProductManager
+
+
+def plain():
+    pass
+
+
+@timed("bench.noop")
+def instrumented():
+    pass
+
+
+def per_call_ns(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=500_000)
+    args = parser.parse_args()
+
+    baseline = per_call_ns(plain, args.calls)
+    metrics.enabled = False
+    disabled = per_call_ns(instrumented, args.calls)
+    metrics.enabled = True
+    enabled = per_call_ns(instrumented, args.calls)
+    results = {
+        "overhead_disabled_ns": disabled - baseline,
+        "overhead_enabled_ns": enabled - baseline,
+    }
+
+    # Latency percentiles of the hot paths over a batch of checkouts
+    metrics.reset()
+    product_manager = ProductManager(":memory:")
+    product_manager.upsert_products([(name, None, 10.0, 10 ** 9)
+                                     for name in ("Apple", "Bread", "Milk")])
+    pos = POSFunctions(product_manager)
+    for _ in range(2000):
+        for name in ("Apple", "Bread", "Milk"):
+            pos.add_to_cart(name, 1)
+        pos.complete_purchase()
+    for name, summary in metrics.snapshot().items():
+        if not name.startswith("bench."):
+            results[f"{name}.p50_ms"] = summary["p50_ms"]
+            results[f"{name}.p99_ms"] = summary["p99_ms"]
+    report("instrumentation", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Memory benchmark - bytes per product record and per cart line
+
+Compares the dict records the catalog and cart used to hold with the
+__slots__ records in products.py and functions.py.
+
+    python -m benchmarks.bench_memory [--count N] [--json PATH]
+"""
+import tracemalloc
+
+from benchmarks.common import make_parser, report
+from functions import CartLine
+from products import Product
+
+
+def bytes_per_object(build, count):
+    """Average traced allocation of count objects made by build(i)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The holding list is not part of the record cost
+    list_size = objects.__sizeof__()
+    return (after - before - list_size) / count
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    count = args.count
+
+    # Names, prices and quantities are created up front so only the
+    # record itself is measured
+    names = [f"Product {i:06d}" for i in range(count)]
+    skus = [f"20{i:011d}" for i in range(count)]
+    prices = [float(i % 1000) + 0.99 for i in range(count)]
+    stocks = [1000 + i for i in range(count)]
+
+    results = {
+        "products.dict_bytes": bytes_per_object(
+            lambda i: {"price": prices[i], "stock": stocks[i]}, count),
+        "products.slots_bytes": bytes_per_object(
+            lambda i: Product(names[i], skus[i], prices[i], stocks[i]), count),
+        "cart_line.dict_bytes": bytes_per_object(
+            lambda i: {"product": names[i], "price": prices[i],
+                       "quantity": stocks[i], "total": prices[i] * stocks[i]}, count),
+        "cart_line.slots_bytes": bytes_per_object(
+            lambda i: CartLine(names[i], stocks[i], stocks[i]), count),
+    }
+    report(f"memory ({count:,} records)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
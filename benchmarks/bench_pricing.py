@@ -0,0 +1,109 @@
+"""
+Pricing benchmark - cart pricing with many active promotions
+
+    python -m benchmarks.bench_pricing [--promotions N] [--lines N] [--json PATH]
+
+Compares the compiled rule tables with checking every promotion against
+every cart line, and re-pricing a whole cart after one line changes with
+CartPricer re-evaluating only what the change affects.
+"""
+import random
+import time
+from datetime import datetime
+
+from benchmarks.common import make_parser, report
+from functions import CartLine
+from pricing import Bundle, BuyGet, CartPricer, PercentOff, PricingRules
+
+PRODUCTS = [f"Product {i:05d}" for i in range(5000)]
+
+
+def make_rules(count):
+    rng = random.Random(1)
+    rules = PricingRules()
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            rules.add_promotion(PercentOff(rng.sample(PRODUCTS, 5), rng.choice([5, 10, 20]),
+                                           datetime(2025, 1, 1, 8).time(),
+                                           datetime(2025, 1, 1, 20).time()))
+        elif kind == 1:
+            rules.add_promotion(BuyGet(rng.choice(PRODUCTS), rng.randint(1, 3), 1))
+        else:
+            items = {name: rng.randint(1, 2) for name in rng.sample(PRODUCTS, 2)}
+            rules.add_promotion(Bundle(items, rng.randint(1000, 5000)))
+    for i, name in enumerate(PRODUCTS):
+        rules.set_category(name, f"category {i % 10}")
+    rules.set_tax_rate("category 0", "0.00")
+    return rules
+
+
+def naive_discount(rules, lines, now):
+    """Reference: scan every promotion for every line"""
+    total = 0
+    for line in lines:
+        best = 0
+        for promotion in rules.promotions:
+            if isinstance(promotion, Bundle):
+                if line.product in promotion.items:
+                    best = max(best, 1)
+            elif line.product in promotion.products:
+                best = max(best, promotion.line_discount(line.quantity, line.price_cents, now))
+        total += best
+    return total
+
+
+def per_cart_us(func, carts):
+    start = time.perf_counter()
+    for cart in carts:
+        func(cart)
+    return (time.perf_counter() - start) / len(carts) * 1e6
+
+
+def edit_and_price(rules, cart, pricer, now):
+    """Bump the quantity of one line and price the cart again"""
+    line = cart[len(cart) // 2]
+    line.quantity += 1
+    if pricer is None:
+        return rules.price_cart(cart, now)
+    pricer.changed(line.product)
+    return pricer.price(now)
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--promotions", type=int, default=1000)
+    parser.add_argument("--lines", type=int, default=20)
+    args = parser.parse_args()
+
+    rules = make_rules(args.promotions)
+    start = time.perf_counter()
+    rules.compile()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(2)
+    now = datetime(2025, 6, 1, 12)
+    carts = [[CartLine(name, rng.randint(1000, 50000), rng.randint(1, 6))
+              for name in rng.sample(PRODUCTS, args.lines)] for _ in range(500)]
+    priced = [rules.price_cart(cart, now) for cart in carts]
+    pricers = {}
+    for cart in carts:
+        pricer = pricers[id(cart)] = CartPricer(rules, {line.product: line for line in cart})
+        pricer.price(now)
+
+    results = {
+        "compile_ms": compile_ms,
+        "price_cart_us": per_cart_us(lambda cart: rules.price_cart(cart, now), carts),
+        "naive_scan_us": per_cart_us(lambda cart: naive_discount(rules, cart, now), carts[:100]),
+        "edit_full_reprice_us": per_cart_us(
+            lambda cart: edit_and_price(rules, cart, None, now), carts),
+        "edit_incremental_us": per_cart_us(
+            lambda cart: edit_and_price(rules, cart, pricers[id(cart)], now), carts),
+        "carts_with_discounts": sum(1 for p in priced if p.discount_cents),
+    }
+    report(f"cart pricing ({args.promotions:,} promotions, {args.lines} lines)",
+           results, args.json)
+
+
+if __name__ == "__main__":
+    main()
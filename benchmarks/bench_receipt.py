@@ -0,0 +1,71 @@
+"""
+Receipt rendering benchmark - 1, 100 and 10,000 line receipts
+
+Times the compiled ReceiptRenderer in each output format against the
+previous string-concatenation renderer.
+
+    python -m benchmarks.bench_receipt [--json PATH]
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from benchmarks.common import best_of, make_parser, report
+from receipt import Receipt, ReceiptRenderer
+
+
+def concat_receipt(receipt):
+    """The receipt as generate_receipt used to build it, with repeated +="""
+    text = "=" * 45 + "\n"
+    text += " POS SYSTEM RECEIPT\n"
+    text += "=" * 45 + "\n"
+    text += f"Date: {receipt.date.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    text += "=" * 45 + "\n\n"
+    text += f"{'Item':<20} {'Qty':<5} {'Price':<10} {'Total':<10}\n"
+    text += "-" * 45 + "\n"
+    for product, quantity, price, total in receipt.lines:
+        text += f"{product:<20} {quantity:<5} "
+        text += f"₱{price:<9.2f} ₱{total:<9.2f}\n"
+    text += "-" * 45 + "\n"
+    text += f"\n{'Subtotal:':<35} ₱{receipt.subtotal:>8.2f}\n"
+    text += f"{'Tax (12%):':<35} ₱{receipt.tax:>8.2f}\n"
+    text += "=" * 45 + "\n"
+    text += f"{'GRAND TOTAL:':<35} ₱{receipt.grand_total:>8.2f}\n"
+    text += "=" * 45 + "\n\n"
+    text += " Thank you for your purchase!\n"
+    text += " Please come again!\n"
+    text += "=" * 45 + "\n"
+    return text
+
+
+def make_receipt(line_count):
+    lines = []
+    subtotal = Decimal("0.00")
+    for i in range(line_count):
+        price = Decimal(10 + i % 90) + Decimal("0.99")
+        quantity = 1 + i % 5
+        lines.append((f"Product {i}", quantity, price, price * quantity))
+        subtotal += price * quantity
+    tax = (subtotal * Decimal("0.12")).quantize(Decimal("0.01"))
+    return Receipt(datetime.now(), lines, subtotal, tax, subtotal + tax)
+
+
+def main():
+    args = make_parser(__doc__.splitlines()[1]).parse_args()
+    renderer = ReceiptRenderer()
+    results = {}
+    for line_count in (1, 100, 10_000):
+        receipt = make_receipt(line_count)
+        assert concat_receipt(receipt) == renderer.render_text(receipt)
+        repeat = 5 if line_count > 1000 else 200
+        loops = 1 if line_count > 1000 else 20
+        for name, render in (("concat", concat_receipt),
+                             ("text", renderer.render_text),
+                             ("escpos", renderer.render_escpos),
+                             ("json", renderer.render_json)):
+            seconds = best_of(lambda: [render(receipt) for _ in range(loops)], repeat) / loops
+            results[f"{line_count}_lines.{name}_us"] = seconds * 1e6
+    report("receipt rendering", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
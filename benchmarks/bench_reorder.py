@@ -0,0 +1,43 @@
+"""
+Reorder engine benchmark - stock events and reorder queries on a large catalog
+
+    python -m benchmarks.bench_reorder [--products N] [--json PATH]
+"""
+import random
+import time
+
+from benchmarks.bench_search import fill_catalog, per_call_us
+from benchmarks.common import best_of, make_parser, report
+from products import STOCK_CHANGED, ProductEvent, ProductManager
+from reorder import ReorderEngine
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=200_000)
+    args = parser.parse_args()
+
+    product_manager = ProductManager(":memory:")
+    fill_catalog(product_manager, args.products)
+    names = product_manager.get_product_names()
+
+    start = time.perf_counter()
+    engine = ReorderEngine(product_manager, default_threshold=5).build()
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(3)
+    events = [([ProductEvent(STOCK_CHANGED, rng.choice(names), stock=rng.randint(0, 500))],)
+              for _ in range(20000)]
+    results = {
+        "build_seconds": build_seconds,
+        "stock_event_us": per_call_us(engine.handle_events, events),
+        "below_reorder_point": len(engine.needs_reorder()),
+        "needs_reorder_top10_us": best_of(lambda: engine.needs_reorder(10), 100) * 1e6,
+        "needs_reorder_all_ms": best_of(engine.needs_reorder, 20) * 1000,
+        "heap_entries": len(engine.heap),
+    }
+    report(f"reorder engine ({args.products:,} products)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
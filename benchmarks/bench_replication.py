@@ -0,0 +1,131 @@
+"""
+Replication benchmark - snapshot bootstrap and sync lag under sustained edits
+
+    python -m benchmarks.bench_replication [--products N] [--edits-per-sec N]
+                                           [--seconds S] [--interval S] [--json PATH]
+
+A primary catalog is served by an in-process CheckoutServer. For each
+transport (HTTP over a local port, and the primary's database file
+opened read-only) a fresh replica bootstraps from a snapshot, then
+follows the change feed while a writer thread edits prices at a steady
+rate. Lag is the time from an edit committing on the primary to the
+replica having applied it.
+"""
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_search import fill_catalog
+from benchmarks.common import best_of, make_parser, report
+from products import ProductManager
+from replication import DatabasePeer, HTTPPeer, ReplicaClient
+from server import CheckoutServer, CheckoutService
+
+
+def start_server(product_manager):
+    """Serve the primary from a background event loop; returns (port, stop)"""
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(CheckoutServer(CheckoutService(product_manager)).start(port=0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+    return server.sockets[0].getsockname()[1], stop
+
+
+def edit_load(primary, names, rate, seconds, edits):
+    """Update one price every 1/rate seconds, appending (version, time)"""
+    rng = random.Random(3)
+    start = time.perf_counter()
+    for i in range(int(rate * seconds)):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        primary.update_product(rng.choice(names), round(rng.uniform(5, 500), 2), 100)
+        edits.append((primary.catalog_version(), time.perf_counter()))
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def bench_transport(primary, names, peer, path, args):
+    replica = ProductManager(path)
+    client = ReplicaClient(replica, peer)
+    start = time.perf_counter()
+    client.sync()
+    results = {"bootstrap_seconds": time.perf_counter() - start}
+    assert replica.count_products() == primary.count_products()
+    results["idle_sync_ms"] = best_of(client.sync, 20) * 1000
+
+    edits = []
+    writer = threading.Thread(target=edit_load,
+                              args=(primary, names, args.edits_per_sec, args.seconds, edits))
+    synced = []  # (replica version, time) after each sync
+    writer.start()
+    while writer.is_alive() or replica.replica_version() < primary.catalog_version():
+        client.sync()
+        synced.append((replica.replica_version(), time.perf_counter()))
+        time.sleep(args.interval)
+    writer.join()
+
+    lags = []
+    i = 0
+    for version, edited in edits:
+        while synced[i][0] < version:
+            i += 1
+        lags.append((synced[i][1] - edited) * 1000)
+    lags.sort()
+    results.update({
+        "edits": len(edits),
+        "edits_per_sec": len(edits) / args.seconds,
+        "lag_p50_ms": percentile(lags, 0.50),
+        "lag_p95_ms": percentile(lags, 0.95),
+        "lag_max_ms": lags[-1],
+    })
+    # Stock is each terminal's own; everything else matches the primary
+    assert ([row[:3] for row in replica.iter_catalog()]
+            == [row[:3] for row in primary.iter_catalog()])
+    replica.close()
+    return results
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--edits-per-sec", type=float, default=200)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--interval", type=float, default=0.05, help="replica poll interval")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        primary = ProductManager(os.path.join(tmp, "primary.db"))
+        fill_catalog(primary, args.products)
+        names = primary.get_product_names()
+        port, stop = start_server(primary)
+
+        peers = {"http": HTTPPeer(port=port),
+                 "local": DatabasePeer(os.path.join(tmp, "primary.db"))}
+        for transport, peer in peers.items():
+            path = os.path.join(tmp, f"replica-{transport}.db")
+            for key, value in bench_transport(primary, names, peer, path, args).items():
+                results[f"{transport}.{key}"] = value
+            peer.close()
+        stop()
+        primary.close()
+    report(f"catalog replication ({args.products:,} products, "
+           f"{args.edits_per_sec:g} edits/s, poll {args.interval * 1000:g} ms)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Scanner benchmark - sustained scans per second, one at a time and batched
+
+    python -m benchmarks.bench_scanner [--products N] [--scans N] [--json PATH]
+
+A synthetic burst of barcode scans (mostly popular products, some
+repeats in a row and a few unknown codes) is applied to a cart the way
+add_item() does it, one lookup and cart update per scan, and through
+ScanPipeline with the scans arriving in batches of different sizes.
+"""
+import random
+import time
+
+from benchmarks.bench_search import fill_catalog
+from benchmarks.common import make_parser, report
+from functions import POSFunctions
+from products import ProductManager
+from scanner import ScanPipeline
+
+
+def scan_burst(product_count, count):
+    rng = random.Random(5)
+    popular = [f"20{i:011d}" for i in rng.sample(range(product_count), 50)]
+    codes = []
+    while len(codes) < count:
+        roll = rng.random()
+        if roll < 0.01:
+            codes.append(f"99{rng.randrange(10 ** 11):011d}")  # not in the catalog
+        elif roll < 0.8:
+            codes.extend([rng.choice(popular)] * rng.randint(1, 3))
+        else:
+            codes.append(f"20{rng.randrange(product_count):011d}")
+    return codes[:count]
+
+
+def one_at_a_time(product_manager, codes):
+    """The add_item() path: resolve each scan, then add one unit"""
+    pos = POSFunctions(product_manager)
+    start = time.perf_counter()
+    for code in codes:
+        name = code if product_manager.get_product(code) else product_manager.find_by_sku(code)
+        if name:
+            pos.add_to_cart(name, 1)
+    elapsed = time.perf_counter() - start
+    pos.clear_cart()
+    return elapsed
+
+
+def batched(product_manager, codes, batch_size):
+    pos = POSFunctions(product_manager)
+    pipeline = ScanPipeline(pos)
+    start = time.perf_counter()
+    for i in range(0, len(codes), batch_size):
+        for code in codes[i:i + batch_size]:
+            pipeline.submit(code)
+        pipeline.process()
+    elapsed = time.perf_counter() - start
+    pos.clear_cart()
+    return elapsed
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--scans", type=int, default=50_000)
+    args = parser.parse_args()
+
+    product_manager = ProductManager(":memory:")
+    fill_catalog(product_manager, args.products)
+    with product_manager.lock, product_manager.conn:
+        product_manager.conn.execute("UPDATE products SET stock = 1000000")
+    codes = scan_burst(args.products, args.scans)
+
+    results = {"one_at_a_time_scans_per_sec": len(codes) / one_at_a_time(product_manager, codes)}
+    for batch_size in (1, 10, 100):
+        elapsed = batched(product_manager, codes, batch_size)
+        results[f"batch_{batch_size}_scans_per_sec"] = len(codes) / elapsed
+    report(f"scanner input ({args.scans:,} scans, {args.products:,} products)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
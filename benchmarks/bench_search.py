@@ -0,0 +1,64 @@
+"""
+Product search benchmark - type-ahead and barcode lookup on a large catalog
+
+    python -m benchmarks.bench_search [--products N] [--json PATH]
+"""
+import random
+import time
+
+from benchmarks.common import make_parser, report
+from products import ProductManager
+from search import ProductSearchIndex
+
+WORDS = ["Apple", "Banana", "Bread", "Chicken", "Coffee", "Eggs", "Fries", "Hotdog",
+         "Iced", "Juice", "Milk", "Noodles", "Rice", "Soda", "Tea", "Water"]
+
+
+def fill_catalog(product_manager, count):
+    rng = random.Random(1)
+    rows = [(f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i:06d}", f"20{i:011d}",
+             round(rng.uniform(5, 500), 2), rng.randint(0, 500)) for i in range(count)]
+    with product_manager.lock, product_manager.conn:
+        product_manager.conn.executemany(
+            "INSERT INTO products (name, sku, price, stock) VALUES (?, ?, ?, ?)", rows)
+
+
+def per_call_us(func, args_list):
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=200_000)
+    args = parser.parse_args()
+
+    product_manager = ProductManager(":memory:")
+    fill_catalog(product_manager, args.products)
+
+    start = time.perf_counter()
+    index = ProductSearchIndex(product_manager).build()
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(2)
+    prefixes = [(rng.choice(WORDS)[:rng.randint(1, 4)], 10) for _ in range(2000)]
+    words = [(rng.choice(WORDS).lower()[:3], 10) for _ in range(2000)]
+    skus = [(f"20{rng.randrange(args.products):011d}",) for _ in range(2000)]
+    typos = [("mlik", 10, True), ("chiken", 10, True), ("bananna", 10, True)] * 50
+
+    results = {
+        "build_seconds": build_seconds,
+        "prefix_search_us": per_call_us(index.search, prefixes),
+        "word_search_us": per_call_us(index.search, words),
+        "sku_lookup_us": per_call_us(index.lookup_sku, skus),
+        "fuzzy_search_us": per_call_us(index.search, typos),
+        "add_us": per_call_us(index.add, [(f"New Item {i}", f"99{i:011d}") for i in range(1000)]),
+        "remove_us": per_call_us(index.remove, [(f"New Item {i}",) for i in range(1000)]),
+    }
+    report(f"product search ({args.products:,} products)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Checkout server load test - many terminals against one process
+
+Starts a CheckoutServer in-process on a local port, with a sales ledger
+in a temporary directory as in production, and drives it with
+concurrent keep-alive client sessions, each running add/update/purchase
+cycles, then reports throughput and request latency percentiles.
+
+    python -m benchmarks.bench_server [--terminals N] [--checkouts N] [--no-ledger]
+                                      [--json PATH]
+"""
+import asyncio
+import json
+import random
+import tempfile
+import time
+
+from benchmarks.common import make_parser, report
+from ledger import SalesLedger
+from products import ProductManager
+from server import CheckoutServer, CheckoutService
+
+
+class Client:
+    """Tiny HTTP/1.1 keep-alive client for the checkout server"""
+
+    def __init__(self, reader, writer, latencies):
+        self.reader = reader
+        self.writer = writer
+        self.latencies = latencies
+
+    async def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        start = time.perf_counter()
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: pos\r\n"
+                          f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line == b"\r\n":
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        payload = json.loads(await self.reader.readexactly(length))
+        self.latencies.append(time.perf_counter() - start)
+        return status, payload
+
+
+async def terminal(port, names, checkouts, seed, latencies, stats):
+    rng = random.Random(seed)
+    client = Client(*await asyncio.open_connection("127.0.0.1", port), latencies)
+    _, session = await client.request("POST", "/sessions")
+    base = f"/sessions/{session['session']}"
+    for _ in range(checkouts):
+        for _ in range(rng.randint(1, 5)):
+            await client.request("POST", f"{base}/cart",
+                                 {"product": rng.choice(names), "quantity": rng.randint(1, 3)})
+        status, cart = await client.request("GET", f"{base}/cart")
+        if cart["lines"]:
+            name = cart["lines"][0]["product"]
+            await client.request("PUT", f"{base}/cart/{name.replace(' ', '%20')}", {"quantity": 1})
+        status, _ = await client.request("POST", f"{base}/purchase")
+        stats["purchases" if status == 200 else "rejected"] += 1
+    await client.request("DELETE", base)
+    client.writer.close()
+
+
+async def run(args, ledger_dir):
+    product_manager = ProductManager(":memory:")
+    names = [f"Item {i:04d}" for i in range(args.products)]
+    product_manager.upsert_products([(name, None, 19.99, 1_000_000) for name in names])
+    ledger = None
+    if ledger_dir:
+        ledger = SalesLedger(ledger_dir)
+        product_manager.attach_ledger(ledger)
+    server = await CheckoutServer(CheckoutService(product_manager)).start(port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    latencies = []
+    stats = {"purchases": 0, "rejected": 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(terminal(port, names, args.checkouts, i, latencies, stats)
+                           for i in range(args.terminals)))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    if ledger:
+        ledger.close()
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return {
+        **stats,
+        "requests": len(latencies),
+        "requests_per_sec": len(latencies) / elapsed,
+        "purchases_per_sec": stats["purchases"] / elapsed,
+        "latency_p50_ms": pick(0.50),
+        "latency_p95_ms": pick(0.95),
+        "latency_p99_ms": pick(0.99),
+    }
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--terminals", type=int, default=32)
+    parser.add_argument("--checkouts", type=int, default=50)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--no-ledger", action="store_true",
+                        help="run without a sales ledger (no fsync per purchase)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(run(args, None if args.no_ledger else tmp))
+    ledger = "no ledger" if args.no_ledger else "ledger"
+    report(f"checkout server ({args.terminals} terminals, {ledger})", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
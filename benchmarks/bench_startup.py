@@ -0,0 +1,93 @@
+"""
+Startup benchmark - time from launch to the first frame and to a loaded catalog
+
+    python -m benchmarks.bench_startup [--products N] [--runs N] [--json PATH]
+
+Each run starts a fresh interpreter in a directory holding a pre-filled
+catalog, builds POSWindow the way main.py does and reports when the
+gui module is imported, when the first frame has been drawn and when
+the background catalog load has finished. Times are measured from
+process launch, so they include interpreter startup.
+
+The window needs a display; on a headless machine run it under Xvfb,
+e.g. xvfb-run python -m benchmarks.bench_startup. Without one only the
+import time is reported.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_search import fill_catalog
+from benchmarks.common import make_parser, report
+from products import DEFAULT_DB_PATH, ProductManager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints one line per milestone
+CHILD = """
+import time
+import tkinter as tk
+from gui import POSWindow
+print("imported", flush=True)
+try:
+    root = tk.Tk()
+except tk.TclError:
+    raise SystemExit(0)
+window = POSWindow(root)
+root.update()
+print("first_frame", flush=True)
+while not window.catalog_ready:
+    root.update()
+    time.sleep(0.002)
+print("catalog_ready", flush=True)
+window.receipt_writer.close()
+window.ledger.close()
+window.receipt_history.close()
+root.destroy()
+"""
+
+
+def launch(cwd):
+    """Run one startup and return {milestone: ms since launch}"""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, POS_METRICS="0")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", CHILD], cwd=cwd, env=env,
+                            stdout=subprocess.PIPE, text=True)
+    milestones = {}
+    for line in proc.stdout:
+        milestones[line.strip()] = (time.perf_counter() - start) * 1000
+    if proc.wait() != 0:
+        raise RuntimeError("startup run failed")
+    return milestones
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        product_manager = ProductManager(os.path.join(tmp, DEFAULT_DB_PATH))
+        fill_catalog(product_manager, args.products)
+        product_manager.close()
+
+        launch(tmp)  # warm the OS file cache
+        runs = [launch(tmp) for _ in range(args.runs)]
+
+    results = {}
+    for milestone in ("imported", "first_frame", "catalog_ready"):
+        times = [run[milestone] for run in runs if milestone in run]
+        if times:
+            results[f"{milestone}_ms"] = statistics.median(times)
+            results[f"{milestone}_max_ms"] = max(times)
+    if "first_frame_ms" not in results:
+        results["skipped"] = "no display; only the import was timed"
+    report(f"startup ({args.products:,} products, median of {args.runs})", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Sales summaries benchmark - report reads stay flat as sales history grows
+
+    python -m benchmarks.bench_summaries [--sales N] [--json PATH]
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import best_of, make_parser, report
+from functions import POSFunctions
+from products import ProductManager
+from summaries import SalesSummaries, record_sale
+
+
+def fill_history(product_manager, sales, products=1000):
+    """Record sales spread over a year straight into the rollups"""
+    rng = random.Random(1)
+    start = datetime(2025, 1, 1)
+    with product_manager.lock, product_manager.conn:
+        for _ in range(sales):
+            time_text = (start + timedelta(seconds=rng.randrange(365 * 86400))).isoformat()
+            lines = [(f"Product {rng.randrange(products):04d}", rng.randint(1, 5),
+                      rng.randint(500, 50000)) for _ in range(rng.randint(1, 6))]
+            record_sale(product_manager.conn, time_text, lines, 0)
+
+
+def checkout_ms(product_manager, count=500):
+    """Average time of a three-line complete_purchase(), rollups included"""
+    product_manager.upsert_products([(name, None, 10.0, 10 ** 9)
+                                     for name in ("Apple", "Bread", "Milk")])
+    pos = POSFunctions(product_manager)
+    start = time.perf_counter()
+    for _ in range(count):
+        for name in ("Apple", "Bread", "Milk"):
+            pos.add_to_cart(name, 2)
+        pos.complete_purchase()
+    return (time.perf_counter() - start) / count * 1000
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--sales", type=int, default=200_000)
+    args = parser.parse_args()
+
+    results = {}
+    for sales in (args.sales // 100, args.sales):
+        product_manager = ProductManager(":memory:")
+        fill_history(product_manager, sales)
+        summaries = SalesSummaries(product_manager)
+        day = "2025-06-01"
+        results[f"day_totals_us@{sales}"] = best_of(lambda: summaries.day_totals(day), 50) * 1e6
+        results[f"hourly_totals_us@{sales}"] = best_of(lambda: summaries.hourly_totals(day), 50) * 1e6
+        results[f"z_report_us@{sales}"] = best_of(lambda: summaries.z_report(day), 50) * 1e6
+        results[f"checkout_ms@{sales}"] = checkout_ms(product_manager)
+        product_manager.close()
+    report("sales summaries", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Common helpers shared by the benchmark scripts
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+
+def make_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--json", metavar="PATH", help="also write results to a JSON file")
+    return parser
+
+
+def best_of(func, repeat=5):
+    """Return the fastest wall-clock time of func() in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name, results, json_path=None):
+    """Print results as a table and optionally dump them as JSON"""
+    print(f"== {name} ==")
+    for key, value in results.items():
+        if isinstance(value, float):
+            value = f"{value:,.3f}"
+        print(f"{key:<45} {value}")
+
+    if json_path:
+        data = {
+            "benchmark": name,
+            "python": platform.python_version(),
+            "platform": sys.platform,
+            "results": results,
+        }
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
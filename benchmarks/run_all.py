@@ -0,0 +1,118 @@
+"""
+Benchmark suite - run every benchmark and collect the results in one JSON file
+
+    python -m benchmarks.run_all [--quick] [--only NAME,...] [--json PATH]
+                                 [--compare BASELINE.json]
+
+Each benchmark runs in its own interpreter so memory and caches do not
+leak between them. The JSON file records the git revision, so runs of
+different versions can be compared with --compare, which prints the
+change of every timing against a baseline file.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import make_parser
+
+# name -> (full arguments, --quick arguments)
+BENCHMARKS = {
+    "bench_catalog": ([], ["--sizes", "1000,100000"]),
+    "bench_cart": ([], ["--lines", "10,1000"]),
+    "bench_receipt": ([], []),
+    "bench_gui": ([], ["--lines", "10,1000", "--products", "10000"]),
+    "bench_startup": ([], ["--products", "10000", "--runs", "3"]),
+    "bench_memory": ([], ["--count", "20000"]),
+    "bench_search": ([], ["--products", "20000"]),
+    "bench_import": ([], ["--rows", "20000"]),
+    "bench_pricing": ([], []),
+    "bench_reorder": ([], ["--products", "20000"]),
+    "bench_summaries": ([], ["--sales", "20000"]),
+    "bench_instrumentation": ([], ["--calls", "100000"]),
+    "stress_checkout": ([], ["--checkouts", "100"]),
+    "bench_server": ([], ["--terminals", "8", "--checkouts", "20"]),
+    "bench_analytics": ([], ["--lines", "200000"]),
+    "bench_history": ([], ["--receipts", "20000"]),
+    "bench_replication": ([], ["--products", "20000", "--seconds", "2"]),
+    "bench_scanner": ([], ["--products", "20000", "--scans", "20000"]),
+}
+
+# Keys where a bigger number is better; everything else is a duration
+HIGHER_IS_BETTER = ("per_sec", "per_second")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(name, extra_args):
+    """Run one benchmark module and return its results dict"""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "result.json")
+        proc = subprocess.run([sys.executable, "-m", f"benchmarks.{name}", "--json", json_path,
+                               *extra_args], capture_output=True, text=True)
+        if proc.returncode != 0 or not os.path.exists(json_path):
+            return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+        with open(json_path, encoding="utf-8") as f:
+            return json.load(f)["results"]
+
+
+def compare(results, baseline):
+    """Print the change of each numeric result against a baseline run"""
+    print(f"\n== compared with {baseline.get('revision') or 'baseline'} ==")
+    for name, values in results.items():
+        old_values = baseline["benchmarks"].get(name, {})
+        for key, value in values.items():
+            old = old_values.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old * 100
+            better = change > 0 if key.endswith(HIGHER_IS_BETTER) else change < 0
+            flag = "" if abs(change) < 10 else ("  better" if better else "  WORSE")
+            print(f"{name}.{key:<45} {old:>14,.3f} -> {value:>14,.3f} {change:+7.1f}%{flag}")
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast run")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON from an earlier run")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    results = {}
+    started = time.time()
+    for name in names:
+        full, quick = BENCHMARKS[name]
+        start = time.perf_counter()
+        results[name] = run_benchmark(name, quick if args.quick else full)
+        status = results[name].get("error") or results[name].get("skipped") or "ok"
+        print(f"{name:<24} {time.perf_counter() - start:7.1f}s  {status}")
+
+    data = {
+        "revision": git_revision(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "quick": args.quick,
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
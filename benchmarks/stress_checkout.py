@@ -0,0 +1,97 @@
+"""
+Concurrent checkout stress test - many terminals, one catalog
+
+Runs simulated cashiers in parallel threads, each with its own cart on
+a shared ProductManager and StockReservations, and checks that stock
+never goes negative and that every unit sold is accounted for.
+
+    python -m benchmarks.stress_checkout [--terminals N] [--checkouts N] [--ledger]
+                                         [--json PATH]
+
+With --ledger every sale also goes through a SalesLedger in a temporary
+directory, which exercises group commit under contention.
+"""
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.common import make_parser, report
+from functions import POSFunctions
+from inventory import StockReservations
+from ledger import SalesLedger
+from products import ProductManager
+
+
+def cashier(product_manager, reservations, names, checkouts, seed, sold, stats):
+    rng = random.Random(seed)
+    pos = POSFunctions(product_manager, reservations)
+    for _ in range(checkouts):
+        for _ in range(rng.randint(1, 5)):
+            pos.add_to_cart(rng.choice(names), rng.randint(1, 3))
+        if rng.random() < 0.1:
+            pos.clear_cart()  # abandoned ticket
+            stats["abandoned"] += 1
+            continue
+        lines = [(item.product, item.quantity) for item in pos.get_cart_items()]
+        if not lines:
+            stats["sold_out"] += 1
+            continue
+        if pos.complete_purchase():
+            for name, quantity in lines:
+                sold[name] += quantity
+            stats["completed"] += 1
+        else:
+            pos.clear_cart()
+            stats["failed"] += 1
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[1])
+    parser.add_argument("--terminals", type=int, default=16)
+    parser.add_argument("--checkouts", type=int, default=500)
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--ledger", action="store_true", help="log sales to a SalesLedger")
+    args = parser.parse_args()
+
+    product_manager = ProductManager(":memory:")
+    names = [f"Item {i:03d}" for i in range(args.products)]
+    for name in names:
+        product_manager.add_product(name, 9.99, args.stock)
+    if args.ledger:
+        ledger_dir = tempfile.TemporaryDirectory()
+        product_manager.attach_ledger(SalesLedger(ledger_dir.name))
+    reservations = StockReservations(product_manager)
+
+    sold_per_thread = [{name: 0 for name in names} for _ in range(args.terminals)]
+    stats_per_thread = [{"completed": 0, "failed": 0, "abandoned": 0, "sold_out": 0}
+                        for _ in range(args.terminals)]
+    threads = [threading.Thread(target=cashier, args=(product_manager, reservations, names,
+                                                      args.checkouts, i, sold_per_thread[i],
+                                                      stats_per_thread[i]))
+               for i in range(args.terminals)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # Every unit sold must be gone from stock, and nothing may be oversold
+    for name in names:
+        sold = sum(s[name] for s in sold_per_thread)
+        stock = product_manager.get_product(name).stock
+        assert stock >= 0, f"{name} oversold: stock {stock}"
+        assert stock == args.stock - sold, f"{name}: stock {stock}, sold {sold}"
+    assert not reservations.reserved, f"leaked reservations: {reservations.reserved}"
+
+    results = {key: sum(s[key] for s in stats_per_thread)
+               for key in ("completed", "failed", "abandoned", "sold_out")}
+    results["seconds"] = elapsed
+    results["checkouts_per_sec"] = args.terminals * args.checkouts / elapsed
+    report(f"checkout stress ({args.terminals} terminals)", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Catalog import/export module - Streaming bulk loads for ProductManager
+
+Files are read and written one row at a time and applied in batches,
+so memory use stays flat no matter how large the price file is.
+
+    python catalog_io.py import prices.csv [--db PATH]
+    python catalog_io.py export catalog.jsonl [--db PATH]
+
+CSV files need a header with name, price and stock columns (sku is
+optional); JSON-lines files hold one object with the same keys per line.
+"""
+import argparse
+import csv
+import json
+import math
+import sqlite3
+
+from products import DEFAULT_DB_PATH, ProductManager
+
+CSV_FIELDS = ["name", "sku", "price", "stock"]
+
+
+class ImportResult:
+    """Outcome of an import: counts plus the first max_errors row errors"""
+
+    def __init__(self, max_errors):
+        self.rows = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []  # (line number, message)
+        self.max_errors = max_errors
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, message))
+
+    def __repr__(self):
+        return (f"ImportResult(rows={self.rows}, imported={self.imported}, "
+                f"errors={self.error_count})")
+
+
+def validate_row(record):
+    """Return a (name, sku, price, stock) tuple or raise ValueError"""
+    if not isinstance(record, dict):
+        raise ValueError("Line is not a JSON object")
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise ValueError("Product name cannot be empty")
+    try:
+        price = float(record["price"])
+        stock = int(record["stock"])
+    except KeyError as e:
+        raise ValueError(f"Missing column: {e.args[0]}")
+    except (TypeError, ValueError):
+        raise ValueError("Price and stock must be numbers")
+    if not math.isfinite(price):
+        raise ValueError("Price must be a finite number")
+    if price < 0 or stock < 0:
+        raise ValueError("Price and stock cannot be negative")
+    sku = str(record.get("sku") or "").strip() or None
+    return (name, sku, price, stock)
+
+
+def import_records(product_manager, records, batch_size=1000, max_errors=1000):
+    """Validate and upsert (line number, dict) records in batches"""
+    result = ImportResult(max_errors)
+    batch = []  # (line number, row)
+    for line, record in records:
+        result.rows += 1
+        try:
+            batch.append((line, validate_row(record)))
+        except ValueError as e:
+            result.add_error(line, str(e))
+            continue
+        if len(batch) >= batch_size:
+            apply_batch(product_manager, batch, result)
+            batch = []
+    if batch:
+        apply_batch(product_manager, batch, result)
+    return result
+
+
+def apply_batch(product_manager, batch, result):
+    """Upsert a batch in one transaction; if the database rejects it,
+    retry row by row so only the offending rows are reported"""
+    try:
+        product_manager.upsert_products([row for _, row in batch])
+        result.imported += len(batch)
+        return
+    except sqlite3.Error:
+        pass
+    for line, row in batch:
+        try:
+            product_manager.upsert_products([row])
+            result.imported += 1
+        except sqlite3.IntegrityError:
+            result.add_error(line, f"SKU {row[1]} is already used by another product")
+        except sqlite3.Error as e:
+            result.add_error(line, f"Could not save {row[0]}: {e}")
+
+
+def read_csv(f):
+    # Line 1 is the header
+    for line, record in enumerate(csv.DictReader(f), start=2):
+        yield line, record
+
+
+def read_jsonl(f):
+    for line, text in enumerate(f, start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError:
+            record = None
+        yield line, record
+
+
+def import_csv(product_manager, path, batch_size=1000, max_errors=1000):
+    """Import products from a CSV file"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return import_records(product_manager, read_csv(f), batch_size, max_errors)
+
+
+def import_jsonl(product_manager, path, batch_size=1000, max_errors=1000):
+    """Import products from a JSON-lines file"""
+    with open(path, encoding="utf-8") as f:
+        return import_records(product_manager, read_jsonl(f), batch_size, max_errors)
+
+
+def export_csv(product_manager, path, batch_size=1000):
+    """Write the whole catalog to a CSV file and return the row count"""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        for row in product_manager.iter_catalog(batch_size):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def export_jsonl(product_manager, path, batch_size=1000):
+    """Write the whole catalog to a JSON-lines file and return the row count"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for row in product_manager.iter_catalog(batch_size):
+            f.write(json.dumps(dict(zip(CSV_FIELDS, row)), ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk catalog import/export")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", help="a .csv or .jsonl file")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    jsonl = args.path.endswith((".jsonl", ".ndjson"))
+    product_manager = ProductManager(args.db)
+    try:
+        if args.action == "import":
+            load = import_jsonl if jsonl else import_csv
+            result = load(product_manager, args.path, args.batch_size)
+            print(f"{result.imported} of {result.rows} rows imported")
+            for line, message in result.errors:
+                print(f"  line {line}: {message}")
+            if result.error_count > len(result.errors):
+                print(f"  ... {result.error_count - len(result.errors)} more errors")
+        else:
+            dump = export_jsonl if jsonl else export_csv
+            print(f"{dump(product_manager, args.path, args.batch_size)} rows exported")
+    finally:
+        product_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Directory lock module - One writer process per ledger or journal directory
+
+SalesLedger and ReceiptJournal keep their write position in memory, so
+two processes appending to the same directory (e.g. the POS window and
+the checkout server started with the same defaults) would interleave
+sequence numbers and truncate each other's segments. Each takes an
+exclusive lock on a LOCK file in its directory and refuses to start if
+another process holds it. The lock is released when the file is closed,
+including when the process dies.
+"""
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one process per directory is up to the user
+    fcntl = None
+
+
+class DirectoryInUse(OSError):
+    """Another process already has the directory open for writing"""
+
+
+def lock_directory(directory):
+    """Lock directory/LOCK exclusively and return the open lock file;
+    raises DirectoryInUse if it is already locked"""
+    lock_file = open(os.path.join(directory, "LOCK"), "a")
+    if fcntl:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise DirectoryInUse(f"{directory} is in use by another process; "
+                                 f"give each process its own directory") from None
+    return lock_file
@@ -1,65 +1,167 @@
 """
 Functions module - Business logic for POS operations
 """
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+
+from instrumentation import timed
+from inventory import StockReservations
+from pricing import CENT, TAX_RATE, CartPricer, PricingRules, from_cents, to_cents
+
+
+class CartLine:
+    """One cart line; amounts are held as integer centavos"""
+    __slots__ = ("product", "price_cents", "quantity")
+
+    def __init__(self, product, price_cents, quantity):
+        self.product = product
+        self.price_cents = price_cents
+        self.quantity = quantity
+
+    @property
+    def total_cents(self):
+        return self.price_cents * self.quantity
+
+    @property
+    def price(self):
+        return from_cents(self.price_cents)
+
+    @property
+    def total(self):
+        return from_cents(self.total_cents)
+
+    def __repr__(self):
+        return f"CartLine({self.product!r}, price={self.price}, quantity={self.quantity})"
+
 
 class POSFunctions:
-    def __init__(self, product_manager):
+    def __init__(self, product_manager, reservations=None, pricing=None):
         self.product_manager = product_manager
-        self.cart = []
-    
+        # Promotions and tax rates; the default is a flat TAX_RATE
+        self.pricing = pricing or PricingRules()
+        # Terminals sharing a catalog should share one StockReservations
+        self.reservations = reservations or StockReservations(product_manager)
+        self.cart_id = self.reservations.new_cart_id()
+        # One line per product, keyed by product name (insertion ordered)
+        self.cart = {}
+        # Running subtotal in centavos, kept up to date by every cart operation
+        self.subtotal_cents = 0
+        # Discounts and tax, re-evaluated only for the lines that changed
+        self.pricer = CartPricer(self.pricing, self.cart)
+
+    @timed("cart.add")
     def add_to_cart(self, product_name, quantity):
-        """Add item to cart"""
+        """Add item to cart, merging repeated adds of the same product"""
+        if quantity <= 0:
+            return False
+        item = self.cart.get(product_name)
+        if item:
+            return self.update_cart_item(product_name, item.quantity + quantity)
+
         product = self.product_manager.get_product(product_name)
-        if product:
-            price = product["price"]
-            total = price * quantity
-            self.cart.append({
-                "product": product_name,
-                "price": price,
-                "quantity": quantity,
-                "total": total
-            })
+        if product and self.reservations.reserve(self.cart_id, product_name, quantity):
+            item = CartLine(product_name, to_cents(product.price), quantity)
+            self.cart[product_name] = item
+            self.subtotal_cents += item.total_cents
+            self.pricer.changed(product_name)
             return True
         return False
-    
-    def update_cart_item(self, index, quantity):
-        """Update quantity of item in cart"""
-        if 0 <= index < len(self.cart):
-            self.cart[index]["quantity"] = quantity
-            self.cart[index]["total"] = self.cart[index]["price"] * quantity
+
+    @timed("cart.update")
+    def update_cart_item(self, product_name, quantity):
+        """Update quantity of item in cart; False if stock can't cover it.
+
+        A quantity of 0 removes the line; a negative quantity is rejected.
+        """
+        if quantity == 0:
+            return self.delete_cart_item(product_name)
+        item = self.cart.get(product_name)
+        if item and quantity > 0 and self.reservations.reserve(self.cart_id, product_name, quantity):
+            self.subtotal_cents += item.price_cents * (quantity - item.quantity)
+            item.quantity = quantity
+            self.pricer.changed(product_name)
             return True
         return False
-    
-    def delete_cart_item(self, index):
+
+    def delete_cart_item(self, product_name):
         """Remove item from cart"""
-        if 0 <= index < len(self.cart):
-            self.cart.pop(index)
+        item = self.cart.pop(product_name, None)
+        if item:
+            self.reservations.release(self.cart_id, product_name)
+            self.subtotal_cents -= item.total_cents
+            self.pricer.changed(product_name)
             return True
         return False
-    
+
     def clear_cart(self):
         """Clear all items from cart"""
+        self.reservations.release(self.cart_id)
         self.cart.clear()
-    
+        self.subtotal_cents = 0
+        self.pricer.reset()
+
+    def get_cart_item(self, product_name):
+        """Return the cart line for a product, or None"""
+        return self.cart.get(product_name)
+
     def get_cart_items(self):
         """Return all cart items"""
-        return self.cart
-    
+        return self.cart.values()
+
+    @timed("cart.price")
+    def price_cart(self, now=None):
+        """Apply the pricing rules to the cart and return a PricedCart"""
+        return self.pricer.price(now)
+
     def calculate_subtotal(self):
-        """Calculate subtotal of all items in cart"""
-        return sum(item["total"] for item in self.cart)
-    
-    def calculate_tax(self, tax_rate=0.12):
-        """Calculate tax (12% VAT)"""
-        return self.calculate_subtotal() * tax_rate
-    
-    def calculate_grand_total(self):
-        """Calculate grand total including tax"""
-        return self.calculate_subtotal() + self.calculate_tax()
-    
-    def complete_purchase(self):
-        """Complete the purchase and update stock"""
-        for item in self.cart:
-            self.product_manager.reduce_stock(item["product"], item["quantity"])
+        """Return the running subtotal of all items in cart, before discounts"""
+        return from_cents(self.subtotal_cents)
+
+    def calculate_discount(self):
+        """Return the total of all promotions applied to the cart"""
+        return from_cents(self.price_cart().discount_cents)
+
+    def calculate_tax(self, tax_rate=None, subtotal=None):
+        """Calculate tax on the discounted cart at each product's rate.
+
+        With a tax_rate or subtotal, tax that amount at one rate instead.
+        """
+        if tax_rate is None and subtotal is None:
+            return from_cents(self.price_cart().tax_cents)
+        if subtotal is None:
+            subtotal = self.calculate_subtotal()
+        rate = Decimal(str(TAX_RATE if tax_rate is None else tax_rate))
+        return (subtotal * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+
+    def calculate_grand_total(self, subtotal=None):
+        """Calculate grand total after discounts, including tax"""
+        if subtotal is None:
+            return from_cents(self.price_cart().total_cents)
+        return subtotal + self.calculate_tax(subtotal=subtotal)
+
+    @timed("cart.complete_purchase")
+    def complete_purchase(self, priced=None, wait=True):
+        """Complete the purchase and update stock.
+
+        The whole cart is taken from stock in one transaction; returns
+        False and keeps the cart if any line can no longer be filled.
+        priced is the PricedCart shown to the customer (e.g. on the
+        receipt); without it the cart is priced now.
+        With wait=False it does not wait for the sale to reach the
+        ledger; call product_manager.sync_ledger() before relying on it.
+        """
+        if priced is None:
+            priced = self.price_cart(datetime.now())
+        now = priced.time
+        details = {
+            # [product, quantity, price, share of discounts] in centavos
+            "lines": [[item.product, item.quantity, item.price_cents,
+                       priced.line_discounts[item.product]]
+                      for item in self.cart.values()],
+            "tax_cents": priced.tax_cents,
+            "time": now.isoformat(timespec="seconds"),
+        }
+        if not self.reservations.commit(self.cart_id, details, wait):
+            return False
         self.clear_cart()
-        return True
\ No newline at end of file
+        return True
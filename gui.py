@@ -1,12 +1,39 @@
 """
 GUI module - User interface for POS System
 """
+import os
+import queue
+import sqlite3
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-import os
-from datetime import datetime
 from products import ProductManager
 from functions import POSFunctions
+from instrumentation import DEFAULT_METRICS_PATH, metrics, timed
+from ledger import SalesLedger
+from pricing import DEFAULT_PRICING_PATH, PricingRules, from_cents
+from reorder import ReorderEngine
+from scanner import ScanPipeline
+from search import ProductSearchIndex
+from summaries import SalesSummaries
+
+# ProductManagementWindow (product_window), ReceiptHistoryWindow
+# (history_window) and the receipt modules are imported on first use so
+# they stay off the startup path
+
+# Number of matches shown in the product type-ahead
+SEARCH_LIMIT = 10
+
+# Steps of the background catalog load, shown in the progress bar
+LOAD_STEPS = ("Replaying sales ledger", "Syncing catalog from primary", "Indexing products",
+              "Loading reorder points", "Indexing receipt history", "Opening receipt journal")
+
+# POS_PRIMARY=host:port, a Unix socket path or the primary terminal's
+# products .db file makes this terminal a catalog replica of it
+PRIMARY_ENV = "POS_PRIMARY"
+# How often a replica pulls catalog changes, in milliseconds
+REPLICA_INTERVAL = 500
 
 class POSWindow:
     def __init__(self, root):
@@ -15,11 +42,34 @@ class POSWindow:
         self.root.geometry("550x600")  # Back to original height
         self.root.resizable(False, False)
         
-        # Initialize managers
+        # Initialize managers; the ledger, indexes and receipt journal are
+        # loaded by a background thread once the window is up
         self.product_manager = ProductManager()
-        self.pos_functions = POSFunctions(self.product_manager)
+        self.ledger = None
+        self.replica = None
+        self.replica_fetch = None  # thread fetching from the primary
+        # Set if the first catalog sync failed; the terminal starts with
+        # its local catalog and keeps retrying in the background
+        self.replica_warning = None
+        self.search_index = ProductSearchIndex(self.product_manager)
+        self.reorder = ReorderEngine(self.product_manager)
+        # Promotions and tax rates from pricing.json, if there is one
+        pricing = None
+        if os.path.exists(DEFAULT_PRICING_PATH):
+            pricing = PricingRules.load(DEFAULT_PRICING_PATH)
+        self.pos_functions = POSFunctions(self.product_manager, pricing=pricing)
+        self.summaries = SalesSummaries(self.product_manager)
+        self.scan_pipeline = ScanPipeline(self.pos_functions)
+        self.scan_flush_pending = False
+        self.receipt_renderer = None
+        self.receipt_history = None
+        self.receipt_writer = None
+        # Purchases waiting for the ledger: result queue -> (thread, receipt text)
+        self.pending_purchases = {}
         
         self.setup_main_window()
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_application)
+        self.start_loading()
     
     def setup_main_window(self):
         # Top section - Input fields
@@ -31,14 +81,15 @@ class POSWindow:
         top_frame.columnconfigure(3, weight=1)  # Price entry column
         top_frame.columnconfigure(5, weight=1)  # Qty entry column
         
-        # Product dropdown
+        # Product type-ahead: type a name or scan a barcode, the dropdown
+        # only ever holds the top matches from the search index
         tk.Label(top_frame, text="Product:", bg="white").grid(row=0, column=0, sticky="w", padx=5)
         self.product_var = tk.StringVar()
-        self.product_combo = ttk.Combobox(top_frame, textvariable=self.product_var, 
-                                         values=self.product_manager.get_product_names(), 
-                                         state="readonly")
+        self.product_combo = ttk.Combobox(top_frame, textvariable=self.product_var)
         self.product_combo.grid(row=0, column=1, padx=5, sticky="ew")
         self.product_combo.bind("<<ComboboxSelected>>", self.on_product_select)
+        self.product_combo.bind("<KeyRelease>", self.on_product_typed)
+        self.product_combo.bind("<Return>", self.on_product_enter)
         
         # Price entry
         tk.Label(top_frame, text="Price:", bg="white").grid(row=0, column=2, sticky="w", padx=5)
@@ -52,20 +103,32 @@ class POSWindow:
         self.qty_entry = tk.Entry(top_frame, textvariable=self.qty_var, relief="solid", borderwidth=1)
         self.qty_entry.grid(row=0, column=5, padx=5, sticky="ew")
         
+        # Scan mode: Enter in the product field queues the scanned code
+        # and the cart is updated in batches, with errors shown inline
+        self.scan_mode = tk.BooleanVar(value=False)
+        scan_check = tk.Checkbutton(top_frame, text="Scan mode", variable=self.scan_mode,
+                                    bg="white", command=self.on_scan_mode)
+        scan_check.grid(row=1, column=0, columnspan=2, sticky="w", padx=5)
+        self.scan_label = tk.Label(top_frame, text="", bg="white", anchor="w")
+        self.scan_label.grid(row=1, column=2, columnspan=4, sticky="ew", padx=5)
+        
         # Button frame (Original buttons)
         btn_frame = tk.Frame(self.root)
         btn_frame.pack(fill=tk.X, padx=10, pady=5)
         
         # Configure grid to make buttons fill space equally
-        for i in range(5):
+        for i in range(6):
             btn_frame.columnconfigure(i, weight=1, uniform="button")
         
         # Buttons with grid layout to fill space
-        tk.Button(btn_frame, text="Add", bg="#5cb85c", fg="white", command=self.add_item).grid(row=0, column=0, sticky="ew", padx=1)
+        add_button = tk.Button(btn_frame, text="Add", bg="#5cb85c", fg="white", command=self.add_item)
+        add_button.grid(row=0, column=0, sticky="ew", padx=1)
         tk.Button(btn_frame, text="Update", bg="#5bc0de", fg="white", command=self.update_item).grid(row=0, column=1, sticky="ew", padx=1)
         tk.Button(btn_frame, text="Delete", bg="#d9534f", fg="white", command=self.delete_item).grid(row=0, column=2, sticky="ew", padx=1)
         tk.Button(btn_frame, text="Clear", bg="#999999", fg="white", command=self.clear_cart).grid(row=0, column=3, sticky="ew", padx=1)
         tk.Button(btn_frame, text="Purchase", bg="#17a2b8", fg="white", command=self.complete_purchase).grid(row=0, column=4, sticky="ew", padx=1)
+        history_button = tk.Button(btn_frame, text="History", bg="#8b4789", fg="white", command=self.open_receipt_history)
+        history_button.grid(row=0, column=5, sticky="ew", padx=1)
         
         # Cart table
         table_frame = tk.Frame(self.root)
@@ -89,13 +152,30 @@ class POSWindow:
         
         self.cart_tree.pack(fill=tk.BOTH, expand=True)
         
+        # Reorder alerts, updated by stock change events once the catalog
+        # has loaded; until then the same row shows the load progress
+        status_frame = tk.Frame(self.root)
+        status_frame.pack(fill=tk.X, padx=10)
+        self.progress = ttk.Progressbar(status_frame, maximum=len(LOAD_STEPS), length=150)
+        self.progress.pack(side=tk.RIGHT)
+        self.alert_label = tk.Label(status_frame, text="", fg="#d9534f", anchor="w")
+        self.alert_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Displayed values for each cart line, keyed by product name
+        # (the product name is also the line's Treeview item id)
+        self.cart_rows = {}
+        
         # Bottom section - Totals, Manage Products, and Exit button
         bottom_frame = tk.Frame(self.root, bg="white")
         bottom_frame.pack(fill=tk.X, padx=10, pady=10)
         
         # Left side: Manage Products button
-        tk.Button(bottom_frame, text="Manage Products", bg="#8b4789", fg="white", 
-                 command=self.open_product_management).pack(side=tk.LEFT)
+        manage_button = tk.Button(bottom_frame, text="Manage Products", bg="#8b4789", fg="white", 
+                                  command=self.open_product_management)
+        manage_button.pack(side=tk.LEFT)
+        report_button = tk.Button(bottom_frame, text="Z Report", bg="#f0ad4e", fg="white",
+                                  command=self.show_z_report)
+        report_button.pack(side=tk.LEFT, padx=5)
         
         # Right side: Total labels and Exit button
         right_frame = tk.Frame(bottom_frame, bg="white")
@@ -113,15 +193,196 @@ class POSWindow:
         self.grand_total_label = tk.Label(right_frame, text="Grand Total (incl. tax): ₱0.00", 
                                          font=("Arial", 10), fg="#17a2b8", bg="white")
         self.grand_total_label.pack(side=tk.RIGHT, padx=10)
+        
+        # Everything that needs the ledger or the indexes waits for the load
+        self.catalog_widgets = (self.product_combo, scan_check, add_button, history_button,
+                                manage_button, report_button)
+        for widget in self.catalog_widgets:
+            widget.config(state="disabled")
+    
+    def start_loading(self):
+        """Load the ledger, indexes and receipt journal off the Tk thread"""
+        self.catalog_ready = False
+        self.load_started = time.perf_counter()
+        self.load_progress = queue.Queue()
+        self.loader = threading.Thread(target=self.load_catalog, name="catalog-loader", daemon=True)
+        self.loader.start()
+        self.check_loading()
+    
+    def load_catalog(self):
+        """Background thread: report (step, error) after each LOAD_STEPS step"""
+        try:
+            # Replays any sales the catalog missed before the last shutdown
+            self.load_progress.put((0, None))
+            self.ledger = SalesLedger()
+            self.product_manager.attach_ledger(self.ledger)
+            self.load_progress.put((1, None))
+            if os.environ.get(PRIMARY_ENV):
+                self.connect_replica(os.environ[PRIMARY_ENV])
+            self.load_progress.put((2, None))
+            self.search_index.build()
+            self.product_manager.subscribe(self.search_index.handle_events)
+            self.load_progress.put((3, None))
+            self.reorder.build()
+            self.product_manager.subscribe(self.reorder.handle_events)
+            self.load_progress.put((4, None))
+            from receipt_history import ReceiptHistory
+            self.receipt_history = ReceiptHistory()
+            self.receipt_history.refresh(legacy=True)
+            self.load_progress.put((5, None))
+            from receipt_writer import ReceiptWriter
+            self.receipt_writer = ReceiptWriter(history=self.receipt_history)
+            self.load_progress.put((len(LOAD_STEPS), None))
+        except Exception as e:
+            self.load_progress.put((None, e))
+    
+    def connect_replica(self, address):
+        """Background thread: follow the primary's catalog, starting with
+        the local one if the primary can't be reached"""
+        from replication import ReplicaClient, connect_peer
+        try:
+            self.replica = ReplicaClient(self.product_manager, connect_peer(address))
+        except (OSError, ValueError) as e:
+            self.replica_warning = f"Cannot reach the primary at {address}: {e}"
+            return
+        try:
+            self.replica.sync()
+        except (OSError, sqlite3.Error) as e:
+            self.replica_warning = f"Catalog sync failed, using the local catalog: {e}"
+    
+    def check_loading(self):
+        """Show the load progress on the Tk thread until the catalog is ready"""
+        step = error = None
+        while not self.load_progress.empty():
+            step, error = self.load_progress.get_nowait()
+            if error:
+                self.progress.pack_forget()
+                self.alert_label.config(text="Catalog failed to load")
+                messagebox.showerror("Error", f"Failed to load the catalog: {error}")
+                return
+            self.progress["value"] = step
+            if step < len(LOAD_STEPS):
+                self.alert_label.config(text=LOAD_STEPS[step] + "...", fg="#777777")
+        if step == len(LOAD_STEPS):
+            self.on_catalog_loaded()
+        else:
+            self.root.after(50, self.check_loading)
+    
+    def on_catalog_loaded(self):
+        metrics.record_since("ui.catalog_load", self.load_started)
+        self.catalog_ready = True
+        self.progress.destroy()
+        self.alert_label.config(fg="#d9534f")
+        self.product_combo['values'] = self.search_index.search("", SEARCH_LIMIT)
+        for widget in self.catalog_widgets:
+            widget.config(state="normal")
+        self.update_reorder_alert()
+        self.product_manager.subscribe(self.on_catalog_events)
+        self.check_receipt_writer()
+        if self.replica:
+            self.root.after(REPLICA_INTERVAL, self.sync_catalog)
+        if self.replica_warning:
+            messagebox.showwarning("Warning", self.replica_warning)
+    
+    def sync_catalog(self):
+        """Fetch the next batch of catalog changes on a worker thread, so
+        a slow or hung primary never blocks the window"""
+        fetched = queue.Queue()
+        self.replica_fetch = threading.Thread(target=self.fetch_catalog, args=(fetched,),
+                                              name="catalog-sync", daemon=True)
+        self.replica_fetch.start()
+        self.check_catalog_sync(fetched)
+    
+    def fetch_catalog(self, fetched):
+        """Background thread: fetch one batch from the primary"""
+        try:
+            fetched.put((self.replica.fetch(), None))
+        except (OSError, sqlite3.Error) as e:
+            fetched.put((None, e))
+    
+    def check_catalog_sync(self, fetched):
+        """Apply the fetched batch on the Tk thread, so the resulting
+        events can update widgets directly; the next fetch starts only
+        after this one is done"""
+        try:
+            batch, error = fetched.get_nowait()
+        except queue.Empty:
+            self.root.after(10, self.check_catalog_sync, fetched)
+            return
+        more = False
+        if error is None:
+            try:
+                _, more = self.replica.apply(batch)
+            except sqlite3.Error:
+                pass  # catalog busy; the batch is fetched again on the next tick
+        # else the primary is unreachable or busy; try again on the next tick
+        self.root.after(1 if more else REPLICA_INTERVAL, self.sync_catalog)
     
     def on_product_select(self, event):
         product_name = self.product_var.get()
         product = self.product_manager.get_product(product_name)
         if product:
-            self.price_var.set(f"{product['price']:.2f}")
+            self.price_var.set(f"{product.price:.2f}")
+    
+    def on_product_typed(self, event):
+        if event.keysym in ("Return", "Up", "Down", "Escape") or self.scan_mode.get():
+            return
+        self.product_combo['values'] = self.search_index.search(
+            self.product_var.get(), SEARCH_LIMIT, fuzzy=True)
+        self.price_var.set("")
+    
+    def on_product_enter(self, event):
+        """Accept a scanned barcode or the best match for the typed text"""
+        if self.scan_mode.get():
+            self.queue_scan()
+            return "break"
+        product_name = self.resolve_product(self.product_var.get())
+        if product_name is None:
+            matches = self.search_index.search(self.product_var.get(), 1)
+            product_name = matches[0] if matches else None
+        if product_name:
+            self.product_var.set(product_name)
+            self.on_product_select(event)
+    
+    def on_scan_mode(self):
+        self.product_var.set("")
+        self.price_var.set("")
+        self.scan_label.config(text="")
+        self.product_combo.focus_set()
+    
+    def queue_scan(self):
+        """Queue the scanned code; the cart is updated once Tk is idle, so
+        scans arriving together are applied and redrawn as one batch"""
+        self.scan_pipeline.submit(self.product_var.get())
+        self.product_var.set("")
+        if not self.scan_flush_pending:
+            self.scan_flush_pending = True
+            self.root.after_idle(self.flush_scans)
+    
+    def flush_scans(self):
+        self.scan_flush_pending = False
+        result = self.scan_pipeline.process()
+        for product_name in result.changed:
+            self.refresh_cart_row(product_name)
+        if result.changed:
+            self.update_totals()
+            self.cart_tree.see(result.changed[-1])
+        if result.errors:
+            more = f" (+{len(result.errors) - 1} more)" if len(result.errors) > 1 else ""
+            self.scan_label.config(text=result.errors[-1] + more, fg="#d9534f")
+        elif result.scans:
+            self.scan_label.config(text=f"Scanned {result.changed[-1]}", fg="#5cb85c")
+    
+    def resolve_product(self, text):
+        """Return the product name for an exact name or barcode, or None"""
+        text = text.strip()
+        if self.product_manager.get_product(text):
+            return text
+        return self.search_index.lookup_sku(text)
     
     def add_item(self):
-        product_name = self.product_var.get()
+        start = time.perf_counter()
+        product_name = self.resolve_product(self.product_var.get())
         try:
             quantity = int(self.qty_var.get())
             if quantity <= 0:
@@ -134,11 +395,13 @@ class POSWindow:
             messagebox.showerror("Error", "Please select a product")
             return
         
-        product = self.product_manager.get_product(product_name)
-        if product and product["stock"] >= quantity:
-            self.pos_functions.add_to_cart(product_name, quantity)
-            self.update_cart_display()
+        # add_to_cart checks stock against what this and other carts hold
+        if self.pos_functions.add_to_cart(product_name, quantity):
+            self.refresh_cart_row(product_name)
+            self.update_totals()
             self.qty_var.set("1")
+            # Measured until Tk is idle again, i.e. the table has redrawn
+            self.root.after_idle(metrics.record_since, "ui.add_item", start)
         else:
             messagebox.showerror("Error", "Insufficient stock")
     
@@ -156,9 +419,12 @@ class POSWindow:
             messagebox.showerror("Error", "Please enter a valid quantity")
             return
         
-        index = self.cart_tree.index(selected[0])
-        self.pos_functions.update_cart_item(index, quantity)
-        self.update_cart_display()
+        product_name = selected[0]
+        if not self.pos_functions.update_cart_item(product_name, quantity):
+            messagebox.showerror("Error", "Insufficient stock")
+            return
+        self.refresh_cart_row(product_name)
+        self.update_totals()
     
     def delete_item(self):
         selected = self.cart_tree.selection()
@@ -166,9 +432,10 @@ class POSWindow:
             messagebox.showerror("Error", "Please select an item to delete")
             return
         
-        index = self.cart_tree.index(selected[0])
-        self.pos_functions.delete_cart_item(index)
-        self.update_cart_display()
+        product_name = selected[0]
+        self.pos_functions.delete_cart_item(product_name)
+        self.remove_cart_row(product_name)
+        self.update_totals()
     
     def clear_cart(self):
         self.pos_functions.clear_cart()
@@ -179,58 +446,111 @@ class POSWindow:
             messagebox.showwarning("Warning", "Cart is empty")
             return
         
-        grand_total = self.pos_functions.calculate_grand_total()
+        # Priced once: the total confirmed, the receipt and the sale all match
+        priced = self.pos_functions.price_cart()
+        grand_total = from_cents(priced.total_cents)
         if messagebox.askyesno("Confirm Purchase", f"Total amount: ₱{grand_total:.2f}\nComplete purchase?"):
+            start = time.perf_counter()
             # Generate receipt
-            receipt_content = self.generate_receipt()
-            
-            # Show receipt window (which now includes print button)
-            self.show_receipt(receipt_content)
+            receipt_content = self.generate_receipt(priced)
             
-            # Save receipt automatically after purchase
-            self.save_receipt_to_file(receipt_content, auto_save=True)
-            
-            # Complete purchase
-            self.pos_functions.complete_purchase()
+            # Complete purchase (all or nothing) before anything is saved;
+            # the ledger fsync is waited for off the Tk thread
+            if not self.pos_functions.complete_purchase(priced, wait=False):
+                messagebox.showerror("Error", "Some items are no longer in stock")
+                return
             self.update_cart_display()
-            self.product_combo['values'] = self.product_manager.get_product_names()
+            
+            durable = queue.Queue()
+            thread = threading.Thread(target=self.sync_purchase, args=(durable,),
+                                      name="purchase-sync", daemon=True)
+            self.pending_purchases[durable] = (thread, receipt_content)
+            thread.start()
+            self.check_purchase(durable, receipt_content, start)
+    
+    def sync_purchase(self, durable):
+        """Background thread: wait for the sale to reach the ledger"""
+        try:
+            self.product_manager.sync_ledger()
+            durable.put(None)
+        except OSError as e:
+            durable.put(e)
+    
+    def check_purchase(self, durable, receipt_content, start):
+        """Save and show the receipt once the sale is durable"""
+        if durable not in self.pending_purchases:
+            return  # finished by exit_application
+        try:
+            error = durable.get_nowait()
+        except queue.Empty:
+            self.root.after(5, self.check_purchase, durable, receipt_content, start)
+            return
+        del self.pending_purchases[durable]
+        if error:
+            messagebox.showerror("Error", f"Sale could not be written to the ledger: {error}")
+            return
+        
+        # Save receipt automatically after purchase
+        saved_receipt = self.save_receipt_to_file(receipt_content)
+        
+        # Show receipt window (which now includes print button)
+        self.show_receipt(receipt_content, saved_receipt)
+        self.root.after_idle(metrics.record_since, "ui.purchase", start)
+    
+    def show_z_report(self):
+        """Show today's sales totals and products to reorder"""
+        report = self.summaries.z_report(low_stock=self.reorder.needs_reorder(10))
+        messagebox.showinfo("Z Report", report)
+    
+    def on_catalog_events(self, events):
+        # Runs after the reorder engine has seen the same events
+        self.update_reorder_alert()
+    
+    def update_reorder_alert(self):
+        """Show the most urgent products at or below their reorder point"""
+        items = self.reorder.needs_reorder(4)
+        if items:
+            text = "Reorder: " + ", ".join(f"{name} ({stock} left)" for name, stock, _ in items)
+        else:
+            text = ""
+        self.alert_label.config(text=text)
     
     def exit_application(self):
         """Exit the application with confirmation"""
         if messagebox.askyesno("Exit", "Are you sure you want to exit?"):
+            # Make sure every queued receipt is on disk before leaving,
+            # including those of sales still waiting for the ledger
+            self.loader.join()
+            for durable, (thread, receipt_content) in list(self.pending_purchases.items()):
+                thread.join()
+                if durable.get() is None and self.receipt_writer:
+                    self.receipt_writer.submit(receipt_content)
+            self.pending_purchases.clear()
+            if self.receipt_writer:
+                self.receipt_writer.close()
+            if self.ledger:
+                self.ledger.close()
+            if self.receipt_history:
+                self.receipt_history.close()
+            if self.replica:
+                if self.replica_fetch:
+                    self.replica_fetch.join()
+                self.replica.peer.close()
+            self.product_manager.close()
+            if metrics.enabled:
+                metrics.export_json(os.environ.get("POS_METRICS_FILE", DEFAULT_METRICS_PATH))
             self.root.quit()
     
-    def generate_receipt(self):
+    @timed("ui.generate_receipt")
+    def generate_receipt(self, priced=None):
         """Generate receipt content string"""
-        receipt = "=" * 45 + "\n"
-        receipt += " POS SYSTEM RECEIPT\n"
-        receipt += "=" * 45 + "\n"
-        receipt += f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        receipt += "=" * 45 + "\n\n"
-        receipt += f"{'Item':<20} {'Qty':<5} {'Price':<10} {'Total':<10}\n"
-        receipt += "-" * 45 + "\n"
-        
-        for item in self.pos_functions.get_cart_items():
-            receipt += f"{item['product']:<20} {item['quantity']:<5} "
-            receipt += f"₱{item['price']:<9.2f} ₱{item['total']:<9.2f}\n"
-        
-        receipt += "-" * 45 + "\n"
-        subtotal = self.pos_functions.calculate_subtotal()
-        tax = self.pos_functions.calculate_tax()
-        grand_total = self.pos_functions.calculate_grand_total()
-        
-        receipt += f"\n{'Subtotal:':<35} ₱{subtotal:>8.2f}\n"
-        receipt += f"{'Tax (12%):':<35} ₱{tax:>8.2f}\n"
-        receipt += "=" * 45 + "\n"
-        receipt += f"{'GRAND TOTAL:':<35} ₱{grand_total:>8.2f}\n"
-        receipt += "=" * 45 + "\n\n"
-        receipt += " Thank you for your purchase!\n"
-        receipt += " Please come again!\n"
-        receipt += "=" * 45 + "\n"
-        
-        return receipt
-    
-    def show_receipt(self, receipt_content):
+        from receipt import Receipt, ReceiptRenderer
+        if self.receipt_renderer is None:
+            self.receipt_renderer = ReceiptRenderer()
+        receipt = Receipt.from_cart(self.pos_functions, priced=priced)
+        return self.receipt_renderer.render_text(receipt)
+    
+    def show_receipt(self, receipt_content, saved_receipt):
         """Display receipt in a new window with Print and Close buttons"""
         receipt_window = tk.Toplevel(self.root)
         receipt_window.title("Receipt")
@@ -261,9 +581,10 @@ class POSWindow:
         btn_frame = tk.Frame(main_frame)
         btn_frame.pack(fill=tk.X, pady=(10, 0))
         
-        # Print and Close buttons
-        tk.Button(btn_frame, text="Print Receipt", bg="#5cb85c", fg="white", width=15,
-                 command=lambda: self.save_receipt_to_file(receipt_content)).pack(side=tk.LEFT, padx=5)
+        # Print and Close buttons (receipts not in the journal have no Print)
+        if saved_receipt is not None:
+            tk.Button(btn_frame, text="Print Receipt", bg="#5cb85c", fg="white", width=15,
+                     command=lambda: self.print_receipt(saved_receipt)).pack(side=tk.LEFT, padx=5)
         tk.Button(btn_frame, text="Close Receipt", bg="#999999", fg="white", width=15,
                  command=receipt_window.destroy).pack(side=tk.LEFT, padx=5)
         
@@ -277,175 +598,78 @@ class POSWindow:
         y = (receipt_window.winfo_screenheight() // 2) - (height // 2)
         receipt_window.geometry(f'{width}x{height}+{x}+{y}')
     
-    def save_receipt_to_file(self, receipt_text, auto_save=False):
-        """Save receipt to a text file in receipts directory"""
-        # Create receipts folder if it doesn't exist
-        receipts_dir = "receipts"
-        if not os.path.exists(receipts_dir):
-            os.makedirs(receipts_dir)
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{receipts_dir}/receipt_{timestamp}.txt"
-        
-        try:
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(receipt_text)
-            
-            if not auto_save:  # Only show message if manually printed
+    @timed("ui.save_receipt")
+    def save_receipt_to_file(self, receipt_text):
+        """Queue receipt to be appended to the receipt journal"""
+        def on_saved(txn_id, error):
+            if error:
+                messagebox.showerror("Error", f"Failed to save receipt: {str(error)}")
+        
+        return self.receipt_writer.submit(receipt_text, on_saved)
+    
+    def print_receipt(self, saved_receipt):
+        """Export a saved receipt as a text file in the receipts directory"""
+        def on_exported(filename, error):
+            if error:
+                messagebox.showerror("Error", f"Failed to save receipt: {str(error)}")
+            else:
                 messagebox.showinfo("Success", f"Receipt saved to:\n{filename}")
-            return filename
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save receipt: {str(e)}")
-            return None
+        
+        self.receipt_writer.export(saved_receipt, on_exported)
+    
+    def check_receipt_writer(self):
+        """Report finished receipt saves back on the Tk thread"""
+        self.receipt_writer.drain_completed()
+        self.root.after(100, self.check_receipt_writer)
+    
+    def cart_row_values(self, item):
+        return (
+            item.product,
+            f"₱{item.price:.2f}",
+            item.quantity,
+            f"₱{item.total:.2f}"
+        )
+    
+    def refresh_cart_row(self, product_name):
+        """Insert or update the Treeview row for one cart line"""
+        values = self.cart_row_values(self.pos_functions.get_cart_item(product_name))
+        shown = self.cart_rows.get(product_name)
+        if shown is None:
+            self.cart_tree.insert("", tk.END, iid=product_name, values=values)
+        elif shown != values:
+            self.cart_tree.item(product_name, values=values)
+        self.cart_rows[product_name] = values
+    
+    def remove_cart_row(self, product_name):
+        """Remove the Treeview row for a deleted cart line"""
+        if self.cart_rows.pop(product_name, None) is not None:
+            self.cart_tree.delete(product_name)
     
+    @timed("ui.update_cart_display")
     def update_cart_display(self):
-        # Clear existing items
-        for item in self.cart_tree.get_children():
-            self.cart_tree.delete(item)
+        """Bring the cart table in line with the cart, touching only changed rows"""
+        # Drop rows for lines that no longer exist
+        for product_name in list(self.cart_rows):
+            if self.pos_functions.get_cart_item(product_name) is None:
+                self.remove_cart_row(product_name)
         
-        # Add cart items
         for item in self.pos_functions.get_cart_items():
-            self.cart_tree.insert("", tk.END, values=(
-                item["product"],
-                f"₱{item['price']:.2f}",
-                item["quantity"],
-                f"₱{item['total']:.2f}"
-            ))
-        
-        # Update totals
-        subtotal = self.pos_functions.calculate_subtotal()
-        grand_total = self.pos_functions.calculate_grand_total()
-        self.total_label.config(text=f"Total: ₱{subtotal:.2f}")
+            self.refresh_cart_row(item.product)
+        
+        self.update_totals()
+    
+    def update_totals(self):
+        # Only the lines changed since the last update are re-priced
+        priced = self.pos_functions.price_cart()
+        total = from_cents(priced.subtotal_cents - priced.discount_cents)
+        grand_total = from_cents(priced.total_cents)
+        self.total_label.config(text=f"Total: ₱{total:.2f}")
         self.grand_total_label.config(text=f"Grand Total (incl. tax): ₱{grand_total:.2f}")
     
     def open_product_management(self):
+        from product_window import ProductManagementWindow
         ProductManagementWindow(self.root, self.product_manager, self)
-
-class ProductManagementWindow:
-    def __init__(self, parent, product_manager, main_window):
-        self.window = tk.Toplevel(parent)
-        self.window.title("Product Management")
-        self.window.geometry("600x500")
-        self.window.resizable(False, False)
-        
-        self.product_manager = product_manager
-        self.main_window = main_window
-        
-        self.setup_window()
-        self.load_products()
-    
-    def setup_window(self):
-        # Product table
-        table_frame = tk.Frame(self.window)
-        table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        
-        columns = ("Product Name", "Price", "Stock Quantity")
-        self.product_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=12)
-        self.product_tree.heading("Product Name", text="Product Name")
-        self.product_tree.heading("Price", text="Price")
-        self.product_tree.heading("Stock Quantity", text="Stock Quantity")
-        self.product_tree.column("Product Name", width=200, anchor="w")
-        self.product_tree.column("Price", width=150, anchor="center")
-        self.product_tree.column("Stock Quantity", width=150, anchor="center")
-        self.product_tree.pack(fill=tk.BOTH, expand=True)
-        self.product_tree.bind("<<TreeviewSelect>>", self.on_select)
-        
-        # Input frame
-        input_frame = tk.Frame(self.window, bg="white")
-        input_frame.pack(fill=tk.X, padx=20, pady=10)
-        
-        tk.Label(input_frame, text="Product Name:", bg="white").grid(row=0, column=0, sticky="w", padx=5)
-        self.name_var = tk.StringVar()
-        tk.Entry(input_frame, textvariable=self.name_var, width=20).grid(row=0, column=1, padx=5)
-        
-        tk.Label(input_frame, text="Price:", bg="white").grid(row=0, column=2, sticky="w", padx=5)
-        self.price_var = tk.StringVar()
-        tk.Entry(input_frame, textvariable=self.price_var, width=15).grid(row=0, column=3, padx=5)
-        
-        tk.Label(input_frame, text="Stock Qty:", bg="white").grid(row=0, column=4, sticky="w", padx=5)
-        self.stock_var = tk.StringVar()
-        tk.Entry(input_frame, textvariable=self.stock_var, width=15).grid(row=0, column=5, padx=5)
-        
-        # Button frame
-        btn_frame = tk.Frame(self.window)
-        btn_frame.pack(fill=tk.X, padx=20, pady=10)
-        
-        tk.Button(btn_frame, text="Add Product", bg="#5cb85c", fg="white", 
-                 command=self.add_product).pack(side=tk.LEFT, padx=5)
-        tk.Button(btn_frame, text="Update Product", bg="#5bc0de", fg="white", 
-                 command=self.update_product).pack(side=tk.LEFT, padx=5)
-        tk.Button(btn_frame, text="Delete Product", bg="#d9534f", fg="white", 
-                 command=self.delete_product).pack(side=tk.LEFT, padx=5)
-        tk.Button(btn_frame, text="Close", bg="#999999", fg="white", 
-                 command=self.window.destroy).pack(side=tk.RIGHT, padx=5)
-    
-    def load_products(self):
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-        
-        for name, price, stock in self.product_manager.get_all_products():
-            self.product_tree.insert("", tk.END, values=(name, f"₱{price:.2f}", stock))
-    
-    def on_select(self, event):
-        selected = self.product_tree.selection()
-        if selected:
-            values = self.product_tree.item(selected[0])["values"]
-            self.name_var.set(values[0])
-            self.price_var.set(values[1].replace("₱", ""))
-            self.stock_var.set(values[2])
-    
-    def add_product(self):
-        try:
-            name = self.name_var.get().strip()
-            price = float(self.price_var.get())
-            stock = int(self.stock_var.get())
-            
-            if not name:
-                raise ValueError("Product name cannot be empty")
-            
-            self.product_manager.add_product(name, price, stock)
-            self.load_products()
-            self.clear_inputs()
-            self.main_window.product_combo['values'] = self.product_manager.get_product_names()
-            messagebox.showinfo("Success", "Product added successfully")
-        except ValueError as e:
-            messagebox.showerror("Error", f"Invalid input: {str(e)}")
-    
-    def update_product(self):
-        selected = self.product_tree.selection()
-        if not selected:
-            messagebox.showerror("Error", "Please select a product to update")
-            return
-        
-        try:
-            name = self.name_var.get().strip()
-            price = float(self.price_var.get())
-            stock = int(self.stock_var.get())
-            
-            self.product_manager.update_product(name, price, stock)
-            self.load_products()
-            self.clear_inputs()
-            self.main_window.product_combo['values'] = self.product_manager.get_product_names()
-            messagebox.showinfo("Success", "Product updated successfully")
-        except ValueError as e:
-            messagebox.showerror("Error", f"Invalid input: {str(e)}")
-    
-    def delete_product(self):
-        selected = self.product_tree.selection()
-        if not selected:
-            messagebox.showerror("Error", "Please select a product to delete")
-            return
-        
-        name = self.product_tree.item(selected[0])["values"][0]
-        if messagebox.askyesno("Confirm", f"Delete product '{name}'?"):
-            self.product_manager.delete_product(name)
-            self.load_products()
-            self.clear_inputs()
-            self.main_window.product_combo['values'] = self.product_manager.get_product_names()
-            messagebox.showinfo("Success", "Product deleted successfully")
     
-    def clear_inputs(self):
-        self.name_var.set("")
-        self.price_var.set("")
-        self.stock_var.set("")
\ No newline at end of file
+    def open_receipt_history(self):
+        from history_window import ReceiptHistoryWindow
+        ReceiptHistoryWindow(self.root, self.receipt_history, self)
@@ -0,0 +1,124 @@
+"""
+History window module - Search past receipts and reprint them
+"""
+import tkinter as tk
+from datetime import datetime, timedelta
+from decimal import InvalidOperation
+from tkinter import ttk, messagebox
+from pricing import to_cents
+from receipt_writer import ReceiptJob
+
+
+class ReceiptHistoryWindow:
+    def __init__(self, parent, history, main_window):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Receipt History")
+        self.window.geometry("600x500")
+        self.window.resizable(False, False)
+
+        self.history = history
+        self.main_window = main_window
+        self.entries = {}  # Treeview item id -> HistoryEntry
+
+        self.setup_window()
+        # Pick up receipts saved by other terminals since the last batch
+        self.history.refresh()
+        self.search()
+
+    def setup_window(self):
+        # Search fields
+        input_frame = tk.Frame(self.window, bg="white")
+        input_frame.pack(fill=tk.X, padx=20, pady=10)
+
+        tk.Label(input_frame, text="Product:", bg="white").grid(row=0, column=0, sticky="w", padx=5)
+        self.product_var = tk.StringVar()
+        product_entry = tk.Entry(input_frame, textvariable=self.product_var, width=20)
+        product_entry.grid(row=0, column=1, padx=5)
+        product_entry.bind("<Return>", lambda event: self.search())
+
+        tk.Label(input_frame, text="Min Total:", bg="white").grid(row=0, column=2, sticky="w", padx=5)
+        self.min_total_var = tk.StringVar()
+        tk.Entry(input_frame, textvariable=self.min_total_var, width=12).grid(row=0, column=3, padx=5)
+
+        tk.Label(input_frame, text="From:", bg="white").grid(row=1, column=0, sticky="w", padx=5)
+        self.start_var = tk.StringVar()
+        tk.Entry(input_frame, textvariable=self.start_var, width=20).grid(row=1, column=1, padx=5)
+
+        tk.Label(input_frame, text="To:", bg="white").grid(row=1, column=2, sticky="w", padx=5)
+        self.end_var = tk.StringVar()
+        tk.Entry(input_frame, textvariable=self.end_var, width=12).grid(row=1, column=3, padx=5)
+        tk.Label(input_frame, text="(YYYY-MM-DD)", fg="#777777", bg="white").grid(row=1, column=4, sticky="w")
+
+        # Results table
+        table_frame = tk.Frame(self.window)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=20)
+        columns = ("Date", "Total", "Items")
+        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=14)
+        self.tree.heading("Date", text="Date")
+        self.tree.heading("Total", text="Total")
+        self.tree.heading("Items", text="Items")
+        self.tree.column("Date", width=130, anchor="center")
+        self.tree.column("Total", width=90, anchor="e")
+        self.tree.column("Items", width=320, anchor="w")
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind("<Double-1>", lambda event: self.reprint())
+
+        # Button frame
+        btn_frame = tk.Frame(self.window)
+        btn_frame.pack(fill=tk.X, padx=20, pady=10)
+
+        tk.Button(btn_frame, text="Search", bg="#5bc0de", fg="white",
+                 command=self.search).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Reprint", bg="#5cb85c", fg="white",
+                 command=self.reprint).pack(side=tk.LEFT, padx=5)
+        self.status_label = tk.Label(btn_frame, text="", fg="#777777")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+        tk.Button(btn_frame, text="Close", bg="#999999", fg="white",
+                 command=self.window.destroy).pack(side=tk.RIGHT, padx=5)
+
+    def search(self):
+        try:
+            start = end = min_cents = None
+            if self.start_var.get().strip():
+                start = datetime.strptime(self.start_var.get().strip(), "%Y-%m-%d")
+            if self.end_var.get().strip():
+                # Inclusive: up to the end of the last day
+                end = datetime.strptime(self.end_var.get().strip(), "%Y-%m-%d") + timedelta(days=1)
+            if self.min_total_var.get().strip():
+                min_cents = to_cents(self.min_total_var.get().strip())
+        except (ValueError, InvalidOperation):
+            messagebox.showerror("Error", "Dates must be YYYY-MM-DD and the total a number",
+                                 parent=self.window)
+            return
+
+        entries = self.history.search(self.product_var.get(), start, end, min_cents)
+        self.tree.delete(*self.tree.get_children())
+        self.entries = {}
+        for entry in entries:
+            item = self.tree.insert("", tk.END, values=(
+                f"{entry.time:%Y-%m-%d %H:%M}", f"₱{entry.total:,.2f}", entry.items))
+            self.entries[item] = entry
+        self.status_label.config(text=f"{len(entries)} receipts")
+
+    def reprint(self):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showerror("Error", "Please select a receipt to reprint", parent=self.window)
+            return
+
+        entry = self.entries[selected[0]]
+        try:
+            receipt_text = self.history.read_text(entry)
+        except (OSError, KeyError):
+            messagebox.showerror("Error", "Receipt could not be read", parent=self.window)
+            return
+        saved_receipt = None
+        journal = self.main_window.receipt_writer.journal
+        if entry.txn and entry.journal == self.history.journal_key(journal.directory):
+            # Already in this window's journal, so Print can export it again
+            saved_receipt = ReceiptJob(receipt_text, None)
+            saved_receipt.txn_id = entry.txn
+        self.main_window.show_receipt(receipt_text, saved_receipt)
@@ -0,0 +1,201 @@
+"""
+Instrumentation module - Latency histograms and profiling for hot paths
+
+Functions decorated with @timed("name") and blocks wrapped in
+metrics.timer("name") record their wall-clock time into a histogram
+per name. Recording is on by default and costs one perf_counter pair
+and a bucket increment; with POS_METRICS=0 (or metrics.enabled = False)
+a decorated call only pays for one attribute check.
+
+    metrics.snapshot()          {name: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}
+    metrics.export_json(path)   write the snapshot to a file
+    capture("profile")          cProfile + tracemalloc around a block, written
+                                to profile.prof and profile-memory.txt
+
+Percentiles come from log-spaced buckets and are within about 4%.
+"""
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_METRICS_PATH = "metrics.json"
+
+# Bucket i holds latencies up to expm1((i + 1) * LOG_GROWTH) microseconds;
+# 300 buckets of 8% growth reach well past a minute
+LOG_GROWTH = math.log(1.08)
+BUCKET_SCALE = 1 / LOG_GROWTH
+BUCKETS = 300
+
+
+class Histogram:
+    """Latency histogram with log-spaced microsecond buckets"""
+    __slots__ = ("counts", "total", "max", "lock")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.counts = [0] * BUCKETS
+            self.total = 0.0
+            self.max = 0.0
+
+    def add(self, seconds, log1p=math.log1p):
+        i = int(log1p(seconds * 1e6) * BUCKET_SCALE)
+        with self.lock:
+            self.counts[i if i < BUCKETS else BUCKETS - 1] += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, fraction):
+        """Return the latency in seconds below which `fraction` of samples fall"""
+        count = self.count
+        if not count:
+            return 0.0
+        rank = fraction * count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                # Geometric middle of the bucket, capped at the largest sample
+                us = math.expm1((i + 0.5) * LOG_GROWTH)
+                return min(us / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        count = self.count
+        return {
+            "count": count,
+            "mean_ms": self.total / count * 1000 if count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class Metrics:
+    """Named latency histograms shared by the whole process"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name):
+        """Return the histogram for name, creating it on first use"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def record(self, name, seconds):
+        self.histogram(name).add(seconds)
+
+    def record_since(self, name, start):
+        """Record the time since a perf_counter() start value"""
+        if self.enabled:
+            self.record(name, time.perf_counter() - start)
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def reset(self):
+        with self.lock:
+            for histogram in self.histograms.values():
+                histogram.clear()
+
+    def snapshot(self):
+        """Return {name: summary dict} for every timer that has samples"""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+        return {name: histogram.summary() for name, histogram in histograms
+                if histogram.count}
+
+    def export_json(self, path):
+        """Write the snapshot as JSON, replacing the file atomically"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "timers": self.snapshot()},
+                      f, indent=2)
+        os.replace(tmp_path, path)
+
+    def format_table(self):
+        lines = [f"{'timer':<32} {'count':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for name, s in self.snapshot().items():
+            lines.append(f"{name:<32} {s['count']:>8} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f} "
+                         f"{s['p99_ms']:>9.3f} {s['max_ms']:>9.3f}")
+        return "\n".join(lines)
+
+
+metrics = Metrics(enabled=os.environ.get("POS_METRICS", "1") != "0")
+
+
+def timed(name):
+    """Decorator recording each call's duration under name"""
+    def decorate(func):
+        histogram = metrics.histogram(name)
+        perf_counter = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.add(perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def capture(prefix, top=25):
+    """Profile a block with cProfile and tracemalloc.
+
+    Writes <prefix>.prof (open with pstats or snakeviz) and
+    <prefix>-memory.txt with the top allocation sites.
+    """
+    # Imported here: both are slow to import and only needed when profiling
+    import cProfile
+    import tracemalloc
+    profiler = cProfile.Profile()
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(prefix + ".prof")
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        with open(prefix + "-memory.txt", "w", encoding="utf-8") as f:
+            f.write(f"current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n\n")
+            for stat in snapshot.statistics("lineno")[:top]:
+                f.write(f"{stat}\n")
@@ -0,0 +1,104 @@
+"""
+Inventory module - Stock reservations shared by several terminals
+"""
+import itertools
+import threading
+
+
+class StockReservations:
+    """Holds stock for items sitting in carts until the sale is committed.
+
+    Every cart gets an id from new_cart_id(). reserve() sets how many units
+    of a product the cart holds, and only succeeds if the catalog stock
+    minus everything other carts hold covers it. commit() turns a cart's
+    holds into a stock reduction in one catalog transaction: either every
+    line is taken or none is.
+
+    Each product has its own lock, so terminals selling different
+    products never wait on each other. commit() takes the locks of all
+    products in the cart in name order, which rules out deadlocks.
+    """
+
+    def __init__(self, product_manager):
+        self.product_manager = product_manager
+        self.reserved = {}  # product name -> units held by all carts
+        self.holds = {}  # cart id -> {product name: units}
+        self.locks = {}  # product name -> Lock
+        self.locks_guard = threading.Lock()
+        self.cart_ids = itertools.count(1)
+
+    def new_cart_id(self):
+        return next(self.cart_ids)
+
+    def lock_for(self, name):
+        with self.locks_guard:
+            lock = self.locks.get(name)
+            if lock is None:
+                lock = self.locks[name] = threading.Lock()
+            return lock
+
+    def adjust_reserved(self, name, delta):
+        # Caller holds the product lock
+        units = self.reserved.get(name, 0) + delta
+        if units:
+            self.reserved[name] = units
+        else:
+            self.reserved.pop(name, None)
+
+    def available(self, name):
+        """Return catalog stock not held by any cart"""
+        product = self.product_manager.get_product(name)
+        if product is None:
+            return 0
+        return product.stock - self.reserved.get(name, 0)
+
+    def reserve(self, cart_id, name, quantity):
+        """Set the units of a product held by a cart; False if not enough stock"""
+        with self.lock_for(name):
+            cart = self.holds.setdefault(cart_id, {})
+            delta = quantity - cart.get(name, 0)
+            if delta > 0 and self.available(name) < delta:
+                return False
+            self.adjust_reserved(name, delta)
+            if quantity:
+                cart[name] = quantity
+            else:
+                cart.pop(name, None)
+            return True
+
+    def release(self, cart_id, name=None):
+        """Give back one product held by a cart, or all of them"""
+        cart = self.holds.get(cart_id)
+        if not cart:
+            return
+        names = [name] if name is not None else list(cart)
+        for name in names:
+            with self.lock_for(name):
+                quantity = cart.pop(name, 0)
+                self.adjust_reserved(name, -quantity)
+        if not cart:
+            self.holds.pop(cart_id, None)
+
+    def commit(self, cart_id, details=None, wait=True):
+        """Reduce stock for everything the cart holds, all or nothing
+        (see ProductManager.commit_stock for wait)"""
+        cart = self.holds.get(cart_id)
+        if not cart:
+            return True
+        locks = [self.lock_for(name) for name in sorted(cart)]
+        for lock in locks:
+            lock.acquire()
+        try:
+            # The ledger fsync is waited for below, after the product locks
+            # are released, so reserve() on the same products never waits on it
+            if not self.product_manager.commit_stock(cart.items(), details, wait=False):
+                return False
+            for name, quantity in cart.items():
+                self.adjust_reserved(name, -quantity)
+            del self.holds[cart_id]
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        if wait:
+            self.product_manager.sync_ledger()
+        return True
@@ -0,0 +1,177 @@
+"""
+Ledger module - Write-ahead log of sales and stock adjustments
+
+Every sale and stock change is appended here before the catalog commit
+is acknowledged, so nothing is lost if the process dies or the machine
+loses power. On startup ProductManager.attach_ledger() replays records
+newer than the last one applied to the catalog database.
+
+Records are JSON lines with a monotonic "seq":
+    {"seq": 7, "type": "sale", "time": ..., "items": [[name, qty], ...],
+     "lines": [[name, qty, price_cents, discount_cents], ...], "tax_cents": 123}
+    {"seq": 8, "type": "product", "time": ..., "items": [[name, sku, price, stock], ...]}
+    {"seq": 9, "type": "delete", "time": ..., "items": [name, ...]}
+
+"sale" items are subtracted from stock; "product" items are added or
+replace the product outright (a sku of null keeps the current one);
+"delete" items are removed from the catalog. Ledgers written before
+products were logged in full may also hold "stock" records,
+{"items": [[name, stock], ...]}, which set the stock level.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+from dirlock import lock_directory
+
+
+class SalesLedger:
+    """Segmented append-only log with group commit.
+
+    append() buffers a record and returns its sequence number;
+    wait_durable() blocks until it is fsynced. Whichever caller gets to
+    the disk first writes and fsyncs every record buffered so far, so
+    concurrent terminals share one fsync.
+
+    The catalog database is the snapshot: checkpoint() makes the
+    database durable, starts a new segment and deletes segments that are
+    fully applied, so replay on startup only covers records since the
+    last checkpoint no matter how long the history is.
+    """
+
+    def __init__(self, directory="ledger", checkpoint_interval=1000):
+        self.directory = directory
+        self.checkpoint_interval = checkpoint_interval
+        os.makedirs(directory, exist_ok=True)
+        # Taken before scanning, which may truncate a torn segment
+        self.lock_file = lock_directory(directory)
+
+        self.cond = threading.Condition()
+        self.pending = []  # encoded lines not yet written
+        self.flushing = False
+        self.error = None
+        self.since_checkpoint = 0
+
+        segments = self.segment_starts()
+        start = segments[-1] if segments else 1
+        self.next_seq = start + self.scan_segment(start)
+        self.durable_seq = self.next_seq - 1
+        self.segment = open(self.segment_path(start), "ab")
+
+    def segment_path(self, start_seq):
+        return os.path.join(self.directory, f"ledger-{start_seq:012d}.log")
+
+    def segment_starts(self):
+        return sorted(int(name[7:19]) for name in os.listdir(self.directory)
+                      if name.startswith("ledger-") and name.endswith(".log"))
+
+    def scan_segment(self, start_seq):
+        """Count complete records in a segment, dropping a torn last line"""
+        path = self.segment_path(start_seq)
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        offset = 0
+        with open(path, "r+b") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    f.truncate(offset)
+                    break
+                count += 1
+                offset += len(line)
+        return count
+
+    def append(self, record):
+        """Buffer a record and return its sequence number"""
+        with self.cond:
+            seq = self.next_seq
+            self.next_seq += 1
+            record = {"seq": seq, "time": datetime.now().isoformat(timespec="seconds"), **record}
+            self.pending.append((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.since_checkpoint += 1
+            return seq
+
+    def wait_durable(self, seq):
+        """Block until the record with this sequence number is on disk"""
+        with self.cond:
+            while self.durable_seq < seq:
+                if self.error:
+                    raise self.error
+                if self.flushing:
+                    self.cond.wait()
+                    continue
+                # Become the leader: write everything buffered so far
+                self.flushing = True
+                lines = self.pending
+                self.pending = []
+                upto = self.next_seq - 1
+                self.cond.release()
+                try:
+                    self.segment.write(b"".join(lines))
+                    self.segment.flush()
+                    os.fsync(self.segment.fileno())
+                except OSError as e:
+                    self.error = e
+                finally:
+                    self.cond.acquire()
+                    self.flushing = False
+                    if not self.error:
+                        self.durable_seq = upto
+                    self.cond.notify_all()
+
+    def log(self, record):
+        """Append a record and wait until it is durable"""
+        seq = self.append(record)
+        self.wait_durable(seq)
+        return seq
+
+    def sync(self):
+        """Make every appended record durable"""
+        with self.cond:
+            seq = self.next_seq - 1
+        self.wait_durable(seq)
+
+    def needs_checkpoint(self):
+        return self.since_checkpoint >= self.checkpoint_interval
+
+    def postpone_checkpoint(self):
+        """Try the checkpoint again after another checkpoint_interval records"""
+        with self.cond:
+            self.since_checkpoint = 0
+
+    def records_after(self, seq):
+        """Yield durable records with a sequence number greater than seq"""
+        starts = self.segment_starts()
+        # Start from the last segment that begins at or before seq + 1
+        first = 0
+        for i, start in enumerate(starts):
+            if start <= seq + 1:
+                first = i
+        for start in starts[first:]:
+            with open(self.segment_path(start), "rb") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if record["seq"] > seq:
+                        yield record
+
+    def truncate(self, applied_seq):
+        """Start a new segment and delete segments fully covered by applied_seq.
+
+        Called by ProductManager.checkpoint_ledger() once the catalog
+        database holds everything up to applied_seq durably.
+        """
+        self.sync()
+        with self.cond:
+            self.segment.close()
+            start = self.next_seq
+            self.segment = open(self.segment_path(start), "ab")
+            self.since_checkpoint = 0
+        for old in self.segment_starts():
+            if old < start and applied_seq >= start - 1:
+                os.remove(self.segment_path(old))
+
+    def close(self):
+        self.sync()
+        self.segment.close()
+        self.lock_file.close()
@@ -2,13 +2,22 @@
 POS System - Point of Sale
 Main entry point for the application
 """
+import os
 import tkinter as tk
 from gui import POSWindow
+from instrumentation import capture
 
 def main():
     root = tk.Tk()
     app = POSWindow(root)
-    root.mainloop()
+    # POS_PROFILE=name profiles the whole session into name.prof and
+    # name-memory.txt
+    profile = os.environ.get("POS_PROFILE")
+    if profile:
+        with capture(profile):
+            root.mainloop()
+    else:
+        root.mainloop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,436 @@
+"""
+Pricing module - Promotions and per-category tax rates
+
+Rules are compiled into per-product lookup tables whenever they change,
+so pricing a cart only looks at the rules for the products in it:
+linear in cart lines no matter how many promotions are active. A cart
+that is priced after every edit keeps a CartPricer, which only
+re-evaluates the lines and bundles an edit can affect.
+
+Rules can be loaded from a JSON file:
+
+    {
+      "tax_rates": {"basic food": "0.00"},
+      "categories": {"Bread": "basic food", "Eggs": "basic food"},
+      "promotions": [
+        {"type": "percent_off", "products": ["Hotdog"], "percent": 20,
+         "start": "15:00", "end": "17:00"},
+        {"type": "buy_get", "product": "Milk", "buy": 2, "get": 1},
+        {"type": "bundle", "items": {"Bread": 1, "Eggs": 6}, "price": "99.00"}
+      ]
+    }
+"""
+import json
+from datetime import datetime, time
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal("0.01")
+TAX_RATE = Decimal("0.12")
+
+DEFAULT_PRICING_PATH = "pricing.json"
+
+
+def to_cents(value):
+    """Convert a price to an exact number of centavos"""
+    return int(Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents):
+    """Convert centavos to a two-decimal Decimal"""
+    return Decimal(cents).scaleb(-2)
+
+
+def round_cents(value):
+    return int(value.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+class PercentOff:
+    """Percentage off some products, optionally only between two times of day"""
+
+    def __init__(self, products, percent, start=None, end=None, name=None):
+        self.products = list(products)
+        self.percent = Decimal(str(percent))
+        # Limited to certain hours, so the discount depends on when the cart is priced
+        self.timed = bool(start or end)
+        # Without times the discount applies all day
+        self.start = start or time.min
+        self.end = end or time.max
+        self.name = name or f"{self.percent.normalize():f}% off"
+
+    def active(self, now):
+        current = now.time()
+        if self.start <= self.end:
+            return self.start <= current < self.end
+        return current >= self.start or current < self.end  # crosses midnight
+
+    def line_discount(self, quantity, price_cents, now):
+        if not self.active(now):
+            return 0
+        return round_cents(quantity * price_cents * self.percent / 100)
+
+
+class BuyGet:
+    """Buy `buy` units of a product and get `get` more free"""
+
+    timed = False
+
+    def __init__(self, product, buy, get, name=None):
+        self.products = [product]
+        self.buy = buy
+        self.get = get
+        self.name = name or f"Buy {buy} get {get} free"
+
+    def line_discount(self, quantity, price_cents, now):
+        return quantity // (self.buy + self.get) * self.get * price_cents
+
+
+class Bundle:
+    """A set of products sold together at a fixed price"""
+
+    def __init__(self, items, price_cents, name=None):
+        self.items = dict(items)  # product name -> quantity per bundle
+        self.price_cents = price_cents
+        self.name = name or "Bundle: " + " + ".join(self.items)
+
+
+class PricedCart:
+    """Result of pricing a cart; amounts are in centavos.
+
+    line_discounts maps product names to their share of every discount,
+    discounts lists (description, amount) for the receipt, and tax_rate
+    is the single rate applied, or None if lines were taxed differently.
+    time is the moment the cart was priced at.
+    """
+    __slots__ = ("subtotal_cents", "discount_cents", "tax_cents", "tax_rate",
+                 "discounts", "line_discounts", "time")
+
+    def __init__(self, subtotal_cents, discount_cents, tax_cents, tax_rate,
+                 discounts, line_discounts, time=None):
+        self.subtotal_cents = subtotal_cents
+        self.discount_cents = discount_cents
+        self.tax_cents = tax_cents
+        self.tax_rate = tax_rate
+        self.discounts = discounts
+        self.line_discounts = line_discounts
+        self.time = time
+
+    @property
+    def total_cents(self):
+        return self.subtotal_cents - self.discount_cents + self.tax_cents
+
+
+class PricingRules:
+    """Active promotions and tax rates.
+
+    Any change marks the rules dirty; the next price_cart() compiles
+    them into three tables keyed by product name: line promotions,
+    bundles containing the product, and the product's tax rate. A fourth
+    gives each bundle its position among the promotions, which decides
+    between bundles with the same saving.
+    """
+
+    def __init__(self, tax_rate=TAX_RATE):
+        self.tax_rate = Decimal(str(tax_rate))
+        self.promotions = []
+        self.categories = {}  # product name -> category
+        self.category_rates = {}  # category -> tax rate
+        self.compiled = None
+
+    def add_promotion(self, promotion):
+        self.promotions.append(promotion)
+        self.compiled = None
+
+    def remove_promotion(self, promotion):
+        self.promotions.remove(promotion)
+        self.compiled = None
+
+    def set_category(self, product_name, category):
+        self.categories[product_name] = category
+        self.compiled = None
+
+    def set_tax_rate(self, category, rate):
+        self.category_rates[category] = Decimal(str(rate))
+        self.compiled = None
+
+    def compile(self):
+        line_rules = {}
+        bundles = {}
+        bundle_ranks = {}
+        for promotion in self.promotions:
+            if isinstance(promotion, Bundle):
+                bundle_ranks[id(promotion)] = len(bundle_ranks)
+                for name in promotion.items:
+                    bundles.setdefault(name, []).append(promotion)
+            else:
+                for name in promotion.products:
+                    line_rules.setdefault(name, []).append(promotion)
+        tax_rates = {name: self.category_rates[category]
+                     for name, category in self.categories.items()
+                     if category in self.category_rates}
+        self.compiled = (line_rules, bundles, tax_rates, bundle_ranks)
+        return self.compiled
+
+    def price_cart(self, lines, now=None):
+        """Price CartLine-like objects (product, price_cents, quantity)"""
+        line_rules, bundles, tax_rates, bundle_ranks = self.compiled or self.compile()
+        now = now or datetime.now()
+        lines = list(lines)
+        prices = {line.product: line.price_cents for line in lines}
+        remaining = {line.product: line.quantity for line in lines}
+        line_discounts = dict.fromkeys(prices, 0)
+        discounts = []
+
+        # Bundles first; their units are then not eligible for line promotions
+        candidates = {}
+        for line in lines:
+            for bundle in bundles.get(line.product, ()):
+                if all(name in prices for name in bundle.items):
+                    candidates[id(bundle)] = bundle
+        for bundle, _, total, shares in take_bundles(candidates.values(), bundle_ranks, prices,
+                                                     remaining):
+            for name, share in shares.items():
+                line_discounts[name] += share
+            discounts.append((bundle.name, total))
+
+        for line in lines:
+            rules = line_rules.get(line.product)
+            quantity = remaining[line.product]
+            if not rules or not quantity:
+                continue
+            best, rule = max((rule.line_discount(quantity, line.price_cents, now), i)
+                             for i, rule in enumerate(rules))
+            if best > 0:
+                line_discounts[line.product] += best
+                discounts.append((f"{line.product}: {rules[rule].name}", best))
+
+        # Tax each rate's net amount once, like a single-rate receipt
+        net_by_rate = {}
+        subtotal = 0
+        for line in lines:
+            total = line.price_cents * line.quantity
+            subtotal += total
+            rate = tax_rates.get(line.product, self.tax_rate)
+            net_by_rate[rate] = net_by_rate.get(rate, 0) + total - line_discounts[line.product]
+        tax = sum(round_cents(net * rate) for rate, net in net_by_rate.items())
+        if len(net_by_rate) > 1:
+            tax_rate = None
+        else:
+            tax_rate = next(iter(net_by_rate), self.tax_rate)
+        return PricedCart(subtotal, sum(line_discounts.values()), tax, tax_rate,
+                          discounts, line_discounts, now)
+
+    @classmethod
+    def load(cls, path):
+        """Build rules from a JSON file (see the module docstring)"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rules = cls(data.get("tax_rate", TAX_RATE))
+        for category, rate in data.get("tax_rates", {}).items():
+            rules.set_tax_rate(category, rate)
+        for product_name, category in data.get("categories", {}).items():
+            rules.set_category(product_name, category)
+        for spec in data.get("promotions", []):
+            rules.add_promotion(promotion_from_dict(spec))
+        return rules
+
+
+def take_bundles(candidates, ranks, prices, remaining):
+    """Apply bundles whose products are all in prices, best saving per
+    bundle first (ties in promotion order), taking their units out of
+    remaining (product -> units).
+
+    Yields (bundle, saving per bundle, total saving, {product: share})
+    for each bundle applied at least once.
+    """
+    ranked = []
+    for bundle in candidates:
+        regular = sum(prices[name] * qty for name, qty in bundle.items.items())
+        ranked.append((regular - bundle.price_cents, ranks[id(bundle)], regular, bundle))
+    ranked.sort(key=lambda c: (-c[0], c[1]))
+    for saving, _, regular, bundle in ranked:
+        if saving <= 0:
+            break
+        count = min(remaining[name] // qty for name, qty in bundle.items.items())
+        if count:
+            total = saving * count
+            # Spread the saving over the bundle's lines by value; the
+            # rounding remainder goes to the first line
+            shares = {name: total * prices[name] * qty // regular
+                      for name, qty in bundle.items.items()}
+            shares[next(iter(shares))] += total - sum(shares.values())
+            for name, qty in bundle.items.items():
+                remaining[name] -= qty * count
+            yield bundle, saving, total, shares
+
+
+class CartPricer:
+    """Keeps one cart's pricing up to date as its lines change.
+
+    The cart owner calls changed(product) after adding, updating or
+    removing that product's line. price() then re-evaluates only that
+    line's promotion and the bundles connected to it through products
+    in the cart (bundles compete for the units of products they share),
+    instead of the whole cart. Lines with promotions limited to certain
+    hours are also re-evaluated when one of those promotions starts or
+    ends. The result matches PricingRules.price_cart() for the same cart.
+    """
+
+    def __init__(self, rules, lines):
+        self.rules = rules
+        self.lines = lines  # product name -> CartLine, owned by the cart
+        self.compiled = None
+        self.reset()
+
+    def reset(self):
+        """Forget all cached results; everything in the cart is re-priced"""
+        self.dirty = set(self.lines)
+        self.timed = {}  # product -> which of its hour-limited promotions were active
+        self.bundle_units = {}  # product -> units used by bundles
+        self.bundle_shares = {}  # product -> share of bundle savings
+        self.bundle_discounts = {}  # id(bundle) -> (-saving per bundle, rank, name, total)
+        self.line_promotions = {}  # product -> (description, amount) of its line promotion
+        self.line_discounts = {}  # product -> every discount on the line
+        self.discount = 0
+        self.line_totals = {}  # product -> (tax rate, total, net of discounts)
+        self.by_rate = {}  # tax rate -> [lines, net, tax on net]
+        self.subtotal = 0
+
+    def changed(self, product):
+        self.dirty.add(product)
+
+    def price(self, now=None):
+        """Return a PricedCart for the cart as it is now"""
+        now = now or datetime.now()
+        compiled = self.rules.compiled or self.rules.compile()
+        if compiled is not self.compiled:
+            self.compiled = compiled
+            self.reset()
+        line_rules, bundles, tax_rates, bundle_ranks = compiled
+        dirty = self.dirty
+        self.dirty = set()
+        if dirty:
+            dirty |= self.reprice_bundles(dirty, bundles, bundle_ranks)
+        for product, active in self.timed.items():
+            if active != timed_activity(line_rules[product], now):
+                dirty.add(product)
+        rates = set()
+        for product in dirty:
+            rates.update(self.reprice_line(product, line_rules.get(product), tax_rates, now))
+        for rate in rates:
+            totals = self.by_rate.get(rate)
+            if totals:
+                totals[2] = round_cents(totals[1] * rate)
+
+        discounts = [(name, total) for _, _, name, total in sorted(self.bundle_discounts.values())]
+        discounts += [self.line_promotions[product] for product in self.lines
+                      if product in self.line_promotions]
+        tax = sum(totals[2] for totals in self.by_rate.values())
+        if len(self.by_rate) > 1:
+            tax_rate = None
+        else:
+            tax_rate = next(iter(self.by_rate), self.rules.tax_rate)
+        return PricedCart(self.subtotal, self.discount, tax, tax_rate, discounts,
+                          dict(self.line_discounts), now)
+
+    def reprice_bundles(self, dirty, bundles, ranks):
+        """Re-apply the bundles connected to the changed products; returns
+        the products whose bundle units or savings may have changed"""
+        lines = self.lines
+        products = set(dirty)
+        group = {}
+        frontier = list(dirty)
+        while frontier:
+            for bundle in bundles.get(frontier.pop(), ()):
+                if id(bundle) in group:
+                    continue
+                group[id(bundle)] = bundle
+                for name in bundle.items:
+                    if name in lines and name not in products:
+                        products.add(name)
+                        frontier.append(name)
+
+        for key in group:
+            self.bundle_discounts.pop(key, None)
+        for name in products:
+            self.bundle_units.pop(name, None)
+            self.bundle_shares.pop(name, None)
+        prices = {name: lines[name].price_cents for name in products if name in lines}
+        remaining = {name: lines[name].quantity for name in prices}
+        candidates = [bundle for bundle in group.values()
+                      if all(name in prices for name in bundle.items)]
+        for bundle, saving, total, shares in take_bundles(candidates, ranks, prices, remaining):
+            self.bundle_discounts[id(bundle)] = (-saving, ranks[id(bundle)], bundle.name, total)
+            for name, share in shares.items():
+                self.bundle_shares[name] = self.bundle_shares.get(name, 0) + share
+        for name in prices:
+            used = lines[name].quantity - remaining[name]
+            if used:
+                self.bundle_units[name] = used
+        return products
+
+    def reprice_line(self, product, rules, tax_rates, now):
+        """Recompute one line's promotion, discount and net amount; returns
+        the tax rates whose net amount changed"""
+        self.line_promotions.pop(product, None)
+        self.timed.pop(product, None)
+        self.discount -= self.line_discounts.pop(product, 0)
+        rates = []
+        old = self.line_totals.pop(product, None)
+        if old:
+            rate, total, net = old
+            self.subtotal -= total
+            totals = self.by_rate[rate]
+            totals[0] -= 1
+            totals[1] -= net
+            if not totals[0]:
+                del self.by_rate[rate]
+            rates.append(rate)
+
+        line = self.lines.get(product)
+        if line is None:
+            return rates
+        discount = self.bundle_shares.get(product, 0)
+        if rules:
+            active = timed_activity(rules, now)
+            if active:
+                self.timed[product] = active
+            quantity = line.quantity - self.bundle_units.get(product, 0)
+            if quantity:
+                best, rule = max((rule.line_discount(quantity, line.price_cents, now), i)
+                                 for i, rule in enumerate(rules))
+                if best > 0:
+                    self.line_promotions[product] = (f"{product}: {rules[rule].name}", best)
+                    discount += best
+        total = line.price_cents * line.quantity
+        rate = tax_rates.get(product, self.rules.tax_rate)
+        self.line_discounts[product] = discount
+        self.discount += discount
+        self.line_totals[product] = (rate, total, total - discount)
+        self.subtotal += total
+        totals = self.by_rate.setdefault(rate, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += total - discount
+        rates.append(rate)
+        return rates
+
+
+def timed_activity(rules, now):
+    """Which of the hour-limited promotions among rules are active at now"""
+    return tuple(rule.active(now) for rule in rules if rule.timed)
+
+
+def parse_time(text):
+    return time.fromisoformat(text) if text else None
+
+
+def promotion_from_dict(spec):
+    kind = spec.get("type")
+    name = spec.get("name")
+    if kind == "percent_off":
+        return PercentOff(spec["products"], spec["percent"], parse_time(spec.get("start")),
+                          parse_time(spec.get("end")), name)
+    if kind == "buy_get":
+        return BuyGet(spec["product"], int(spec["buy"]), int(spec["get"]), name)
+    if kind == "bundle":
+        return Bundle(spec["items"], to_cents(spec["price"]), name)
+    raise ValueError(f"Unknown promotion type: {kind}")
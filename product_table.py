@@ -0,0 +1,165 @@
+"""
+Product table module - Virtualized product list for large catalogs
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from products import PRODUCT_ADDED, PRODUCT_DELETED
+
+
+class VirtualProductTable:
+    """Treeview that only holds the rows currently on screen.
+
+    Rows are fetched from the ProductManager a page at a time and cached,
+    so opening or scrolling the table costs the same for 10 or 100k
+    products. Each Treeview item id is the product name.
+
+    Subscribe handle_events to the ProductManager so changes made
+    anywhere only touch the affected rows.
+    """
+
+    def __init__(self, parent, product_manager, height=12, page_size=100,
+                 overscan=5, max_pages=8):
+        self.product_manager = product_manager
+        self.height = height
+        self.page_size = page_size
+        self.overscan = overscan
+        self.max_pages = max_pages
+
+        self.offset = 0
+        self.total = product_manager.count_products()
+        self.pages = {}  # page number -> list of (name, price, stock)
+
+        self.frame = tk.Frame(parent)
+        columns = ("Product Name", "Price", "Stock Quantity")
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=height)
+        self.tree.heading("Product Name", text="Product Name")
+        self.tree.heading("Price", text="Price")
+        self.tree.heading("Stock Quantity", text="Stock Quantity")
+        self.tree.column("Product Name", width=200, anchor="w")
+        self.tree.column("Price", width=150, anchor="center")
+        self.tree.column("Stock Quantity", width=150, anchor="center")
+
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Mouse wheel (Windows/macOS use <MouseWheel>, X11 uses buttons 4/5)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_by(-1 if e.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-1))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(1))
+
+        self.render()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def bind(self, sequence, func):
+        self.tree.bind(sequence, func)
+
+    def selected_name(self):
+        """Return the name of the selected product, or None"""
+        selected = self.tree.selection()
+        return selected[0] if selected else None
+
+    def get_page(self, number):
+        """Return a cached page, fetching it from the catalog if needed"""
+        page = self.pages.get(number)
+        if page is None:
+            page = self.product_manager.get_products_page(number * self.page_size, self.page_size)
+            if len(self.pages) >= self.max_pages:
+                # Drop the page furthest from the current position
+                current = self.offset // self.page_size
+                del self.pages[max(self.pages, key=lambda n: abs(n - current))]
+            self.pages[number] = page
+        return page
+
+    def get_rows(self, start, count):
+        """Return rows start..start+count from the page cache"""
+        rows = []
+        number = start // self.page_size
+        skip = start % self.page_size
+        while len(rows) < count:
+            page = self.get_page(number)
+            rows.extend(page[skip:skip + count - len(rows)])
+            if len(page) < self.page_size:
+                break
+            number += 1
+            skip = 0
+        return rows
+
+    def render(self):
+        """Materialize only the visible window of rows"""
+        selected = self.selected_name()
+        self.tree.delete(*self.tree.get_children())
+        for name, price, stock in self.get_rows(self.offset, self.height):
+            self.tree.insert("", tk.END, iid=name, values=(name, f"₱{price:.2f}", stock))
+        if selected and self.tree.exists(selected):
+            self.tree.selection_set(selected)
+
+        # Prefetch the neighbouring page when the window is near its edge
+        end = self.offset + self.height + self.overscan
+        if end < self.total:
+            self.get_page(end // self.page_size)
+
+        if self.total > 0:
+            first = self.offset / self.total
+            last = min(1.0, (self.offset + self.height) / self.total)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(offset, self.total - self.height))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+        return "break"
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.total))
+        elif action == "scroll":
+            step = self.height if unit == "pages" else 1
+            self.scroll_by(int(amount) * step)
+
+    def reload(self):
+        """Drop cached pages and redraw the visible window"""
+        self.total = self.product_manager.count_products()
+        self.pages.clear()
+        self.offset = max(0, min(self.offset, self.total - self.height))
+        self.render()
+
+    def handle_events(self, events):
+        """ProductManager listener: update changed rows in place"""
+        added = removed = 0
+        for event in events:
+            if event.kind == PRODUCT_ADDED:
+                added += 1
+            elif event.kind == PRODUCT_DELETED:
+                removed += 1
+            else:
+                self.update_row(event.name, event.price, event.stock)
+        if added or removed:
+            # Positions after an added or removed row shift, so cached
+            # pages are stale
+            self.total = max(0, self.total + added - removed)
+            self.pages.clear()
+            self.offset = max(0, min(self.offset, self.total - self.height))
+            self.render()
+
+    def update_row(self, name, price=None, stock=None):
+        """Apply new values of a single product without reloading the table"""
+        row = None
+        for page in self.pages.values():
+            for i, cached in enumerate(page):
+                if cached[0] == name:
+                    row = page[i] = (name,
+                                     cached[1] if price is None else price,
+                                     cached[2] if stock is None else stock)
+                    break
+        if row and self.tree.exists(name):
+            self.tree.item(name, values=(name, f"₱{row[1]:.2f}", row[2]))
@@ -0,0 +1,129 @@
+"""
+Product window module - Add, update and delete catalog products
+"""
+import sqlite3
+import tkinter as tk
+from tkinter import messagebox
+from catalog_io import validate_row
+from product_table import VirtualProductTable
+
+class ProductManagementWindow:
+    def __init__(self, parent, product_manager, main_window):
+        self.window = tk.Toplevel(parent)
+        self.window.title("Product Management")
+        self.window.geometry("600x500")
+        self.window.resizable(False, False)
+        
+        self.product_manager = product_manager
+        self.main_window = main_window
+        
+        self.setup_window()
+        # Rows follow catalog changes made here or by checkouts
+        self.product_manager.subscribe(self.product_table.handle_events)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+    
+    def setup_window(self):
+        # Product table
+        table_frame = tk.Frame(self.window)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        # Virtualized table: only the visible rows exist as Treeview items
+        self.product_table = VirtualProductTable(table_frame, self.product_manager, height=12)
+        self.product_table.pack(fill=tk.BOTH, expand=True)
+        self.product_tree = self.product_table.tree
+        self.product_tree.bind("<<TreeviewSelect>>", self.on_select)
+        
+        # Input frame
+        input_frame = tk.Frame(self.window, bg="white")
+        input_frame.pack(fill=tk.X, padx=20, pady=10)
+        
+        tk.Label(input_frame, text="Product Name:", bg="white").grid(row=0, column=0, sticky="w", padx=5)
+        self.name_var = tk.StringVar()
+        tk.Entry(input_frame, textvariable=self.name_var, width=20).grid(row=0, column=1, padx=5)
+        
+        tk.Label(input_frame, text="Price:", bg="white").grid(row=0, column=2, sticky="w", padx=5)
+        self.price_var = tk.StringVar()
+        tk.Entry(input_frame, textvariable=self.price_var, width=15).grid(row=0, column=3, padx=5)
+        
+        tk.Label(input_frame, text="Stock Qty:", bg="white").grid(row=0, column=4, sticky="w", padx=5)
+        self.stock_var = tk.StringVar()
+        tk.Entry(input_frame, textvariable=self.stock_var, width=15).grid(row=0, column=5, padx=5)
+        
+        # Button frame
+        btn_frame = tk.Frame(self.window)
+        btn_frame.pack(fill=tk.X, padx=20, pady=10)
+        
+        tk.Button(btn_frame, text="Add Product", bg="#5cb85c", fg="white", 
+                 command=self.add_product).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Update Product", bg="#5bc0de", fg="white", 
+                 command=self.update_product).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Delete Product", bg="#d9534f", fg="white", 
+                 command=self.delete_product).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Close", bg="#999999", fg="white", 
+                 command=self.close).pack(side=tk.RIGHT, padx=5)
+    
+    def close(self):
+        self.product_manager.unsubscribe(self.product_table.handle_events)
+        self.window.destroy()
+    
+    def on_select(self, event):
+        selected = self.product_tree.selection()
+        if selected:
+            values = self.product_tree.item(selected[0])["values"]
+            self.name_var.set(selected[0])
+            self.price_var.set(values[1].replace("₱", ""))
+            self.stock_var.set(values[2])
+    
+    def read_inputs(self):
+        """Return (name, price, stock) from the entries, checked like an
+        imported row (finite, non-negative); raises ValueError"""
+        name, _, price, stock = validate_row({"name": self.name_var.get(),
+                                              "price": self.price_var.get(),
+                                              "stock": self.stock_var.get()})
+        return name, price, stock
+    
+    def add_product(self):
+        try:
+            name, price, stock = self.read_inputs()
+            
+            self.product_manager.add_product(name, price, stock)
+            self.clear_inputs()
+            messagebox.showinfo("Success", "Product added successfully")
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid input: {str(e)}")
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Product could not be saved: {e}")
+    
+    def update_product(self):
+        selected = self.product_tree.selection()
+        if not selected:
+            messagebox.showerror("Error", "Please select a product to update")
+            return
+        
+        try:
+            name, price, stock = self.read_inputs()
+            
+            self.product_manager.update_product(name, price, stock)
+            self.clear_inputs()
+            messagebox.showinfo("Success", "Product updated successfully")
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid input: {str(e)}")
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Product could not be saved: {e}")
+    
+    def delete_product(self):
+        selected = self.product_tree.selection()
+        if not selected:
+            messagebox.showerror("Error", "Please select a product to delete")
+            return
+        
+        name = selected[0]
+        if messagebox.askyesno("Confirm", f"Delete product '{name}'?"):
+            self.product_manager.delete_product(name)
+            self.clear_inputs()
+            messagebox.showinfo("Success", "Product deleted successfully")
+    
+    def clear_inputs(self):
+        self.name_var.set("")
+        self.price_var.set("")
+        self.stock_var.set("")
@@ -1,60 +1,586 @@
-products = {
-    1: {"Product": "Burger", "price": 50},
-    2: {"Product": "Fries", "price": 30},
-    3: {"Product": "Spaghetti", "price": 50},
-    4: {"Product": "1-pc Chicken with Rice", "price": 89},
-    5: {"Product": "Hotdog Sandwich", "price": 35},
-    6: {"Product": "Regular Coke", "price": 25},
-    7: {"Product": "Iced Tea", "price": 30},
-    8: {"Product": "Milkshake", "price": 55},
-    9: {"Product": "Ice Cream Sundae", "price": 35},
-    10: {"Product": "Brownie", "price": 25},
-    
-}
+"""
+Products module - Catalog storage for POS System
+"""
+import sqlite3
+import threading
+
+from instrumentation import timed
+from summaries import SUMMARY_SCHEMA, record_sale
+
+DEFAULT_DB_PATH = "products.db"
+
+# Products written to a brand new database
+DEFAULT_PRODUCTS = [
+    ("Apple", "4800000000011", 15.00, 50),
+    ("Banana", "4800000000028", 10.00, 30),
+    ("Bread", "4800000000035", 45.99, 25),
+    ("Eggs", "4800000000042", 11.00, 40),
+    ("Hotdog", "4800000000059", 45.00, 42),
+    ("Milk", "4800000000066", 25.49, 20),
+]
+
+# SQL statements are kept as constants so sqlite3's statement cache
+# reuses the prepared statement on every call
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    sku TEXT,
+    price REAL NOT NULL,
+    stock INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_products_name ON products(name);
+CREATE INDEX IF NOT EXISTS idx_products_stock ON products(stock);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deleted_products (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_deleted_products_version ON deleted_products(version);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('catalog_version', 0);
+"""
+# Run after adding the version column to a database from before the change feed
+VERSION_SCHEMA = "CREATE INDEX IF NOT EXISTS idx_products_version ON products(version)"
+SQL_ADD_VERSION = "ALTER TABLE products ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+SQL_COLUMNS = "SELECT name FROM pragma_table_info('products')"
+# A barcode identifies one product; NULL SKUs are allowed any number of times
+SKU_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products(sku)"
+SQL_SKU_INDEX_UNIQUE = """
+SELECT "unique" FROM pragma_index_list('products') WHERE name = 'idx_products_sku'
+"""
+SQL_DROP_SKU_INDEX = "DROP INDEX idx_products_sku"
+# Databases from before SKUs were unique: the oldest product keeps a
+# duplicated SKU, the others lose it
+SQL_CLEAR_DUPLICATE_SKUS = """
+UPDATE products SET sku = NULL WHERE sku IS NOT NULL
+AND id NOT IN (SELECT MIN(id) FROM products WHERE sku IS NOT NULL GROUP BY sku)
+"""
+SQL_COUNT = "SELECT COUNT(*) FROM products"
+SQL_GET = "SELECT price, stock, sku FROM products WHERE name = ?"
+SQL_GET_BY_SKU = "SELECT name FROM products WHERE sku = ?"
+SQL_UPSERT = """
+INSERT INTO products (name, sku, price, stock, version) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(name) DO UPDATE SET
+    sku = COALESCE(excluded.sku, products.sku),
+    price = excluded.price,
+    stock = excluded.stock,
+    version = excluded.version
+"""
+# Replicas take names, SKUs and prices from the primary but keep their own
+# stock, which their sales change; the primary's stock only seeds new rows
+SQL_REPLICATE = """
+INSERT INTO products (name, sku, price, stock, version) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(name) DO UPDATE SET
+    sku = COALESCE(excluded.sku, products.sku),
+    price = excluded.price,
+    version = excluded.version
+RETURNING stock
+"""
+SQL_RELEASE_SKU = "UPDATE products SET sku = NULL WHERE sku = ? AND name != ?"
+SQL_UPDATE = "UPDATE products SET price = ?, stock = ?, version = ? WHERE name = ?"
+SQL_DELETE = "DELETE FROM products WHERE name = ?"
+SQL_REDUCE_STOCK = """
+UPDATE products SET stock = stock - ?, version = ? WHERE name = ? RETURNING stock
+"""
+SQL_TAKE_STOCK = """
+UPDATE products SET stock = stock - ?, version = ? WHERE name = ? AND stock >= ? RETURNING stock
+"""
+SQL_SET_STOCK = "UPDATE products SET stock = ?, version = ? WHERE name = ? RETURNING stock"
+SQL_ADD_TOMBSTONE = """
+INSERT INTO deleted_products (name, version) VALUES (?, ?)
+ON CONFLICT(name) DO UPDATE SET version = excluded.version
+"""
+SQL_NEXT_VERSIONS = """
+UPDATE meta SET value = value + ? WHERE key = 'catalog_version' RETURNING value
+"""
+SQL_CHANGES = """
+SELECT version, name, sku, price, stock FROM products WHERE version > ?
+ORDER BY version LIMIT ?
+"""
+SQL_DELETIONS = """
+SELECT version, name, NULL, NULL, NULL FROM deleted_products WHERE version > ?
+ORDER BY version LIMIT ?
+"""
+SQL_EXISTING = "SELECT name FROM products WHERE name IN ({})"
+SQL_NAMES_FOR_SKUS = "SELECT sku, name FROM products WHERE sku IN ({})"
+SQL_GET_META = "SELECT value FROM meta WHERE key = ?"
+SQL_SET_META = """
+INSERT INTO meta (key, value) VALUES (?, ?)
+ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+SQL_PAGE = "SELECT name, price, stock FROM products ORDER BY name LIMIT ? OFFSET ?"
+SQL_PAGE_AFTER = """
+SELECT name, price, stock FROM products WHERE name > ? ORDER BY name LIMIT ?
+"""
+SQL_NAMES_AFTER = "SELECT name FROM products WHERE name > ? ORDER BY name LIMIT ?"
+SQL_NAME_SKUS_AFTER = "SELECT name, sku FROM products WHERE name > ? ORDER BY name LIMIT ?"
+SQL_CATALOG_AFTER = """
+SELECT name, sku, price, stock FROM products WHERE name > ? ORDER BY name LIMIT ?
+"""
+
+
+# Kinds of ProductEvent
+PRODUCT_ADDED = "added"
+PRODUCT_UPDATED = "updated"
+PRODUCT_DELETED = "deleted"
+STOCK_CHANGED = "stock"
+
+
+def read_changes(conn, version, limit):
+    """ProductManager.changes_since() on any connection to a catalog database"""
+    current = conn.execute(SQL_GET_META, ("catalog_version",)).fetchone()[0]
+    changes = (conn.execute(SQL_CHANGES, (version, limit)).fetchall()
+               + conn.execute(SQL_DELETIONS, (version, limit)).fetchall())
+    changes.sort()
+    if len(changes) >= limit:
+        del changes[limit:]
+        current = changes[-1][0]
+    return current, changes
+
+
+class InsufficientStock(Exception):
+    """Raised inside a stock transaction to roll it back"""
+
+
+class Product:
+    """Catalog record for one product"""
+    __slots__ = ("name", "sku", "price", "stock")
+
+    def __init__(self, name, sku, price, stock):
+        self.name = name
+        self.sku = sku
+        self.price = price
+        self.stock = stock
+
+    def __repr__(self):
+        return f"Product({self.name!r}, sku={self.sku!r}, price={self.price}, stock={self.stock})"
+
+
+class ProductEvent:
+    """One catalog change delivered to ProductManager listeners.
+
+    Fields a change does not touch are None: STOCK_CHANGED only carries
+    the new stock, PRODUCT_DELETED only the name.
+    """
+    __slots__ = ("kind", "name", "sku", "price", "stock")
+
+    def __init__(self, kind, name, sku=None, price=None, stock=None):
+        self.kind = kind
+        self.name = name
+        self.sku = sku
+        self.price = price
+        self.stock = stock
+
+    def __repr__(self):
+        return f"ProductEvent({self.kind!r}, {self.name!r}, stock={self.stock})"
+
 
 class ProductManager:
-    def __init__(self):
-        self.products = {
-            "Apple": {"price": 15.00, "stock": 50},
-            "Banana": {"price": 10.00, "stock": 30},
-            "Bread": {"price": 45.99, "stock": 25},
-            "Eggs": {"price": 11.00, "stock": 40},
-            "Hotdog": {"price": 45.00, "stock": 42},
-            "Milk": {"price": 25.49, "stock": 20}
-        }
-    
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        # One connection shared by every caller, guarded by a lock so
+        # several terminals or worker threads can use the same manager
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Callables taking a list of ProductEvent, called after each change
+        self.listeners = []
+        # Optional write-ahead ledger of sales and stock changes
+        self.ledger = None
+        with self.lock, self.conn:
+            self.conn.executescript(SCHEMA)
+            self.conn.executescript(SUMMARY_SCHEMA)
+            if "version" not in {row[0] for row in self.conn.execute(SQL_COLUMNS)}:
+                self.conn.execute(SQL_ADD_VERSION)
+            self.conn.execute(VERSION_SCHEMA)
+            unique = self.conn.execute(SQL_SKU_INDEX_UNIQUE).fetchone()
+            if unique is not None and not unique[0]:
+                self.conn.execute(SQL_DROP_SKU_INDEX)
+                self.conn.execute(SQL_CLEAR_DUPLICATE_SKUS)
+            self.conn.execute(SKU_INDEX)
+            if self.conn.execute(SQL_COUNT).fetchone()[0] == 0:
+                first = self.next_versions(len(DEFAULT_PRODUCTS))
+                self.conn.executemany(SQL_UPSERT, [(*row, first + i)
+                                                   for i, row in enumerate(DEFAULT_PRODUCTS)])
+
+    def subscribe(self, listener):
+        """Call listener(events) with a list of ProductEvent after every
+        committed change (on the thread that made the change)"""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def emit(self, events):
+        if events:
+            for listener in list(self.listeners):
+                listener(events)
+
+    def attach_ledger(self, ledger):
+        """Log stock changes to a SalesLedger, first replaying any records
+        the catalog database has not applied yet"""
+        self.ledger = ledger
+        applied = self.ledger_seq()
+        for record in ledger.records_after(applied):
+            self.apply_ledger_record(record)
+        with ledger.cond:
+            ledger.next_seq = max(ledger.next_seq, self.ledger_seq() + 1)
+
+    def ledger_seq(self):
+        """Return the sequence number of the last ledger record applied"""
+        with self.lock:
+            row = self.conn.execute(SQL_GET_META, ("ledger_seq",)).fetchone()
+        return row[0] if row else 0
+
+    def log_change(self, record):
+        """Append a record to the ledger from inside an open transaction.
+
+        The applied sequence number is written in the same transaction,
+        so replay never applies a record twice.
+        """
+        if self.ledger is None:
+            return None
+        seq = self.ledger.append(record)
+        self.conn.execute(SQL_SET_META, ("ledger_seq", seq))
+        return seq
+
+    def finish_change(self, seq):
+        """Wait for a logged change to be durable, outside the catalog lock"""
+        if seq is None:
+            return
+        self.ledger.wait_durable(seq)
+        if self.ledger.needs_checkpoint():
+            self.checkpoint_ledger()
+
+    def sync_ledger(self):
+        """Wait until every change logged so far is durable, e.g. after
+        commit_stock(wait=False) on a thread that must not block"""
+        if self.ledger is None:
+            return
+        self.ledger.sync()
+        if self.ledger.needs_checkpoint():
+            self.checkpoint_ledger()
+
+    def apply_ledger_record(self, record):
+        """Replay one ledger record against the catalog"""
+        kind = record["type"]
+        events = []
+        with self.lock, self.conn:
+            version = self.next_versions(len(record["items"]))
+            if kind == "product":
+                existing = self.existing_names([item[0] for item in record["items"]])
+                for name, sku, price, stock in record["items"]:
+                    self.conn.execute(SQL_UPSERT, (name, sku, price, stock, version))
+                    events.append(ProductEvent(PRODUCT_UPDATED if name in existing
+                                               else PRODUCT_ADDED, name, sku, price, stock))
+                    version += 1
+            elif kind == "delete":
+                for name in record["items"]:
+                    if self.conn.execute(SQL_DELETE, (name,)).rowcount:
+                        self.conn.execute(SQL_ADD_TOMBSTONE, (name, version))
+                        events.append(ProductEvent(PRODUCT_DELETED, name))
+                    version += 1
+            else:
+                # "sale" subtracts, "stock" (older ledgers) sets the level
+                sql = SQL_REDUCE_STOCK if kind == "sale" else SQL_SET_STOCK
+                for name, quantity in record["items"]:
+                    for (stock,) in self.conn.execute(sql, (quantity, version, name)).fetchall():
+                        events.append(ProductEvent(STOCK_CHANGED, name, stock=stock))
+                    version += 1
+            if "lines" in record:
+                record_sale(self.conn, record["time"], record["lines"],
+                            record.get("tax_cents", 0))
+            self.conn.execute(SQL_SET_META, ("ledger_seq", record["seq"]))
+        self.emit(events)
+
+    def checkpoint_ledger(self):
+        """Make the catalog database durable and drop ledger segments it covers"""
+        with self.lock:
+            self.ledger.sync()
+            busy, _, _ = self.conn.execute("PRAGMA wal_checkpoint(FULL)").fetchone()
+            if busy:
+                # A reader kept the checkpoint from finishing, so the
+                # database may not hold every record yet; keep the ledger
+                self.ledger.postpone_checkpoint()
+                return False
+            self.ledger.truncate(self.ledger_seq())
+            return True
+
+    def next_versions(self, count=1):
+        """Reserve count catalog versions inside an open transaction and
+        return the first; every product row changed gets its own version"""
+        (last,), = self.conn.execute(SQL_NEXT_VERSIONS, (count,)).fetchall()
+        return last - count + 1
+
+    def catalog_version(self):
+        """Return the version of the latest change to the catalog"""
+        with self.lock:
+            return self.conn.execute(SQL_GET_META, ("catalog_version",)).fetchone()[0]
+
+    def changes_since(self, version, limit=1000):
+        """Return (version, changes) for the change feed.
+
+        changes holds up to limit (version, name, sku, price, stock)
+        tuples for products changed after version, in version order, with
+        price and stock None for deleted products. Each product appears
+        once, with its current values. The returned version is where the
+        next call should continue from.
+        """
+        with self.lock:
+            return read_changes(self.conn, version, limit)
+
+    def get_catalog_page_after(self, after="", limit=1000):
+        """Return up to limit (name, sku, price, stock) tuples with names after `after`"""
+        with self.lock:
+            return self.conn.execute(SQL_CATALOG_AFTER, (after, limit)).fetchall()
+
+    def replica_version(self):
+        """Return the peer version this catalog was last synced to, or
+        None if it has never been synced"""
+        with self.lock:
+            row = self.conn.execute(SQL_GET_META, ("replica_version",)).fetchone()
+        return row[0] if row else None
+
+    def apply_changes(self, changes, peer_version=None):
+        """Apply (version, name, sku, price, stock) tuples from a peer's
+        change feed in one transaction, recording peer_version as synced.
+
+        Names, SKUs, prices and deletes are copied; a SKU the peer gives
+        to a product is taken from any other local product that has it,
+        as the peer's SKUs are authoritative. Stock belongs to
+        this catalog, whose own sales change it: the peer's stock is only
+        used for products this catalog does not have yet.
+
+        Changes get new local versions, so this catalog's own feed can be
+        followed in turn.
+        """
+        events = []
+        with self.lock, self.conn:
+            existing = self.existing_names([change[1] for change in changes])
+            version = self.next_versions(len(changes))
+            for _, name, sku, price, stock in changes:
+                if price is None:
+                    if name in existing:
+                        self.conn.execute(SQL_DELETE, (name,))
+                        self.conn.execute(SQL_ADD_TOMBSTONE, (name, version))
+                        existing.discard(name)
+                        events.append(ProductEvent(PRODUCT_DELETED, name))
+                else:
+                    if sku is not None:
+                        self.conn.execute(SQL_RELEASE_SKU, (sku, name))
+                    (stock,), = self.conn.execute(SQL_REPLICATE,
+                                                  (name, sku, price, stock, version)).fetchall()
+                    kind = PRODUCT_UPDATED if name in existing else PRODUCT_ADDED
+                    existing.add(name)
+                    events.append(ProductEvent(kind, name, sku, price, stock))
+                version += 1
+            if peer_version is not None:
+                self.conn.execute(SQL_SET_META, ("replica_version", peer_version))
+        self.emit(events)
+        return len(events)
+
+    def close(self):
+        """Close the catalog database"""
+        with self.lock:
+            self.conn.close()
+
+    def count_products(self):
+        """Return the number of products in the catalog"""
+        with self.lock:
+            return self.conn.execute(SQL_COUNT).fetchone()[0]
+
+    def iter_rows(self, sql, batch_size):
+        """Yield rows of a keyset-paged query (name is the first column)"""
+        last = ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(sql, (last, batch_size)).fetchall()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
+
+    def iter_products(self, batch_size=1000):
+        """Yield (name, price, stock) tuples ordered by name, one batch at a time"""
+        return self.iter_rows(SQL_PAGE_AFTER, batch_size)
+
+    def iter_catalog(self, batch_size=1000):
+        """Yield (name, sku, price, stock) tuples ordered by name"""
+        return self.iter_rows(SQL_CATALOG_AFTER, batch_size)
+
+    def get_products_page(self, offset=0, limit=100):
+        """Return one page of (name, price, stock) tuples ordered by name"""
+        with self.lock:
+            return self.conn.execute(SQL_PAGE, (limit, offset)).fetchall()
+
+    @timed("catalog.page")
+    def get_products_page_after(self, after="", limit=100):
+        """Return up to limit (name, price, stock) tuples with names after `after`"""
+        with self.lock:
+            return self.conn.execute(SQL_PAGE_AFTER, (after, limit)).fetchall()
+
     def get_all_products(self):
         """Return all products as a list of tuples"""
-        return [(name, data["price"], data["stock"]) 
-                for name, data in self.products.items()]
-    
+        return list(self.iter_products())
+
+    @timed("catalog.get_product")
     def get_product(self, name):
         """Get a specific product by name"""
-        return self.products.get(name)
-    
-    def add_product(self, name, price, stock):
-        """Add a new product"""
-        self.products[name] = {"price": float(price), "stock": int(stock)}
-    
+        with self.lock:
+            row = self.conn.execute(SQL_GET, (name,)).fetchone()
+        if row is None:
+            return None
+        return Product(name, row[2], row[0], row[1])
+
+    @timed("catalog.find_by_sku")
+    def find_by_sku(self, sku):
+        """Return the product name for a SKU/barcode, or None"""
+        with self.lock:
+            row = self.conn.execute(SQL_GET_BY_SKU, (sku,)).fetchone()
+        return row[0] if row else None
+
+    def add_product(self, name, price, stock, sku=None):
+        """Add a new product, or replace one with the same name.
+
+        Raises sqlite3.IntegrityError if another product has the SKU.
+        """
+        with self.lock, self.conn:
+            existed = self.conn.execute(SQL_GET, (name,)).fetchone() is not None
+            self.conn.execute(SQL_UPSERT, (name, sku, float(price), int(stock),
+                                           self.next_versions()))
+            seq = self.log_change({"type": "product",
+                                   "items": [[name, sku, float(price), int(stock)]]})
+        self.finish_change(seq)
+        kind = PRODUCT_UPDATED if existed else PRODUCT_ADDED
+        self.emit([ProductEvent(kind, name, sku, float(price), int(stock))])
+
+    def upsert_products(self, rows):
+        """Add or update many (name, sku, price, stock) rows in one transaction.
+
+        Raises sqlite3.IntegrityError, and changes nothing, if a SKU
+        would belong to two products.
+        """
+        with self.lock, self.conn:
+            existing = self.existing_names([row[0] for row in rows])
+            first = self.next_versions(len(rows))
+            self.conn.executemany(SQL_UPSERT, [(*row, first + i) for i, row in enumerate(rows)])
+            seq = self.log_change({"type": "product", "items": [list(row) for row in rows]})
+        self.finish_change(seq)
+        self.emit([ProductEvent(PRODUCT_UPDATED if name in existing else PRODUCT_ADDED,
+                                name, sku, price, stock)
+                   for name, sku, price, stock in rows])
+
+    def existing_names(self, names, chunk_size=500):
+        """Return the subset of names already in the catalog"""
+        existing = set()
+        with self.lock:
+            for i in range(0, len(names), chunk_size):
+                chunk = names[i:i + chunk_size]
+                sql = SQL_EXISTING.format(",".join("?" * len(chunk)))
+                existing.update(row[0] for row in self.conn.execute(sql, chunk))
+        return existing
+
+    def names_for_skus(self, skus, chunk_size=500):
+        """Return {sku: product name} for the SKUs found in the catalog"""
+        found = {}
+        with self.lock:
+            for i in range(0, len(skus), chunk_size):
+                chunk = skus[i:i + chunk_size]
+                sql = SQL_NAMES_FOR_SKUS.format(",".join("?" * len(chunk)))
+                found.update(self.conn.execute(sql, chunk))
+        return found
+
     def update_product(self, name, price, stock):
         """Update existing product"""
-        if name in self.products:
-            self.products[name] = {"price": float(price), "stock": int(stock)}
-            return True
-        return False
-    
+        with self.lock, self.conn:
+            cur = self.conn.execute(SQL_UPDATE, (float(price), int(stock),
+                                                 self.next_versions(), name))
+            if cur.rowcount == 0:
+                return False
+            seq = self.log_change({"type": "product",
+                                   "items": [[name, None, float(price), int(stock)]]})
+        self.finish_change(seq)
+        self.emit([ProductEvent(PRODUCT_UPDATED, name, price=float(price), stock=int(stock))])
+        return True
+
     def delete_product(self, name):
         """Delete a product"""
-        if name in self.products:
-            del self.products[name]
-            return True
-        return False
-    
+        with self.lock, self.conn:
+            cur = self.conn.execute(SQL_DELETE, (name,))
+            if cur.rowcount == 0:
+                return False
+            # Tombstone, so replicas learn about the delete
+            self.conn.execute(SQL_ADD_TOMBSTONE, (name, self.next_versions()))
+            seq = self.log_change({"type": "delete", "items": [name]})
+        self.finish_change(seq)
+        self.emit([ProductEvent(PRODUCT_DELETED, name)])
+        return True
+
+    def iter_product_names(self, batch_size=1000):
+        """Yield product names ordered by name, one batch at a time"""
+        for row in self.iter_rows(SQL_NAMES_AFTER, batch_size):
+            yield row[0]
+
+    def iter_name_skus(self, batch_size=1000):
+        """Yield (name, sku) pairs ordered by name, one batch at a time"""
+        return self.iter_rows(SQL_NAME_SKUS_AFTER, batch_size)
+
     def get_product_names(self):
         """Return list of product names"""
-        return list(self.products.keys())
-    
+        return list(self.iter_product_names())
+
     def reduce_stock(self, name, quantity):
         """Reduce stock when item is purchased"""
-        if name in self.products:
-            self.products[name]["stock"] -= quantity
\ No newline at end of file
+        with self.lock, self.conn:
+            rows = self.conn.execute(SQL_REDUCE_STOCK,
+                                     (quantity, self.next_versions(), name)).fetchall()
+            if not rows:
+                return
+            seq = self.log_change({"type": "sale", "items": [[name, quantity]]})
+        self.finish_change(seq)
+        self.emit([ProductEvent(STOCK_CHANGED, name, stock=rows[0][0])])
+
+    @timed("catalog.commit_stock")
+    def commit_stock(self, items, details=None, wait=True):
+        """Reduce stock for several (name, quantity) pairs in one transaction.
+
+        Returns False and changes nothing if any product is missing or
+        short of stock. With a ledger attached the sale is logged, with
+        any extra details (e.g. prices), and True is only returned once
+        the record is durable; with wait=False it returns as soon as the
+        record is queued, and the caller waits with sync_ledger().
+
+        details with "time", "lines" and "tax_cents" (as sent by
+        POSFunctions.complete_purchase) also update the sales summaries.
+        """
+        items = list(items)
+        events = []
+        with self.lock:
+            try:
+                with self.conn:
+                    version = self.next_versions(len(items))
+                    for name, quantity in items:
+                        rows = self.conn.execute(SQL_TAKE_STOCK,
+                                                 (quantity, version, name, quantity)).fetchall()
+                        if not rows:
+                            raise InsufficientStock(name)
+                        events.append(ProductEvent(STOCK_CHANGED, name, stock=rows[0][0]))
+                        version += 1
+                    seq = self.log_change({"type": "sale",
+                                           "items": [list(item) for item in items],
+                                           **(details or {})})
+                    if details and "lines" in details:
+                        record_sale(self.conn, details["time"], details["lines"],
+                                    details.get("tax_cents", 0))
+            except InsufficientStock:
+                return False
+        if wait:
+            self.finish_change(seq)
+        self.emit(events)
+        return True
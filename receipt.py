@@ -0,0 +1,140 @@
+"""
+Receipt module - Receipt snapshots and renderers (no Tk required)
+"""
+import json
+from datetime import datetime
+
+from pricing import TAX_RATE, from_cents
+
+RECEIPT_WIDTH = 45
+
+# ESC/POS control sequences
+ESC_INIT = b"\x1b@"
+ESC_BOLD_ON = b"\x1bE\x01"
+ESC_BOLD_OFF = b"\x1bE\x00"
+ESC_ALIGN_CENTER = b"\x1ba\x01"
+ESC_ALIGN_LEFT = b"\x1ba\x00"
+ESC_FEED_AND_CUT = b"\n\n\n\x1dV\x00"
+
+
+class Receipt:
+    """Snapshot of a finished sale, independent of the live cart"""
+    __slots__ = ("date", "lines", "subtotal", "tax", "grand_total", "tax_rate", "discounts")
+
+    def __init__(self, date, lines, subtotal, tax, grand_total, tax_rate=TAX_RATE,
+                 discounts=()):
+        self.date = date
+        self.lines = lines  # list of (product, quantity, price, total)
+        self.subtotal = subtotal
+        self.tax = tax
+        self.grand_total = grand_total
+        self.tax_rate = tax_rate  # None when products were taxed at different rates
+        self.discounts = discounts  # list of (description, amount)
+
+    @classmethod
+    def from_cart(cls, pos_functions, date=None, priced=None):
+        """Take a snapshot of the cart in a POSFunctions instance, priced
+        at date, or as already priced by pos_functions.price_cart()"""
+        if priced is None:
+            priced = pos_functions.price_cart(date or datetime.now())
+        date = priced.time
+        lines = [(item.product, item.quantity, item.price, item.total)
+                 for item in pos_functions.get_cart_items()]
+        discounts = [(description, from_cents(cents)) for description, cents in priced.discounts]
+        return cls(date, lines, from_cents(priced.subtotal_cents), from_cents(priced.tax_cents),
+                   from_cents(priced.total_cents), priced.tax_rate, discounts)
+
+    def to_dict(self):
+        return {
+            "date": self.date.isoformat(timespec="seconds"),
+            "lines": [{"product": product, "quantity": quantity,
+                       "price": str(price), "total": str(total)}
+                      for product, quantity, price, total in self.lines],
+            "subtotal": str(self.subtotal),
+            "discounts": [{"description": description, "amount": str(amount)}
+                          for description, amount in self.discounts],
+            "tax": str(self.tax),
+            "tax_rate": None if self.tax_rate is None else str(self.tax_rate),
+            "grand_total": str(self.grand_total),
+        }
+
+
+class ReceiptTemplate:
+    """Receipt layout compiled once into constant strings and bound
+    format methods, so rendering is a single join over precomputed parts"""
+
+    def __init__(self, title="POS SYSTEM RECEIPT", currency="₱", width=RECEIPT_WIDTH,
+                 footer=("Thank you for your purchase!", "Please come again!")):
+        double = "=" * width + "\n"
+        single = "-" * width + "\n"
+        c = currency
+
+        self.header = f"{double} {title}\n{double}"
+        self.date_line = "Date: {:%Y-%m-%d %H:%M:%S}\n".format
+        self.columns = (f"{double}\n"
+                        f"{'Item':<20} {'Qty':<5} {'Price':<10} {'Total':<10}\n"
+                        f"{single}")
+        self.item_line = f"{{:<20}} {{:<5}} {c}{{:<9.2f}} {c}{{:<9.2f}}\n".format
+        self.subtotal = (f"{single}"
+                         f"\n{'Subtotal:':<35} {c}{{:>8.2f}}\n").format
+        self.discount_line = f"{{:<34.34}} -{c}{{:>8.2f}}\n".format
+        self.totals = (f"{{:<35}} {c}{{:>8.2f}}\n"
+                       f"{double}"
+                       f"{'GRAND TOTAL:':<35} {c}{{:>8.2f}}\n"
+                       f"{double}\n").format
+        self.footer = "".join(f" {line}\n" for line in footer) + double
+
+
+class ReceiptRenderer:
+    """Renders Receipt snapshots as plain text, ESC/POS bytes or JSON"""
+
+    def __init__(self, template=None, printer_encoding="cp437"):
+        self.template = template or ReceiptTemplate()
+        self.printer_encoding = printer_encoding
+
+    def render_parts(self, receipt):
+        t = self.template
+        item_line = t.item_line
+        if receipt.tax_rate is None:
+            tax_label = "Tax (various rates):"
+        else:
+            tax_label = f"Tax ({(receipt.tax_rate * 100).normalize():f}%):"
+        return [
+            t.header,
+            t.date_line(receipt.date),
+            t.columns,
+            *[item_line(*line) for line in receipt.lines],
+            t.subtotal(receipt.subtotal),
+            *[t.discount_line(*discount) for discount in receipt.discounts],
+            t.totals(tax_label, receipt.tax, receipt.grand_total),
+            t.footer,
+        ]
+
+    def render_text(self, receipt):
+        """Render the receipt as plain text"""
+        return "".join(self.render_parts(receipt))
+
+    def render_escpos(self, receipt):
+        """Render the receipt as ESC/POS bytes for a thermal printer"""
+        parts = self.render_parts(receipt)
+        # Most printer code pages have no peso sign
+        encode = lambda text: text.replace("₱", "P").encode(self.printer_encoding, "replace")
+        return b"".join([
+            ESC_INIT,
+            ESC_ALIGN_CENTER, ESC_BOLD_ON, encode(parts[0]), ESC_BOLD_OFF, ESC_ALIGN_LEFT,
+            encode("".join(parts[1:])),
+            ESC_FEED_AND_CUT,
+        ])
+
+    def render_json(self, receipt):
+        """Render the receipt as a JSON document"""
+        return json.dumps(receipt.to_dict(), ensure_ascii=False)
+
+    def render(self, receipt, fmt="text"):
+        if fmt == "text":
+            return self.render_text(receipt)
+        if fmt == "escpos":
+            return self.render_escpos(receipt)
+        if fmt == "json":
+            return self.render_json(receipt)
+        raise ValueError(f"Unknown receipt format: {fmt}")
@@ -0,0 +1,273 @@
+"""
+Receipt history module - Indexed search over past receipts
+
+Every receipt in the journals under receipts/ (the POS window's
+receipts/journal, the checkout server's receipts/server-journal, ...)
+and every old receipts/receipt_*.txt file gets one row in receipts/history.db with its time, grand total and
+a short item list, plus one row per product word in receipt_tokens.
+Queries such as "receipts containing Milk between two dates over ₱500"
+are answered from those indexes without reading any receipt text; the
+text is only read back, with a single seek, to reprint a receipt.
+
+The index is kept current by refresh(), which parses only journal
+records after each journal's watermark. ReceiptWriter calls it after
+every batch it saves, and receipts written by other processes (e.g.
+the checkout server, into its own journal) are picked up by the next
+refresh.
+
+    python receipt_history.py [--product Milk] [--from 2024-01-01]
+                              [--to 2024-01-31] [--min 500]
+"""
+import argparse
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from analytics import LEGACY_FILE, EPOCH, parse_receipt, to_seconds
+from pricing import from_cents, to_cents
+from receipt_journal import find_journals, read_records
+
+# Bumped when the schema changes; the index is rebuilt from the receipts
+HISTORY_VERSION = 2
+HISTORY_DROP = """
+DROP TABLE IF EXISTS receipts;
+DROP TABLE IF EXISTS receipt_tokens;
+DROP TABLE IF EXISTS history_meta;
+"""
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipts (
+    id INTEGER PRIMARY KEY,
+    journal TEXT,
+    txn INTEGER,
+    file TEXT UNIQUE,
+    time INTEGER NOT NULL,
+    total_cents INTEGER NOT NULL,
+    items TEXT NOT NULL,
+    UNIQUE (journal, txn)
+);
+CREATE INDEX IF NOT EXISTS idx_receipts_time ON receipts(time);
+CREATE TABLE IF NOT EXISTS receipt_tokens (
+    token TEXT NOT NULL,
+    receipt_id INTEGER NOT NULL,
+    PRIMARY KEY (token, receipt_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+SQL_ADD_RECEIPT = """
+INSERT OR IGNORE INTO receipts (journal, txn, file, time, total_cents, items)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+SQL_ADD_TOKEN = "INSERT OR IGNORE INTO receipt_tokens (token, receipt_id) VALUES (?, ?)"
+SQL_GET_META = "SELECT value FROM history_meta WHERE key = ?"
+SQL_SET_META = """
+INSERT INTO history_meta (key, value) VALUES (?, ?)
+ON CONFLICT(key) DO UPDATE SET value = excluded.value
+"""
+SQL_FILES = "SELECT file FROM receipts WHERE file IS NOT NULL"
+SQL_COUNT = "SELECT COUNT(*) FROM receipts"
+# search() joins these into one query, adding only the filters it needs
+SQL_SEARCH = "SELECT id, journal, txn, file, time, total_cents, items FROM receipts WHERE 1"
+SQL_FILTER_START = " AND time >= ?"
+SQL_FILTER_END = " AND time < ?"
+SQL_FILTER_MIN = " AND total_cents >= ?"
+SQL_FILTER_MAX = " AND total_cents <= ?"
+SQL_FILTER_TOKEN = """
+ AND id IN (SELECT receipt_id FROM receipt_tokens WHERE token >= ? AND token < ?)"""
+SQL_SEARCH_ORDER = " ORDER BY time DESC, id DESC LIMIT ?"
+
+# Length of the item list stored for display
+ITEMS_WIDTH = 80
+WORD = re.compile(r"\w+")
+
+
+def tokens(text):
+    """Lowercased words of a product name or query"""
+    return set(WORD.findall(text.lower()))
+
+
+class HistoryEntry:
+    """One indexed receipt; journal and txn are set for journal receipts,
+    file for old files"""
+    __slots__ = ("id", "journal", "txn", "file", "time", "total_cents", "items")
+
+    def __init__(self, id, journal, txn, file, time, total_cents, items):
+        self.id = id
+        self.journal = journal
+        self.txn = txn
+        self.file = file
+        self.time = EPOCH + timedelta(seconds=time)
+        self.total_cents = total_cents
+        self.items = items
+
+    @property
+    def total(self):
+        return from_cents(self.total_cents)
+
+    def __repr__(self):
+        return f"HistoryEntry({self.txn or self.file!r}, {self.time}, {self.total})"
+
+
+class ReceiptHistory:
+    """SQLite index of receipt times, totals and product words"""
+
+    def __init__(self, receipts_dir="receipts", journal_dirs=None, db_path=None):
+        self.receipts_dir = receipts_dir
+        # None: every journal found under receipts_dir at each refresh
+        self.journal_dirs = journal_dirs
+        os.makedirs(receipts_dir, exist_ok=True)
+        # Written by the receipt writer thread, queried from the UI thread
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path or os.path.join(receipts_dir, "history.db"),
+                                    check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.lock, self.conn:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < HISTORY_VERSION:
+                self.conn.executescript(HISTORY_DROP)
+            self.conn.executescript(HISTORY_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {HISTORY_VERSION}")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute(SQL_COUNT).fetchone()[0]
+
+    def journal_key(self, journal_dir):
+        """Name a journal is stored under: its path relative to receipts_dir"""
+        return os.path.relpath(journal_dir, self.receipts_dir)
+
+    def journal_path(self, key):
+        return os.path.join(self.receipts_dir, key)
+
+    def journal_txn(self, key):
+        """Return the last transaction indexed from a journal"""
+        row = self.conn.execute(SQL_GET_META, (f"journal_txn:{key}",)).fetchone()
+        return row[0] if row else 0
+
+    def add(self, text, journal=None, txn=None, file=None):
+        """Index one receipt's text; call inside a transaction"""
+        parsed = parse_receipt(text)
+        if parsed is None:
+            return False
+        date, lines, tax_cents = parsed
+        total_cents = sum(amount for _, _, amount in lines) + tax_cents
+        products = [product for product, quantity, _ in lines if quantity]
+        items = ", ".join(products)
+        if len(items) > ITEMS_WIDTH:
+            items = items[:ITEMS_WIDTH - 3] + "..."
+        cursor = self.conn.execute(SQL_ADD_RECEIPT,
+                                   (journal, txn, file, to_seconds(date), total_cents, items))
+        if not cursor.rowcount:
+            return False  # already indexed
+        receipt_id = cursor.lastrowid
+        words = set()
+        for product in products:
+            words |= tokens(product)
+        self.conn.executemany(SQL_ADD_TOKEN, [(word, receipt_id) for word in words])
+        return True
+
+    def refresh(self, legacy=False):
+        """Index journal receipts written since the last refresh (and, with
+        legacy=True, any receipt_*.txt files not seen yet); returns how many"""
+        added = 0
+        journal_dirs = self.journal_dirs
+        if journal_dirs is None:
+            journal_dirs = find_journals(self.receipts_dir)
+        with self.lock, self.conn:
+            for journal_dir in journal_dirs:
+                key = self.journal_key(journal_dir)
+                txn = self.journal_txn(key)
+                for record in read_records(journal_dir, txn + 1):
+                    added += self.add(record["text"], journal=key, txn=record["txn"])
+                    txn = record["txn"]
+                self.conn.execute(SQL_SET_META, (f"journal_txn:{key}", txn))
+
+            if legacy and os.path.isdir(self.receipts_dir):
+                seen = {row[0] for row in self.conn.execute(SQL_FILES)}
+                for name in sorted(os.listdir(self.receipts_dir)):
+                    if LEGACY_FILE.match(name) and name not in seen:
+                        with open(os.path.join(self.receipts_dir, name), encoding="utf-8") as f:
+                            added += self.add(f.read(), file=name)
+        return added
+
+    def search(self, product=None, start=None, end=None, min_cents=None, max_cents=None,
+               limit=200):
+        """Return the newest HistoryEntry rows matching every given filter.
+
+        product matches receipts with a product word starting with each
+        word of the query ("mil" finds Milk); start <= time < end are
+        datetimes; min_cents/max_cents bound the grand total.
+        """
+        sql = [SQL_SEARCH]
+        params = []
+        if start is not None:
+            sql.append(SQL_FILTER_START)
+            params.append(to_seconds(start))
+        if end is not None:
+            sql.append(SQL_FILTER_END)
+            params.append(to_seconds(end))
+        if min_cents is not None:
+            sql.append(SQL_FILTER_MIN)
+            params.append(min_cents)
+        if max_cents is not None:
+            sql.append(SQL_FILTER_MAX)
+            params.append(max_cents)
+        for word in tokens(product or ""):
+            sql.append(SQL_FILTER_TOKEN)
+            params += (word, word + "\uffff")
+        sql.append(SQL_SEARCH_ORDER)
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute("".join(sql), params).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def read_text(self, entry):
+        """Return the receipt text for a HistoryEntry"""
+        if entry.file:
+            with open(os.path.join(self.receipts_dir, entry.file), encoding="utf-8") as f:
+                return f.read()
+        for record in read_records(self.journal_path(entry.journal), entry.txn):
+            if record["txn"] == entry.txn:
+                return record["text"]
+            break
+        raise KeyError(entry.txn)
+
+
+def parse_day(text):
+    return datetime.strptime(text, "%Y-%m-%d")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search receipt history")
+    parser.add_argument("--receipts", default="receipts")
+    parser.add_argument("--product", help="words of a product name")
+    parser.add_argument("--from", dest="start", type=parse_day, help="first day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", type=parse_day, help="last day, YYYY-MM-DD")
+    parser.add_argument("--min", dest="min_total", help="smallest grand total")
+    parser.add_argument("--max", dest="max_total", help="largest grand total")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    history = ReceiptHistory(args.receipts)
+    added = history.refresh(legacy=True)
+    print(f"{history.count()} receipts indexed ({added} new)")
+    entries = history.search(
+        args.product, args.start, args.end and args.end + timedelta(days=1),
+        args.min_total and to_cents(args.min_total), args.max_total and to_cents(args.max_total),
+        args.limit)
+    for entry in entries:
+        print(f"{entry.txn or entry.file!s:>10}  {entry.time:%Y-%m-%d %H:%M:%S}  "
+              f"₱{entry.total:>10,.2f}  {entry.items}")
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Receipt journal module - Append-only storage for receipts
+"""
+import json
+import os
+import struct
+import threading
+from datetime import datetime
+
+from dirlock import lock_directory
+
+# Index entry for each transaction id: (segment number, byte offset).
+# Entries are fixed size, so transaction N lives at (N - 1) * INDEX_ENTRY.size
+INDEX_ENTRY = struct.Struct("<IQ")
+
+
+def read_records(directory, start_txn=1):
+    """Yield journal records from start_txn on without opening the journal
+    for writing, e.g. from a reporting process while the POS is running"""
+    index_path = os.path.join(directory, "index.bin")
+    if not os.path.exists(index_path):
+        return
+    with open(index_path, "rb") as index:
+        index.seek((start_txn - 1) * INDEX_ENTRY.size)
+        data = index.read(INDEX_ENTRY.size)
+    if len(data) < INDEX_ENTRY.size:
+        return
+    segment_number, offset = INDEX_ENTRY.unpack(data)
+    while True:
+        path = os.path.join(directory, f"segment-{segment_number:06d}.jsonl")
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return  # still being written
+                yield json.loads(line)
+        segment_number += 1
+        offset = 0
+
+
+def find_journals(receipts_dir):
+    """Return the journal directories directly under receipts_dir, e.g.
+    the POS window's journal and the checkout server's"""
+    if not os.path.isdir(receipts_dir):
+        return []
+    return [os.path.join(receipts_dir, name) for name in sorted(os.listdir(receipts_dir))
+            if os.path.exists(os.path.join(receipts_dir, name, "index.bin"))]
+
+
+class ReceiptJournal:
+    """Append-only, segment-rotated receipt log.
+
+    Each receipt is one JSON line {"txn", "time", "text"} in a segment
+    file (segment-000001.jsonl, ...). Transaction ids are monotonic and
+    never reused, and index.bin maps every id to its segment and offset,
+    so reading or exporting one receipt is a single seek. A new segment
+    is started once the active one reaches segment_size bytes.
+
+    append() only buffers the write; call sync() to make everything
+    appended so far durable (the receipt writer does this once per batch).
+    """
+
+    def __init__(self, directory=os.path.join("receipts", "journal"),
+                 segment_size=16 * 1024 * 1024):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        # Taken before recover(), which may truncate a torn record
+        self.lock_file = lock_directory(directory)
+
+        self.index_path = os.path.join(directory, "index.bin")
+        self.index = open(self.index_path, "a+b")
+        self.recover()
+
+    def segment_path(self, number):
+        return os.path.join(self.directory, f"segment-{number:06d}.jsonl")
+
+    def recover(self):
+        """Open the active segment and index any records written after
+        the last index entry (e.g. after a crash between the two writes)"""
+        # Drop a partially written index entry
+        size = os.path.getsize(self.index_path)
+        if size % INDEX_ENTRY.size:
+            self.index.truncate(size - size % INDEX_ENTRY.size)
+        count = os.path.getsize(self.index_path) // INDEX_ENTRY.size
+
+        segments = sorted(int(name[8:14]) for name in os.listdir(self.directory)
+                          if name.startswith("segment-") and name.endswith(".jsonl"))
+        self.segment_number = segments[-1] if segments else 1
+        self.segment = open(self.segment_path(self.segment_number), "a+b")
+
+        start = 0
+        if count:
+            segment_number, offset = self.read_index_entry(count)
+            if segment_number == self.segment_number:
+                self.segment.seek(offset)
+                start = offset + len(self.segment.readline())
+
+        self.segment.seek(start)
+        offset = start
+        for line in self.segment:
+            if not line.endswith(b"\n"):
+                # Torn final record: never acknowledged, drop it
+                self.segment.truncate(offset)
+                break
+            count += 1
+            self.index.write(INDEX_ENTRY.pack(self.segment_number, offset))
+            offset += len(line)
+        self.segment.seek(0, os.SEEK_END)
+        self.index.flush()
+        self.next_txn = count + 1
+
+    def read_index_entry(self, txn_id):
+        self.index.seek((txn_id - 1) * INDEX_ENTRY.size)
+        data = self.index.read(INDEX_ENTRY.size)
+        self.index.seek(0, os.SEEK_END)
+        if len(data) < INDEX_ENTRY.size:
+            raise KeyError(txn_id)
+        return INDEX_ENTRY.unpack(data)
+
+    def append(self, receipt_text, timestamp=None):
+        """Append a receipt and return its transaction id"""
+        timestamp = timestamp or datetime.now()
+        with self.lock:
+            if self.segment.tell() >= self.segment_size:
+                self.rotate()
+            txn_id = self.next_txn
+            record = {"txn": txn_id, "time": timestamp.isoformat(timespec="seconds"),
+                      "text": receipt_text}
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            offset = self.segment.tell()
+            self.segment.write(line)
+            self.index.write(INDEX_ENTRY.pack(self.segment_number, offset))
+            self.next_txn += 1
+            return txn_id
+
+    def rotate(self):
+        """Close the active segment and start a new one"""
+        self.sync()
+        self.segment.close()
+        self.segment_number += 1
+        self.segment = open(self.segment_path(self.segment_number), "a+b")
+
+    def sync(self):
+        """Flush and fsync everything appended so far"""
+        with self.lock:
+            self.segment.flush()
+            os.fsync(self.segment.fileno())
+            self.index.flush()
+            os.fsync(self.index.fileno())
+
+    def read(self, txn_id):
+        """Return the record for a transaction id"""
+        with self.lock:
+            if not 1 <= txn_id < self.next_txn:
+                raise KeyError(txn_id)
+            segment_number, offset = self.read_index_entry(txn_id)
+            if segment_number == self.segment_number:
+                self.segment.flush()
+        with open(self.segment_path(segment_number), "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def iter_records(self, start_txn=1):
+        """Yield records in transaction order starting at start_txn"""
+        with self.lock:
+            end = self.next_txn
+            self.segment.flush()
+        if start_txn >= end:
+            return
+        segment_number, offset = self.read_index_entry(start_txn)
+        txn_id = start_txn
+        while txn_id < end:
+            with open(self.segment_path(segment_number), "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if txn_id >= end:
+                        return
+                    yield json.loads(line)
+                    txn_id += 1
+            segment_number += 1
+            offset = 0
+
+    def export_text(self, txn_id, directory="receipts"):
+        """Write a receipt out as a plain text file and return its path"""
+        record = self.read(txn_id)
+        os.makedirs(directory, exist_ok=True)
+        filename = f"{directory}/receipt_{txn_id:08d}.txt"
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(record["text"])
+        return filename
+
+    def close(self):
+        with self.lock:
+            self.sync()
+            self.segment.close()
+            self.index.close()
+            self.lock_file.close()
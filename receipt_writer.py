@@ -0,0 +1,156 @@
+"""
+Receipt writer module - Saves receipts on a background thread
+"""
+import queue
+import sqlite3
+import threading
+
+from instrumentation import timed
+from receipt_journal import ReceiptJournal
+
+
+class ReceiptJob:
+    """Handle for a queued receipt; txn_id is set once it is journaled"""
+    __slots__ = ("receipt_text", "callback", "txn_id")
+
+    def __init__(self, receipt_text, callback):
+        self.receipt_text = receipt_text
+        self.callback = callback
+        self.txn_id = None
+
+
+class ExportJob:
+    """Request to export a journaled receipt as a text file"""
+    __slots__ = ("receipt", "callback")
+
+    def __init__(self, receipt, callback):
+        self.receipt = receipt
+        self.callback = callback
+
+
+class ReceiptWriter:
+    """Writes receipts to the receipt journal off the UI thread.
+
+    Receipts are queued with submit() and appended by a worker thread in
+    batches with a single fsync per batch. Completed saves are handed
+    back through drain_completed(), which the UI calls from its own
+    thread (POSWindow polls it with after()).
+
+    With a ReceiptHistory, each saved batch is also added to the
+    history index.
+    """
+
+    def __init__(self, journal=None, export_dir="receipts", batch_size=32, batch_delay=0.05,
+                 history=None):
+        self.journal = journal or ReceiptJournal()
+        self.history = history
+        self.export_dir = export_dir
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.jobs = queue.Queue()
+        self.completed = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="receipt-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, receipt_text, callback=None):
+        """Queue a receipt for saving and return its ReceiptJob.
+
+        callback(txn_id, error) is called from drain_completed() once
+        the receipt is durable in the journal, or failed to save.
+        """
+        if self.closed:
+            raise RuntimeError("Receipt writer is closed")
+        job = ReceiptJob(receipt_text, callback)
+        self.jobs.put(job)
+        return job
+
+    def export(self, receipt, callback=None):
+        """Queue a text export of a submitted receipt.
+
+        Jobs run in order, so the receipt is journaled before it is
+        exported. callback(filename, error) is called from drain_completed().
+        """
+        if self.closed:
+            raise RuntimeError("Receipt writer is closed")
+        self.jobs.put(ExportJob(receipt, callback))
+
+    def drain_completed(self):
+        """Run callbacks for finished jobs; call this from the UI thread"""
+        while True:
+            try:
+                callback, result, error = self.completed.get_nowait()
+            except queue.Empty:
+                return
+            if callback:
+                callback(result, error)
+
+    def close(self):
+        """Flush every queued receipt to disk and stop the worker"""
+        if not self.closed:
+            self.closed = True
+            self.jobs.put(None)
+            self.thread.join()
+            self.journal.close()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            batch = [job]
+            # Collect whatever else arrives shortly after, up to batch_size
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    job = self.jobs.get(timeout=self.batch_delay)
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+            self.write_batch(batch)
+            if stop:
+                return
+
+    @timed("receipt.write_batch")
+    def write_batch(self, batch):
+        appended = []
+        for job in batch:
+            if isinstance(job, ExportJob):
+                self.export_receipt(job)
+                continue
+            try:
+                job.txn_id = self.journal.append(job.receipt_text)
+                appended.append(job)
+            except OSError as e:
+                self.completed.put((job.callback, None, e))
+
+        if not appended:
+            return
+        # One fsync makes the whole batch durable
+        try:
+            self.journal.sync()
+        except OSError as e:
+            for job in appended:
+                self.completed.put((job.callback, None, e))
+            return
+        for job in appended:
+            self.completed.put((job.callback, job.txn_id, None))
+        if self.history:
+            # The receipts are already safe in the journal; anything not
+            # indexed here is picked up by the next refresh
+            try:
+                self.history.refresh()
+            except (OSError, sqlite3.Error):
+                pass
+
+    def export_receipt(self, job):
+        try:
+            if job.receipt.txn_id is None:
+                raise OSError("Receipt was not saved")
+            filename = self.journal.export_text(job.receipt.txn_id, self.export_dir)
+            self.completed.put((job.callback, filename, None))
+        except (OSError, KeyError) as e:
+            self.completed.put((job.callback, None, e))
@@ -0,0 +1,121 @@
+"""
+Reorder module - Low-stock and reorder-point alerts driven by stock events
+"""
+import heapq
+import threading
+
+from products import PRODUCT_ADDED, PRODUCT_DELETED, PRODUCT_UPDATED, STOCK_CHANGED
+
+REORDER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reorder_points (
+    name TEXT PRIMARY KEY,
+    threshold INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+SQL_GET_POINTS = "SELECT name, threshold FROM reorder_points"
+SQL_SET_POINT = """
+INSERT INTO reorder_points (name, threshold) VALUES (?, ?)
+ON CONFLICT(name) DO UPDATE SET threshold = excluded.threshold
+"""
+
+
+class ReorderEngine:
+    """Tracks how far each product is above its reorder point.
+
+    A min-heap holds (stock - threshold, name), so the products needing
+    reordering are always at the top and needs_reorder() touches only
+    those. Heap entries are never updated in place: a change pushes a new
+    entry and outdated ones are skipped (and dropped) when they surface.
+
+    Subscribe handle_events to the ProductManager; build() loads the
+    catalog once. Listeners added with subscribe() are called with
+    (name, stock, threshold) when a product drops to its reorder point.
+    """
+
+    def __init__(self, product_manager, default_threshold=5):
+        self.product_manager = product_manager
+        self.default_threshold = default_threshold
+        with product_manager.lock, product_manager.conn:
+            product_manager.conn.executescript(REORDER_SCHEMA)
+            self.thresholds = dict(product_manager.conn.execute(SQL_GET_POINTS))
+        self.stock = {}  # name -> current stock
+        self.margins = {}  # name -> stock - threshold
+        self.heap = []
+        self.listeners = []
+        # Events arrive on whichever thread changed the catalog
+        self.lock = threading.RLock()
+
+    def build(self):
+        """Load stock levels for the whole catalog"""
+        for name, _, stock in self.product_manager.iter_products():
+            self.stock[name] = stock
+            self.margins[name] = stock - self.threshold(name)
+        self.heap = [(margin, name) for name, margin in self.margins.items()]
+        heapq.heapify(self.heap)
+        return self
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def threshold(self, name):
+        return self.thresholds.get(name, self.default_threshold)
+
+    def set_threshold(self, name, threshold):
+        """Set and persist a product's reorder point"""
+        pm = self.product_manager
+        with pm.lock, pm.conn:
+            pm.conn.execute(SQL_SET_POINT, (name, int(threshold)))
+        with self.lock:
+            self.thresholds[name] = int(threshold)
+            if name in self.stock:
+                self.update(name, self.stock[name])
+
+    def update(self, name, stock):
+        """Record a product's new stock level"""
+        threshold = self.threshold(name)
+        margin = stock - threshold
+        old = self.margins.get(name)
+        self.stock[name] = stock
+        if old == margin:
+            return
+        self.margins[name] = margin
+        heapq.heappush(self.heap, (margin, name))
+        if len(self.heap) > 2 * len(self.margins) + 64:
+            self.compact()
+        if margin <= 0 and (old is None or old > 0):
+            for listener in list(self.listeners):
+                listener(name, stock, threshold)
+
+    def remove(self, name):
+        self.stock.pop(name, None)
+        self.margins.pop(name, None)
+
+    def compact(self):
+        """Rebuild the heap without outdated entries"""
+        self.heap = [(margin, name) for name, margin in self.margins.items()]
+        heapq.heapify(self.heap)
+
+    def handle_events(self, events):
+        """ProductManager listener: follow stock changes"""
+        with self.lock:
+            for event in events:
+                if event.kind == PRODUCT_DELETED:
+                    self.remove(event.name)
+                elif event.kind in (PRODUCT_ADDED, PRODUCT_UPDATED, STOCK_CHANGED):
+                    self.update(event.name, event.stock)
+
+    def needs_reorder(self, limit=None):
+        """Return [(name, stock, threshold)] at or below their reorder
+        point, most urgent first"""
+        with self.lock:
+            found = []
+            seen = set()
+            while self.heap and self.heap[0][0] <= 0 and (limit is None or len(found) < limit):
+                margin, name = heapq.heappop(self.heap)
+                if self.margins.get(name) != margin or name in seen:
+                    continue  # outdated or duplicate entry
+                seen.add(name)
+                found.append((margin, name))
+            for entry in found:
+                heapq.heappush(self.heap, entry)
+            return [(name, self.stock[name], self.threshold(name)) for _, name in found]
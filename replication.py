@@ -0,0 +1,247 @@
+"""
+Replication module - Keep a terminal's catalog in step with a primary
+
+Every change to a ProductManager's catalog gets a new, increasing
+version (see ProductManager.changes_since). A ReplicaClient remembers
+the last version of its primary it has applied and pulls only products
+changed since then, so a price edit on the primary reaches every
+terminal in one small request. A new replica starts with a snapshot of
+the whole catalog, paged by name, then follows the change feed from the
+version the snapshot started at.
+
+The primary is reached through a peer:
+    HTTPPeer       the checkout server (server.py) over TCP or a Unix socket
+    LocalPeer      another ProductManager in the same process
+    DatabasePeer   the primary terminal's products.db in a shared
+                   directory, opened read-only
+
+Replicas follow one primary for names, SKUs and prices: edits should be
+made there, since a later change to the same product on the primary
+overwrites a local edit. Stock is not replicated: each terminal sells
+from its own stock, so a replica only takes the primary's stock level
+for products it does not have yet.
+"""
+import http.client
+import json
+import os
+import socket
+import sqlite3
+import threading
+from urllib.parse import quote
+
+from products import SQL_CATALOG_AFTER, SQL_GET_META, read_changes
+
+
+class LocalPeer:
+    """Primary reached directly through its ProductManager"""
+
+    def __init__(self, product_manager):
+        self.product_manager = product_manager
+
+    def changes(self, since, limit):
+        return self.product_manager.changes_since(since, limit)
+
+    def snapshot(self, after, limit):
+        """Return (version, [(name, sku, price, stock)]) for one page"""
+        pm = self.product_manager
+        with pm.lock:
+            return pm.catalog_version(), pm.get_catalog_page_after(after, limit)
+
+    def close(self):
+        self.product_manager.close()
+
+
+class DatabasePeer:
+    """Primary's catalog database read directly, e.g. over a shared directory.
+
+    The file is opened read-only: the replica never creates, migrates or
+    seeds the primary's database, and a missing file is an error rather
+    than a new empty catalog.
+    """
+
+    def __init__(self, path):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Primary catalog not found: {path}")
+        uri = "file:" + quote(os.path.abspath(path)) + "?mode=ro"
+        self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self.lock = threading.Lock()
+
+    def read(self, func, *args):
+        """Run func(conn, *args) in one read transaction, so its queries
+        see the same version of the catalog"""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                return func(self.conn, *args)
+            finally:
+                self.conn.rollback()
+
+    def changes(self, since, limit):
+        return self.read(read_changes, since, limit)
+
+    def snapshot(self, after, limit):
+        """Return (version, [(name, sku, price, stock)]) for one page"""
+        def page(conn):
+            version = conn.execute(SQL_GET_META, ("catalog_version",)).fetchone()[0]
+            return version, conn.execute(SQL_CATALOG_AFTER, (after, limit)).fetchall()
+        return self.read(page)
+
+    def close(self):
+        self.conn.close()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix socket (server.py --unix)"""
+
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class HTTPPeer:
+    """Primary reached through the checkout server's /catalog endpoints"""
+
+    def __init__(self, host="127.0.0.1", port=8765, unix_path=None, timeout=2.0):
+        if unix_path:
+            self.conn = UnixHTTPConnection(unix_path, timeout)
+        else:
+            self.conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def get(self, path):
+        try:
+            self.conn.request("GET", path)
+            response = self.conn.getresponse()
+            payload = json.loads(response.read())
+        except (http.client.HTTPException, ValueError) as e:
+            self.conn.close()
+            raise OSError(f"Bad response from primary: {e}") from e
+        except OSError:
+            self.conn.close()  # reconnect on the next request
+            raise
+        if response.status != 200:
+            raise OSError(f"Primary returned {response.status}: {payload.get('error')}")
+        return payload
+
+    def changes(self, since, limit):
+        payload = self.get(f"/catalog/changes?since={since}&limit={limit}")
+        return payload["version"], [tuple(change) for change in payload["changes"]]
+
+    def snapshot(self, after, limit):
+        payload = self.get(f"/catalog/snapshot?after={quote(after)}&limit={limit}")
+        return payload["version"], [tuple(row) for row in payload["products"]]
+
+    def close(self):
+        self.conn.close()
+
+
+def connect_peer(address):
+    """Return a peer for "host:port", a Unix socket path or a products .db file"""
+    if address.endswith(".db"):
+        return DatabasePeer(address)
+    if "/" in address:
+        return HTTPPeer(unix_path=address)
+    host, _, port = address.rpartition(":")
+    return HTTPPeer(host or "127.0.0.1", int(port))
+
+
+class ReplicaClient:
+    """Pulls catalog changes from a peer into a local ProductManager.
+
+    sync() can be called from any thread that may emit catalog events;
+    start() runs it on a background thread, for headless replicas. A
+    GUI can call fetch() on a worker thread, so a slow primary never
+    blocks it, and apply() the batch on its own thread.
+    """
+
+    def __init__(self, product_manager, peer, batch_size=1000):
+        self.product_manager = product_manager
+        self.peer = peer
+        self.batch_size = batch_size
+        self.snapshot = None  # (start version, names copied, last name) while paging
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def fetch(self):
+        """Fetch the next batch from the peer for apply(); the local
+        catalog is only read, so this can run on a worker thread while
+        apply() runs on the thread that handles catalog events"""
+        since = self.product_manager.replica_version()
+        if since is None:
+            # Not synced yet: the next page of a snapshot
+            after = self.snapshot[2] if self.snapshot else ""
+            return (None,) + self.peer.snapshot(after, self.batch_size)
+        return (since,) + self.peer.changes(since, self.batch_size)
+
+    def apply(self, batch):
+        """Apply a batch from fetch(); returns (changes applied, more),
+        where more is True if the peer has more to send"""
+        since, version, rows = batch
+        if since is None:
+            return self.apply_snapshot(version, rows)
+        applied = 0
+        if rows or version != since:
+            applied = self.product_manager.apply_changes(rows, version)
+        return applied, len(rows) == self.batch_size
+
+    def apply_snapshot(self, version, rows):
+        """Copy one snapshot page; after the last page, products the peer
+        does not have are removed and the change feed is followed from
+        the version the snapshot started at"""
+        pm = self.product_manager
+        if self.snapshot is None:
+            # Changes made while paging are picked up from here on
+            self.snapshot = (version, set(), "")
+        start_version, seen, _ = self.snapshot
+        applied = pm.apply_changes([(None, name, sku, price, stock)
+                                    for name, sku, price, stock in rows])
+        seen.update(row[0] for row in rows)
+        if len(rows) == self.batch_size:
+            self.snapshot = (start_version, seen, rows[-1][0])
+            return applied, True
+        stale = [(None, name, None, None, None)
+                 for name in pm.iter_product_names() if name not in seen]
+        applied += pm.apply_changes(stale, start_version)
+        self.snapshot = None
+        return applied, True
+
+    def sync(self, max_batches=None):
+        """Apply changes made on the peer since the last sync, starting
+        with a snapshot if this catalog has never been synced.
+
+        Returns (changes applied, more), where more is True if
+        max_batches stopped it before catching up.
+        """
+        applied = batches = 0
+        while True:
+            count, more = self.apply(self.fetch())
+            applied += count
+            batches += 1
+            if not more:
+                return applied, False
+            if max_batches and batches >= max_batches:
+                return applied, True
+
+    def run(self, interval):
+        while not self.stopped.is_set():
+            try:
+                self.sync()
+            except (OSError, sqlite3.Error):
+                pass  # primary unreachable or busy; retry on the next tick
+            self.stopped.wait(interval)
+
+    def start(self, interval=0.5):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, args=(interval,), name="catalog-replica",
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
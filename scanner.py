@@ -0,0 +1,94 @@
+"""
+Scanner module - Batched handling of barcode scanner input
+
+A keystroke-wedge scanner types a barcode followed by Enter, and at a
+busy lane the scans arrive faster than one catalog lookup, cart update
+and redraw each. ScanPipeline queues the scanned codes and handles them
+a batch at a time: every code in the batch is resolved with one catalog
+query, repeated products become a single quantity increment, and
+problems are returned as messages instead of raised, so the caller can
+show them without a blocking dialog and redraw only the lines that
+changed.
+"""
+from collections import deque
+
+from instrumentation import timed
+
+
+class ScanResult:
+    """Outcome of one batch: cart lines changed and error messages"""
+    __slots__ = ("scans", "changed", "errors")
+
+    def __init__(self, scans, changed, errors):
+        self.scans = scans
+        self.changed = changed  # product names, in scan order
+        self.errors = errors
+
+    def __repr__(self):
+        return f"ScanResult({self.scans} scans, changed={self.changed}, errors={self.errors})"
+
+
+class ScanPipeline:
+    """Queue of scanned codes applied to a POSFunctions cart in batches.
+
+    submit() only appends to the queue and may be called from any
+    thread; process() applies everything queued so far.
+    """
+
+    def __init__(self, pos_functions):
+        self.pos_functions = pos_functions
+        self.product_manager = pos_functions.product_manager
+        self.pending = deque()
+
+    def submit(self, code):
+        code = code.strip()
+        if code:
+            self.pending.append(code)
+
+    def has_pending(self):
+        return bool(self.pending)
+
+    def resolve(self, codes):
+        """Return {code: product name} for barcodes and exact product names"""
+        resolved = self.product_manager.names_for_skus(codes)
+        rest = [code for code in codes if code not in resolved]
+        if rest:
+            resolved.update((name, name) for name in self.product_manager.existing_names(rest))
+        return resolved
+
+    @timed("scan.batch")
+    def process(self):
+        """Apply every queued scan to the cart and return a ScanResult"""
+        counts = {}  # code -> scans, in first-scan order
+        scans = 0
+        while self.pending:
+            code = self.pending.popleft()
+            counts[code] = counts.get(code, 0) + 1
+            scans += 1
+        if not counts:
+            return ScanResult(0, [], [])
+
+        resolved = self.resolve(list(counts))
+        errors = []
+        quantities = {}  # product name -> units to add
+        for code, count in counts.items():
+            name = resolved.get(code)
+            if name is None:
+                errors.append(f"Unknown barcode: {code}")
+            else:
+                quantities[name] = quantities.get(name, 0) + count
+
+        pos = self.pos_functions
+        changed = []
+        for name, quantity in quantities.items():
+            if pos.add_to_cart(name, quantity):
+                changed.append(name)
+                continue
+            # Add whatever stock is left and report the rest
+            available = pos.reservations.available(name)
+            if 0 < available < quantity and pos.add_to_cart(name, available):
+                changed.append(name)
+                errors.append(f"Only {available} of {quantity} {name} in stock")
+            else:
+                errors.append(f"{name} is out of stock")
+        return ScanResult(scans, changed, errors)
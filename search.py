@@ -0,0 +1,172 @@
+"""
+Search module - Barcode and type-ahead lookup for the product catalog
+"""
+import difflib
+from bisect import bisect_left, insort
+
+from instrumentation import timed
+from products import PRODUCT_ADDED, PRODUCT_DELETED, PRODUCT_UPDATED
+
+# Names compared by the fuzzy fallback, keeping it well under a millisecond
+FUZZY_CANDIDATES = 500
+
+
+class ProductSearchIndex:
+    """In-memory lookup structures kept next to a ProductManager.
+
+    - a hash index from SKU/barcode to product name
+    - a sorted list of lowercased names, searched with bisect for prefixes
+    - a sorted list of (word, name) so "chick" also finds
+      "1-pc Chicken with Rice"
+
+    build() loads the catalog once; subscribe handle_events to the
+    ProductManager to keep it current as products change.
+    """
+
+    def __init__(self, product_manager):
+        self.product_manager = product_manager
+        self.by_sku = {}  # sku -> name
+        self.skus = {}  # name -> sku
+        self.names = []  # sorted (lowercased name, name)
+        self.words = []  # sorted (lowercased word, name)
+
+    def build(self):
+        """Load every product from the catalog"""
+        names = []
+        words = []
+        for name, sku in self.product_manager.iter_name_skus():
+            self.skus[name] = sku
+            if sku:
+                self.by_sku[sku] = name
+            names.append((name.lower(), name))
+            words.extend((word, name) for word in self.split_words(name))
+        names.sort()
+        words.sort()
+        self.names = names
+        self.words = words
+        return self
+
+    @staticmethod
+    def split_words(name):
+        # The first word is already covered by the full-name prefix list
+        return set(name.lower().split()[1:])
+
+    def add(self, name, sku=None):
+        """Add a product, or update the SKU of one already indexed"""
+        if name in self.skus:
+            old_sku = self.skus[name]
+            if old_sku and self.by_sku.get(old_sku) == name:
+                del self.by_sku[old_sku]
+            if sku is None:
+                sku = old_sku
+        else:
+            insort(self.names, (name.lower(), name))
+            for word in self.split_words(name):
+                insort(self.words, (word, name))
+        self.skus[name] = sku
+        if sku:
+            self.by_sku[sku] = name
+
+    def add_many(self, products):
+        """Add or update many (name, sku) pairs, sorting once at the end"""
+        new_names = []
+        new_words = []
+        for name, sku in products:
+            if name in self.skus:
+                self.add(name, sku)
+                continue
+            self.skus[name] = sku
+            if sku:
+                self.by_sku[sku] = name
+            new_names.append((name.lower(), name))
+            new_words.extend((word, name) for word in self.split_words(name))
+        if new_names:
+            self.names.extend(new_names)
+            self.names.sort()
+            self.words.extend(new_words)
+            self.words.sort()
+
+    def remove(self, name):
+        """Remove a product"""
+        if name not in self.skus:
+            return
+        sku = self.skus.pop(name)
+        if sku and self.by_sku.get(sku) == name:
+            del self.by_sku[sku]
+        self.remove_entry(self.names, (name.lower(), name))
+        for word in self.split_words(name):
+            self.remove_entry(self.words, (word, name))
+
+    def handle_events(self, events):
+        """ProductManager listener: apply added, updated and deleted products"""
+        upserts = []
+        for event in events:
+            if event.kind == PRODUCT_ADDED or event.kind == PRODUCT_UPDATED:
+                upserts.append((event.name, event.sku))
+            elif event.kind == PRODUCT_DELETED:
+                self.remove(event.name)
+        if len(upserts) == 1:
+            self.add(*upserts[0])
+        elif upserts:
+            self.add_many(upserts)
+
+    @staticmethod
+    def remove_entry(entries, entry):
+        i = bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+
+    def lookup_sku(self, sku):
+        """Return the product name for a barcode/SKU, or None"""
+        return self.by_sku.get(sku)
+
+    @staticmethod
+    def prefix_matches(entries, prefix):
+        """Yield names whose key starts with prefix, in sorted order"""
+        i = bisect_left(entries, (prefix,))
+        while i < len(entries) and entries[i][0].startswith(prefix):
+            yield entries[i][1]
+            i += 1
+
+    @timed("search.query")
+    def search(self, text, limit=10, fuzzy=False):
+        """Return up to limit product names matching the typed text.
+
+        Names starting with the text come first, then names with a later
+        word starting with it. With fuzzy=True, remaining slots are filled
+        with close spellings.
+        """
+        text = text.strip()
+        if not text:
+            return [name for _, name in self.names[:limit]]
+        name = self.lookup_sku(text)
+        if name:
+            return [name]
+
+        prefix = text.lower()
+        results = []
+        seen = set()
+        for source in (self.names, self.words):
+            for name in self.prefix_matches(source, prefix):
+                if name not in seen:
+                    seen.add(name)
+                    results.append(name)
+                    if len(results) >= limit:
+                        return results
+
+        if fuzzy and len(results) < limit:
+            # Compare against a bounded slice of names sharing the first letter
+            start = bisect_left(self.names, (prefix[:1],))
+            candidates = {}
+            for key, name in self.names[start:start + FUZZY_CANDIDATES]:
+                if not key.startswith(prefix[:1]):
+                    break
+                candidates[key] = name
+            for key in difflib.get_close_matches(prefix, candidates, n=limit, cutoff=0.6):
+                name = candidates[key]
+                if name not in seen:
+                    seen.add(name)
+                    results.append(name)
+                    if len(results) >= limit:
+                        break
+        return results
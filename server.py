@@ -0,0 +1,417 @@
+"""
+Server module - Headless checkout API for many terminals
+
+Runs an asyncio HTTP/1.1 server (TCP or Unix socket) exposing catalog,
+cart and purchase operations. Every session has its own cart; all
+sessions share one ProductManager and StockReservations.
+
+    python server.py [--host 127.0.0.1] [--port 8765] [--unix PATH] [--db PATH]
+                     [--ledger DIR] [--journal DIR] [--pricing pricing.json]
+                     [--session-timeout S]
+
+Sessions left idle for --session-timeout seconds are closed and their
+carts released, so a terminal that disappears mid-sale does not hold
+stock forever.
+
+Endpoints (JSON in and out):
+    GET    /products?after=NAME&limit=N    page of products ordered by name
+    GET    /products/{name}                one product
+    GET    /catalog/changes?since=V        products changed after catalog version V
+    GET    /catalog/snapshot?after=NAME    page of the whole catalog, for new replicas
+    POST   /sessions                       new session -> {"session": id}
+    DELETE /sessions/{id}                  close session, releasing its cart
+    GET    /sessions/{id}/cart             cart lines and totals
+    POST   /sessions/{id}/cart             {"product", "quantity"} add to cart
+    PUT    /sessions/{id}/cart/{name}      {"quantity"} change a line
+    DELETE /sessions/{id}/cart/{name}      remove a line
+    DELETE /sessions/{id}/cart             clear the cart
+    POST   /sessions/{id}/purchase         complete purchase -> receipt
+    GET    /reports/day?day=YYYY-MM-DD     sales totals for a day (default today)
+    GET    /reports/low-stock?threshold=N  products at or below the threshold
+    GET    /metrics                        p50/p95/p99 latencies of instrumented calls
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+import traceback
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from functions import POSFunctions
+from dirlock import DirectoryInUse
+from instrumentation import metrics, timed
+from inventory import StockReservations
+from pricing import PricingRules, from_cents
+from ledger import SalesLedger
+from products import DEFAULT_DB_PATH, ProductManager
+from receipt import Receipt, ReceiptRenderer
+from receipt_journal import ReceiptJournal
+from receipt_writer import ReceiptWriter
+from summaries import SalesSummaries
+
+
+class APIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class CheckoutService:
+    """Sessions and checkout operations, independent of the transport"""
+
+    def __init__(self, product_manager, receipt_writer=None, pricing=None):
+        self.product_manager = product_manager
+        self.reservations = StockReservations(product_manager)
+        # One compiled rule set shared by every session
+        self.pricing = pricing or PricingRules()
+        self.receipt_writer = receipt_writer
+        self.receipt_renderer = ReceiptRenderer()
+        self.summaries = SalesSummaries(product_manager)
+        self.sessions = {}
+        self.last_used = {}  # session id -> time.monotonic() of its last request
+        # Sessions whose purchase is running on a worker thread
+        self.checking_out = set()
+        self.session_ids = itertools.count(1)
+
+    def session(self, session_id, checkout=False):
+        pos = self.sessions.get(session_id)
+        if pos is None:
+            raise APIError(HTTPStatus.NOT_FOUND, f"Unknown session: {session_id}")
+        if session_id in self.checking_out and not checkout:
+            raise APIError(HTTPStatus.CONFLICT, "Purchase in progress")
+        self.last_used[session_id] = time.monotonic()
+        return pos
+
+    def create_session(self):
+        session_id = str(next(self.session_ids))
+        self.sessions[session_id] = POSFunctions(self.product_manager, self.reservations,
+                                                 self.pricing)
+        self.last_used[session_id] = time.monotonic()
+        return {"session": session_id}
+
+    def close_session(self, session_id):
+        self.session(session_id).clear_cart()
+        del self.sessions[session_id]
+        del self.last_used[session_id]
+        return {}
+
+    def expire_sessions(self, idle_seconds):
+        """Close sessions idle for longer than idle_seconds; returns how many"""
+        cutoff = time.monotonic() - idle_seconds
+        expired = [session_id for session_id, used in self.last_used.items()
+                   if used < cutoff and session_id not in self.checking_out]
+        for session_id in expired:
+            self.close_session(session_id)
+        return len(expired)
+
+    def cart(self, session_id):
+        pos = self.session(session_id)
+        priced = pos.price_cart()
+        return {
+            "lines": [{"product": item.product, "price": str(item.price),
+                       "quantity": item.quantity, "total": str(item.total)}
+                      for item in pos.get_cart_items()],
+            "subtotal": str(from_cents(priced.subtotal_cents)),
+            "discounts": [{"description": description, "amount": str(from_cents(cents))}
+                          for description, cents in priced.discounts],
+            "tax": str(from_cents(priced.tax_cents)),
+            "grand_total": str(from_cents(priced.total_cents)),
+        }
+
+    def add_item(self, session_id, product_name, quantity):
+        pos = self.session(session_id)
+        if self.product_manager.get_product(product_name) is None:
+            raise APIError(HTTPStatus.NOT_FOUND, f"Unknown product: {product_name}")
+        if not pos.add_to_cart(product_name, quantity):
+            raise APIError(HTTPStatus.CONFLICT, "Insufficient stock")
+        return self.cart(session_id)
+
+    def update_item(self, session_id, product_name, quantity):
+        pos = self.session(session_id)
+        if pos.get_cart_item(product_name) is None:
+            raise APIError(HTTPStatus.NOT_FOUND, f"Not in cart: {product_name}")
+        if not pos.update_cart_item(product_name, quantity):
+            raise APIError(HTTPStatus.CONFLICT, "Insufficient stock")
+        return self.cart(session_id)
+
+    def delete_item(self, session_id, product_name):
+        if not self.session(session_id).delete_cart_item(product_name):
+            raise APIError(HTTPStatus.NOT_FOUND, f"Not in cart: {product_name}")
+        return self.cart(session_id)
+
+    def clear_cart(self, session_id):
+        self.session(session_id).clear_cart()
+        return self.cart(session_id)
+
+    def begin_purchase(self, session_id):
+        """Hand a session to a purchase running on a worker thread; other
+        requests for it get 409 until end_purchase()"""
+        self.session(session_id)
+        self.checking_out.add(session_id)
+
+    def end_purchase(self, session_id):
+        self.checking_out.discard(session_id)
+
+    def purchase(self, session_id):
+        pos = self.session(session_id, checkout=True)
+        if not pos.get_cart_items():
+            raise APIError(HTTPStatus.CONFLICT, "Cart is empty")
+        # Priced once: the receipt and the ledger record show the same amounts
+        priced = pos.price_cart()
+        receipt = Receipt.from_cart(pos, priced=priced)
+        if not pos.complete_purchase(priced):
+            raise APIError(HTTPStatus.CONFLICT, "Some items are no longer in stock")
+        if self.receipt_writer:
+            self.receipt_writer.submit(self.receipt_renderer.render_text(receipt))
+        return receipt.to_dict()
+
+    def list_products(self, after="", limit=100):
+        rows = self.product_manager.get_products_page_after(after, limit)
+        return {"products": [{"name": name, "price": price, "stock": stock}
+                             for name, price, stock in rows]}
+
+    def get_product(self, product_name):
+        product = self.product_manager.get_product(product_name)
+        if product is None:
+            raise APIError(HTTPStatus.NOT_FOUND, f"Unknown product: {product_name}")
+        return {"name": product.name, "sku": product.sku,
+                "price": product.price, "stock": product.stock}
+
+    def catalog_changes(self, since=0, limit=1000):
+        version, changes = self.product_manager.changes_since(since, limit)
+        return {"version": version, "changes": changes}
+
+    def catalog_snapshot(self, after="", limit=1000):
+        pm = self.product_manager
+        with pm.lock:
+            return {"version": pm.catalog_version(),
+                    "products": pm.get_catalog_page_after(after, limit)}
+
+    def day_report(self, day=None):
+        summaries = self.summaries
+        return {**summaries.day_totals(day),
+                "hours": summaries.hourly_totals(day),
+                "top_products": [{"name": name, "quantity": quantity, "revenue_cents": revenue}
+                                 for name, quantity, revenue in summaries.top_products(10, day)]}
+
+    def low_stock(self, threshold=None):
+        return {"products": [{"name": name, "stock": stock}
+                             for name, stock in self.summaries.low_stock(threshold)]}
+
+
+def product_from(body):
+    product = body.get("product")
+    if not isinstance(product, str) or not product:
+        raise APIError(HTTPStatus.BAD_REQUEST, "Please select a product")
+    return product
+
+
+def quantity_from(body):
+    quantity = body.get("quantity")
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+        raise APIError(HTTPStatus.BAD_REQUEST, "Please enter a valid quantity")
+    return quantity
+
+
+def purchase_session(method, target):
+    """Return the session id of a purchase request, or None"""
+    parts = urlsplit(target).path.strip("/").split("/")
+    if method == "POST" and len(parts) == 3 and parts[0] == "sessions" and parts[2] == "purchase":
+        return unquote(parts[1])
+    return None
+
+
+class CheckoutServer:
+    """Minimal HTTP/1.1 front end for a CheckoutService.
+
+    Requests are handled on the event loop; each operation is a short
+    indexed catalog query, and running them on one thread also keeps
+    every session's cart free of concurrent access. Purchases are the
+    exception: they wait for the ledger fsync, so they run on the
+    loop's default executor, where concurrent purchases share one fsync,
+    and the session rejects other requests until its purchase is done.
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    def route(self, method, path, query, body):
+        service = self.service
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+
+        if parts[0] == "products":
+            if len(parts) == 1 and method == "GET":
+                after = query.get("after", [""])[0]
+                limit = min(int(query.get("limit", ["100"])[0]), 1000)
+                return service.list_products(after, limit)
+            if len(parts) == 2 and method == "GET":
+                return service.get_product(parts[1])
+
+        elif parts[0] == "catalog" and len(parts) == 2 and method == "GET":
+            limit = min(int(query.get("limit", ["1000"])[0]), 10000)
+            if parts[1] == "changes":
+                return service.catalog_changes(int(query.get("since", ["0"])[0]), limit)
+            if parts[1] == "snapshot":
+                return service.catalog_snapshot(query.get("after", [""])[0], limit)
+
+        elif parts[0] == "sessions":
+            if len(parts) == 1 and method == "POST":
+                return service.create_session()
+            if len(parts) == 2 and method == "DELETE":
+                return service.close_session(parts[1])
+            if len(parts) == 3 and parts[2] == "cart":
+                if method == "GET":
+                    return service.cart(parts[1])
+                if method == "POST":
+                    return service.add_item(parts[1], product_from(body), quantity_from(body))
+                if method == "DELETE":
+                    return service.clear_cart(parts[1])
+            if len(parts) == 4 and parts[2] == "cart":
+                if method == "PUT":
+                    return service.update_item(parts[1], parts[3], quantity_from(body))
+                if method == "DELETE":
+                    return service.delete_item(parts[1], parts[3])
+            if len(parts) == 3 and parts[2] == "purchase" and method == "POST":
+                return service.purchase(parts[1])
+
+        elif parts[0] == "metrics" and len(parts) == 1 and method == "GET":
+            return {"timers": metrics.snapshot()}
+
+        elif parts[0] == "reports" and len(parts) == 2 and method == "GET":
+            if parts[1] == "day":
+                return service.day_report(query.get("day", [None])[0])
+            if parts[1] == "low-stock":
+                threshold = query.get("threshold", [None])[0]
+                return service.low_stock(int(threshold) if threshold else None)
+
+        raise APIError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                raw_body = await reader.readexactly(length) if length else b""
+
+                session_id = purchase_session(method, target)
+                if session_id is None:
+                    status, payload = self.dispatch(method, target, raw_body)
+                else:
+                    status, payload = await self.dispatch_purchase(session_id, method, target,
+                                                                   raw_body)
+                data = json.dumps(payload).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @timed("server.request")
+    def dispatch(self, method, target, raw_body):
+        url = urlsplit(target)
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+            if not isinstance(body, dict):
+                raise ValueError("Body must be a JSON object")
+            return HTTPStatus.OK, self.route(method, url.path, parse_qs(url.query), body)
+        except APIError as e:
+            return e.status, {"error": e.message}
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception:
+            # Keep serving the other terminals; the details go to the log
+            traceback.print_exc()
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+
+    async def dispatch_purchase(self, session_id, method, target, raw_body):
+        """Run a purchase on the default executor, so waiting for the
+        ledger fsync does not hold up the other terminals"""
+        try:
+            self.service.begin_purchase(session_id)
+        except APIError as e:
+            return e.status, {"error": e.message}
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self.dispatch, method, target, raw_body)
+        finally:
+            self.service.end_purchase(session_id)
+
+    async def start(self, host="127.0.0.1", port=8765, unix_path=None):
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle_connection, unix_path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def expire_idle_sessions(self, idle_seconds, interval=30):
+        """Periodically close sessions that have been idle too long"""
+        while True:
+            await asyncio.sleep(min(interval, idle_seconds))
+            self.service.expire_sessions(idle_seconds)
+
+
+async def serve(args):
+    product_manager = ProductManager(args.db)
+    ledger = SalesLedger(args.ledger)
+    product_manager.attach_ledger(ledger)
+    receipt_writer = ReceiptWriter(ReceiptJournal(args.journal))
+    pricing = PricingRules.load(args.pricing) if args.pricing else None
+    service = CheckoutService(product_manager, receipt_writer, pricing)
+    checkout_server = CheckoutServer(service)
+    server = await checkout_server.start(args.host, args.port, args.unix)
+    print(f"Serving on {args.unix or f'{args.host}:{args.port}'}")
+    reaper = asyncio.create_task(checkout_server.expire_idle_sessions(args.session_timeout))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        reaper.cancel()
+        receipt_writer.close()
+        ledger.close()
+        product_manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless POS checkout server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--ledger", default="ledger", help="sales ledger directory")
+    # Not the POS window's receipts/journal: each journal has one writer
+    parser.add_argument("--journal", default=os.path.join("receipts", "server-journal"),
+                        help="receipt journal directory")
+    parser.add_argument("--pricing", metavar="PATH", help="promotions and tax rates (JSON)")
+    parser.add_argument("--session-timeout", type=float, default=900, metavar="S",
+                        help="close sessions idle for this many seconds (default 900)")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except DirectoryInUse as e:
+        parser.exit(1, f"{e}\n")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
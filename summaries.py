@@ -0,0 +1,176 @@
+"""
+Summaries module - Running sales totals for end-of-day and live reports
+
+ProductManager.commit_stock() adds every sale to per-day, per-hour and
+per-product rollup tables in the same transaction that takes the stock,
+so the work per purchase is proportional to the lines in the cart and
+the totals can never disagree with the catalog. Reports then read a
+handful of rows by primary key instead of scanning sales history.
+"""
+from datetime import datetime
+
+SUMMARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sales_by_day (
+    day TEXT PRIMARY KEY,
+    receipts INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    revenue_cents INTEGER NOT NULL,
+    tax_cents INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sales_by_hour (
+    day TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    receipts INTEGER NOT NULL,
+    items INTEGER NOT NULL,
+    revenue_cents INTEGER NOT NULL,
+    tax_cents INTEGER NOT NULL,
+    PRIMARY KEY (day, hour)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sales_by_product (
+    day TEXT NOT NULL,
+    product TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    revenue_cents INTEGER NOT NULL,
+    PRIMARY KEY (day, product)
+) WITHOUT ROWID;
+"""
+SQL_ADD_DAY = """
+INSERT INTO sales_by_day (day, receipts, items, revenue_cents, tax_cents)
+VALUES (?, 1, ?, ?, ?)
+ON CONFLICT(day) DO UPDATE SET
+    receipts = receipts + 1,
+    items = items + excluded.items,
+    revenue_cents = revenue_cents + excluded.revenue_cents,
+    tax_cents = tax_cents + excluded.tax_cents
+"""
+SQL_ADD_HOUR = """
+INSERT INTO sales_by_hour (day, hour, receipts, items, revenue_cents, tax_cents)
+VALUES (?, ?, 1, ?, ?, ?)
+ON CONFLICT(day, hour) DO UPDATE SET
+    receipts = receipts + 1,
+    items = items + excluded.items,
+    revenue_cents = revenue_cents + excluded.revenue_cents,
+    tax_cents = tax_cents + excluded.tax_cents
+"""
+SQL_ADD_PRODUCT = """
+INSERT INTO sales_by_product (day, product, quantity, revenue_cents)
+VALUES (?, ?, ?, ?)
+ON CONFLICT(day, product) DO UPDATE SET
+    quantity = quantity + excluded.quantity,
+    revenue_cents = revenue_cents + excluded.revenue_cents
+"""
+SQL_GET_DAY = """
+SELECT receipts, items, revenue_cents, tax_cents FROM sales_by_day WHERE day = ?
+"""
+SQL_GET_HOURS = """
+SELECT hour, receipts, items, revenue_cents, tax_cents FROM sales_by_hour WHERE day = ?
+"""
+SQL_GET_PRODUCT = """
+SELECT quantity, revenue_cents FROM sales_by_product WHERE day = ? AND product = ?
+"""
+SQL_TOP_PRODUCTS = """
+SELECT product, quantity, revenue_cents FROM sales_by_product WHERE day = ?
+ORDER BY revenue_cents DESC, product LIMIT ?
+"""
+SQL_LOW_STOCK = """
+SELECT name, stock FROM products WHERE stock <= ? ORDER BY stock, name LIMIT ?
+"""
+
+SUMMARY_FIELDS = ("receipts", "items", "revenue_cents", "tax_cents")
+
+
+def record_sale(conn, time, lines, tax_cents):
+    """Add one sale to the rollups; call inside the sale's transaction.
+
+    time is an ISO timestamp string, lines are (name, quantity,
+    price_cents[, discount_cents]); revenue is counted after discounts.
+    """
+    day = time[:10]
+    hour = int(time[11:13])
+    items = 0
+    revenue = 0
+    for name, quantity, price_cents, *discount in lines:
+        amount = quantity * price_cents - (discount[0] if discount else 0)
+        items += quantity
+        revenue += amount
+        conn.execute(SQL_ADD_PRODUCT, (day, name, quantity, amount))
+    conn.execute(SQL_ADD_DAY, (day, items, revenue, tax_cents))
+    conn.execute(SQL_ADD_HOUR, (day, hour, items, revenue, tax_cents))
+
+
+def today():
+    return datetime.now().strftime("%Y-%m-%d")
+
+
+class SalesSummaries:
+    """Read side of the rollups kept by a ProductManager.
+
+    Days are "YYYY-MM-DD" strings and default to today; amounts are in
+    centavos.
+    """
+
+    def __init__(self, product_manager, low_stock_threshold=5):
+        self.product_manager = product_manager
+        self.low_stock_threshold = low_stock_threshold
+
+    def query(self, sql, params):
+        pm = self.product_manager
+        with pm.lock:
+            return pm.conn.execute(sql, params).fetchall()
+
+    def day_totals(self, day=None):
+        """Return {"receipts", "items", "revenue_cents", "tax_cents"} for a day"""
+        rows = self.query(SQL_GET_DAY, (day or today(),))
+        return dict(zip(SUMMARY_FIELDS, rows[0] if rows else (0, 0, 0, 0)))
+
+    def hourly_totals(self, day=None):
+        """Return 24 totals dicts, one per hour of the day"""
+        hours = [dict.fromkeys(SUMMARY_FIELDS, 0) for _ in range(24)]
+        for hour, *values in self.query(SQL_GET_HOURS, (day or today(),)):
+            hours[hour] = dict(zip(SUMMARY_FIELDS, values))
+        return hours
+
+    def product_totals(self, product_name, day=None):
+        """Return (quantity, revenue_cents) sold of one product on a day"""
+        rows = self.query(SQL_GET_PRODUCT, (day or today(), product_name))
+        return rows[0] if rows else (0, 0)
+
+    def top_products(self, limit=10, day=None):
+        """Return [(product, quantity, revenue_cents)] best sellers of a day"""
+        return self.query(SQL_TOP_PRODUCTS, (day or today(), limit))
+
+    def low_stock(self, threshold=None, limit=50):
+        """Return [(name, stock)] at or below the threshold, lowest first"""
+        if threshold is None:
+            threshold = self.low_stock_threshold
+        return self.query(SQL_LOW_STOCK, (threshold, limit))
+
+    def z_report(self, day=None, low_stock=None):
+        """Return the end-of-day report as text.
+
+        low_stock is a list of (name, stock, ...) to show instead of
+        products at or below low_stock_threshold.
+        """
+        day = day or today()
+        totals = self.day_totals(day)
+        lines = [
+            f"Z Report - {day}",
+            f"Receipts:      {totals['receipts']}",
+            f"Items sold:    {totals['items']}",
+            f"Sales:         ₱{totals['revenue_cents'] / 100:,.2f}",
+            f"Tax:           ₱{totals['tax_cents'] / 100:,.2f}",
+            f"Total:         ₱{(totals['revenue_cents'] + totals['tax_cents']) / 100:,.2f}",
+        ]
+        top = self.top_products(5, day)
+        if top:
+            lines.append("")
+            lines.append("Top products:")
+            for name, quantity, revenue in top:
+                lines.append(f"  {name} x{quantity}  ₱{revenue / 100:,.2f}")
+        low = self.low_stock(limit=10) if low_stock is None else low_stock
+        if low:
+            lines.append("")
+            lines.append("Low stock:")
+            for name, stock, *_ in low:
+                lines.append(f"  {name}: {stock}")
+        return "\n".join(lines)